@@ -1,6 +1,10 @@
 import m5
 from m5.objects import *
+from m5.util.convert import toFrequency
 import argparse
+import json
+import os
+import sys
 
 class L1ICache(Cache):
     """L1 I-Cache"""
@@ -38,22 +42,294 @@ def add_options(parser):
     parser.add_argument("--num-rob-entries", type=int, default=192)
     parser.add_argument("--num-iq-entries", type=int, default=64)
     parser.add_argument("--num-phys-int-regs", type=int, default=256)
+    parser.add_argument("--num-phys-float-regs", type=int, default=64)
+    parser.add_argument("--num-lq-entries", type=int, default=32)
+    parser.add_argument("--num-sq-entries", type=int, default=32)
+    parser.add_argument("--width", type=int, default=8,
+                        help="Fetch/decode/rename/dispatch/issue/writeback/"
+                             "commit width.")
+    parser.add_argument("--max-insts", type=int, default=0,
+                        help="Stop the detailed run after this many "
+                             "instructions (0 runs to completion). Used for "
+                             "low-fidelity runs by explore.py.")
+    parser.add_argument("--checkpoint-dir", default=None,
+                        help="ROI checkpoint directory. Restored from unless "
+                             "--take-checkpoint is given.")
+    parser.add_argument("--take-checkpoint", action="store_true",
+                        help="Fast-forward with an atomic CPU to the start of "
+                             "the daxpy loop, save a checkpoint to "
+                             "--checkpoint-dir and exit.")
+    parser.add_argument("--fast-forward", type=int, default=0,
+                        help="With --take-checkpoint, stop after this many "
+                             "instructions instead of at m5_work_begin.")
+    parser.add_argument("--sample-period", type=int, default=0,
+                        help="Sampled simulation: instructions per sampling "
+                             "unit (0 disables sampling).")
+    parser.add_argument("--sample-warmup", type=int, default=2000,
+                        help="Detailed warm-up instructions before each "
+                             "measured window.")
+    parser.add_argument("--sample-detail", type=int, default=1000,
+                        help="Measured detailed instructions per sampling "
+                             "unit.")
+    parser.add_argument("--stats-period-ticks", type=int, default=0,
+                        help="Dump a cumulative stats snapshot of the current "
+                             "phase every this many ticks.")
+    parser.add_argument("--stats-period-insts", type=int, default=0,
+                        help="Dump a cumulative stats snapshot of the current "
+                             "phase every this many instructions.")
+    parser.add_argument("--steady-state-tol", type=float, default=0.0,
+                        help="With a stats period, end the run once the CPI "
+                             "of the last --steady-state-window periods "
+                             "varies by less than this fraction.")
+    parser.add_argument("--steady-state-window", type=int, default=4)
+    parser.add_argument("--no-roi-markers", action="store_true",
+                        help="The workload has no m5_work_begin/m5_work_end: "
+                             "let --steady-state-tol end the run before any "
+                             "ROI is seen.")
+    parser.add_argument("--configs", default=None,
+                        help="Run several configurations in this gem5 "
+                             "process: comma-separated regs:iq:rob triples. "
+                             "The system is instantiated and fast-forwarded "
+                             "to the ROI once, then forked per configuration; "
+                             "each one gets <outdir>/regs{R}-iq{I}-rob{B}.")
+    parser.add_argument("--batch-jobs", type=int, default=1,
+                        help="With --configs, how many configurations to "
+                             "simulate at the same time.")
+    parser.add_argument("--exec-trace", default=None, metavar="FILE",
+                        help="Write a committed-instruction trace (Exec debug "
+                             "flags) to FILE in the output directory, for "
+                             "window_model.py. Combine with --max-insts.")
+    parser.add_argument("--pipeview", default=None, metavar="FILE",
+                        help="Write an O3PipeView pipeline trace to FILE in "
+                             "the output directory (gzipped if it ends in "
+                             ".gz), for pipeview.py. Combine with --max-insts.")
+    parser.add_argument("--config-only", action="store_true",
+                        help="Write config.ini/config.json and exit without "
+                             "simulating (used to key the result cache).")
 add_options(parser)
 args = parser.parse_args()
+if args.take_checkpoint and not args.checkpoint_dir:
+    parser.error("--take-checkpoint requires --checkpoint-dir")
+if args.stats_period_ticks and args.stats_period_insts:
+    parser.error("--stats-period-ticks and --stats-period-insts are "
+                 "mutually exclusive")
+if args.steady_state_tol and not (args.stats_period_ticks or
+                                  args.stats_period_insts):
+    parser.error("--steady-state-tol needs a stats period")
+if args.exec_trace and args.pipeview:
+    parser.error("--exec-trace and --pipeview share the trace output; "
+                 "pick one")
+if args.sample_period and \
+        args.sample_period <= args.sample_warmup + args.sample_detail:
+    parser.error("--sample-period must exceed --sample-warmup + "
+                 "--sample-detail")
+if args.configs and (args.take_checkpoint or args.sample_period or
+                     args.exec_trace or args.pipeview):
+    parser.error("--configs cannot be combined with --take-checkpoint, "
+                 "--sample-period, --exec-trace or --pipeview")
+
+def parse_configs(text):
+    configs = []
+    for item in text.split(","):
+        regs, iq, rob = (int(v) for v in item.split(":"))
+        configs.append((regs, iq, rob))
+    return configs
+
+def config_dir(base, cfg):
+    regs, iq, rob = cfg
+    return os.path.join(base, f"regs{regs}-iq{iq}-rob{rob}")
+
+def redirect_output(outdir):
+    log = os.open(os.path.join(outdir, "simout"),
+                  os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    os.dup2(log, 1)
+    os.dup2(log, 2)
+
+def probe_configs(configs):
+    """--config-only with --configs: fork one child per configuration.
+
+    Nothing is simulated, so the children can fork before anything is
+    instantiated and build their own single-configuration system; each
+    writes config.json to its own directory. The parent only waits and
+    never returns.
+    """
+    base = m5.options.outdir
+    failed = []
+    for cfg in configs:
+        sys.stdout.flush()
+        pid = os.fork()
+        if pid == 0:
+            outdir = config_dir(base, cfg)
+            os.makedirs(outdir, exist_ok=True)
+            m5.options.outdir = outdir
+            m5.core.setOutputDir(outdir)
+            redirect_output(outdir)
+            return cfg
+        if os.waitpid(pid, 0)[1] != 0:
+            failed.append(cfg)
+    for regs, iq, rob in failed:
+        print(f"Configuration regs={regs} iq={iq} rob={rob} failed")
+    sys.exit(1 if failed else 0)
+
+STATS_END_MARKER = "---------- End Simulation Statistics"
+# Stats of the batch's atomic CPU (system.cpu) that the measured O3 CPU
+# shares and that keep their names
+SHARED_STATS = ("system.cpu.icache.", "system.cpu.dcache.",
+                "system.cpu.workload.")
+
+def adopt_stats(outdir, index):
+    """Give a forked child's stats.txt single-configuration stat names.
+
+    The child's stats.txt lists every CPU of the batch. Keep the caches and
+    the O3 CPU the child ran, renamed from system.o3_cpu{index} to
+    system.cpu, and drop the rest. Returns False unless the child left a
+    complete stats.txt of its own: as many blocks as stats_blocks.json has
+    labels.
+    """
+    path = os.path.join(outdir, "stats.txt")
+    try:
+        with open(os.path.join(outdir, "stats_blocks.json")) as f:
+            labels = json.load(f)
+        with open(path) as f:
+            lines = f.readlines()
+    except (OSError, ValueError):
+        return False
+    blocks = sum(1 for ln in lines if ln.startswith(STATS_END_MARKER))
+    if not labels or blocks != len(labels):
+        return False
+    own = f"system.o3_cpu{index}."
+    kept = []
+    for ln in lines:
+        if ln.startswith(own):
+            kept.append("system.cpu." + ln[len(own):])
+        elif not ln.startswith("system.o3_cpu") and \
+                (not ln.startswith("system.cpu.") or
+                 ln.startswith(SHARED_STATS)):
+            kept.append(ln)
+    with open(path + ".tmp", "w") as f:
+        f.writelines(kept)
+    os.replace(path + ".tmp", path)
+    return True
+
+def run_batch(configs):
+    """Fork one child per configuration off the instantiated, warmed system.
+
+    The parent has paid for gem5 start-up, SimObject instantiation, loading
+    the ELF and the functional run up to the ROI once; m5.fork() gives each
+    child its own output directory and stats stream. The child returns the
+    index of its configuration and carries on with the rest of this script
+    on that configuration's O3 CPU. The parent only waits, checks each
+    child's stats.txt and never returns.
+    """
+    base = m5.options.outdir
+    running = {}
+    failed = []
+
+    def reap():
+        pid, status = os.wait()
+        index = running.pop(pid)
+        outdir = config_dir(base, configs[index])
+        if status != 0:
+            failed.append((configs[index], f"exit status {status}"))
+        elif not adopt_stats(outdir, index):
+            failed.append((configs[index], f"no complete stats.txt in {outdir}"))
+
+    for index, cfg in enumerate(configs):
+        while len(running) >= max(1, args.batch_jobs):
+            reap()
+        outdir = config_dir(base, cfg)
+        os.makedirs(outdir, exist_ok=True)
+        sys.stdout.flush()
+        pid = m5.fork(outdir.replace("%", "%%"))
+        if pid == 0:
+            redirect_output(outdir)
+            return index
+        running[pid] = index
+    while running:
+        reap()
+    for (regs, iq, rob), reason in failed:
+        print(f"Configuration regs={regs} iq={iq} rob={rob} failed: {reason}")
+    # Leave before gem5's exit handler dumps the parent's warm-up stats
+    sys.stdout.flush()
+    os._exit(1 if failed else 0)
+
+batch = parse_configs(args.configs) if args.configs else []
+if batch and args.config_only:
+    (args.num_phys_int_regs, args.num_iq_entries,
+     args.num_rob_entries) = probe_configs(batch)
+    batch = []
+
+def config_args(cfg):
+    """args with the regs/iq/rob of one batch configuration"""
+    regs, iq, rob = cfg
+    return argparse.Namespace(**dict(vars(args), num_phys_int_regs=regs,
+                                     num_iq_entries=iq, num_rob_entries=rob))
+
+def make_o3_cpu(args, **kwargs):
+    # RISC-V O3 CPU
+    cpu = RiscvO3CPU(**kwargs)
+    # Set CPU parameters
+    cpu.numROBEntries = args.num_rob_entries
+    cpu.numIQEntries = args.num_iq_entries
+    cpu.numPhysIntRegs = args.num_phys_int_regs
+    cpu.numPhysFloatRegs = args.num_phys_float_regs
+    cpu.LQEntries = args.num_lq_entries
+    cpu.SQEntries = args.num_sq_entries
+    cpu.fetchWidth = cpu.decodeWidth = cpu.renameWidth = args.width
+    cpu.dispatchWidth = cpu.issueWidth = cpu.wbWidth = args.width
+    cpu.commitWidth = cpu.squashWidth = args.width
+    return cpu
 
 # Create System
 system = System()
-system.clk_domain = SrcClockDomain(clock = '2GHz', voltage_domain = VoltageDomain())
-system.mem_mode = 'timing'
+CPU_CLOCK = '2GHz'
+system.clk_domain = SrcClockDomain(clock = CPU_CLOCK, voltage_domain = VoltageDomain())
 system.mem_ranges = [AddrRange('2GiB')]
-# RISC-V O3 CPU
-system.cpu = RiscvO3CPU()
+if args.take_checkpoint:
+    # Cheap functional CPU used only to reach the start of the daxpy loop
+    system.mem_mode = 'atomic'
+    system.cpu = RiscvAtomicSimpleCPU()
+    if args.fast_forward:
+        system.cpu.max_insts_any_thread = args.fast_forward
+    else:
+        # m5_work_begin() in daxpy.cpp ends the fast-forward
+        system.exit_on_work_items = True
+elif args.sample_period:
+    # SMARTS-style sampling: an atomic CPU does functional warming (caches
+    # and branch predictor included) and hands over to the switched-out O3
+    # CPU for short detailed windows. The O3 CPU keeps the name system.cpu
+    # so its stats keep their usual names.
+    system.mem_mode = 'atomic'
+    system.cpu = make_o3_cpu(args, switched_out=True)
+    system.warm_cpu = RiscvAtomicSimpleCPU()
+    # The simple CPU looks up and trains a branch predictor when it has one;
+    # handing it the O3 CPU's own predictor keeps the predictor warm across
+    # functional warming, not only the caches. The detailed warm-up then
+    # only has to refill the pipeline.
+    system.warm_cpu.branchPred = system.cpu.branchPred
+    system.warm_cpu.createInterruptController()
+elif batch:
+    # An atomic CPU runs the shared part up to the ROI; every configuration
+    # has a switched-out O3 CPU that one forked child switches to (see
+    # run_batch). The atomic CPU is system.cpu so the ROI checkpoint
+    # restores into it and the caches keep their usual stat names.
+    system.mem_mode = 'atomic'
+    system.cpu = RiscvAtomicSimpleCPU()
+    system.exit_on_work_items = True
+    for i, cfg in enumerate(batch):
+        setattr(system, f"o3_cpu{i}",
+                make_o3_cpu(config_args(cfg), switched_out=True))
+else:
+    system.mem_mode = 'timing'
+    system.cpu = make_o3_cpu(args)
+    # m5_work_begin/m5_work_end around the daxpy loop delimit the ROI
+    system.exit_on_work_items = True
+batch_cpus = [getattr(system, f"o3_cpu{i}") for i in range(len(batch))]
 system.cpu.createInterruptController()
-# Set CPU parameters
-system.cpu.numROBEntries = args.num_rob_entries
-system.cpu.numIQEntries = args.num_iq_entries
-system.cpu.numPhysIntRegs = args.num_phys_int_regs
-system.cpu.numPhysFloatRegs = 64
+for cpu in batch_cpus:
+    cpu.createInterruptController()
+# CPU that starts out running the workload
+active_cpu = system.warm_cpu if args.sample_period else system.cpu
 # Add buses
 system.membus = SystemXBar()
 system.l2bus = L2XBar()
@@ -62,8 +338,8 @@ system.cpu.icache = L1ICache()
 system.cpu.dcache = L1DCache()
 system.l2cache = L2Cache()
 # Connect all components
-system.cpu.icache_port = system.cpu.icache.cpu_side
-system.cpu.dcache_port = system.cpu.dcache.cpu_side
+active_cpu.icache_port = system.cpu.icache.cpu_side
+active_cpu.dcache_port = system.cpu.dcache.cpu_side
 system.cpu.icache.mem_side = system.l2bus.cpu_side_ports
 system.cpu.dcache.mem_side = system.l2bus.cpu_side_ports
 system.l2bus.mem_side_ports = system.l2cache.cpu_side
@@ -78,21 +354,226 @@ system.mem_ctrl.port = system.membus.mem_side_ports
 process = Process()
 process.cmd = [args.cmd]
 system.workload = SEWorkload.init_compatible(args.cmd)
-system.cpu.workload = process
-system.cpu.createThreads()
+for cpu in [system.cpu] + ([system.warm_cpu] if args.sample_period else []) \
+        + batch_cpus:
+    cpu.workload = process
+    cpu.createThreads()
 
 # Instantiate and run
 root = Root(full_system=False, system=system)
-m5.instantiate()
+
+if args.config_only:
+    # instantiate() writes the resolved configuration; leave before gem5's
+    # exit handler dumps an empty stats.txt
+    m5.instantiate()
+    sys.stdout.flush()
+    os._exit(0)
+
+if args.take_checkpoint:
+    m5.instantiate()
+    print("--- Fast-forwarding to the daxpy loop ---")
+    exit_event = m5.simulate()
+    print('Exit @ tick {} because {}'.format(m5.curTick(), exit_event.getCause()))
+    if exit_event.getCause() == "exiting with last active thread context":
+        sys.exit("Workload exited before the ROI; build daxpy with "
+                 "-DGEM5_ROI or pass --fast-forward")
+    m5.checkpoint(args.checkpoint_dir)
+    print(f"Checkpoint written to {args.checkpoint_dir}")
+    sys.exit(0)
+
+if args.exec_trace:
+    # One line per committed instruction: op class, disassembly (for the
+    # register dependences) and effective address
+    m5.trace.output(args.exec_trace)
+    m5.debug.flags["Exec"].enable()
+    m5.trace.enable()
+if args.pipeview:
+    # Per-instruction fetch/decode/rename/dispatch/issue/complete/retire ticks
+    m5.trace.output(args.pipeview)
+    m5.debug.flags["O3PipeView"].enable()
+    m5.trace.enable()
+
+if batch:
+    # m5.fork() refuses to fork a simulator with listeners enabled
+    m5.disableAllListeners()
+
+# Restoring from the ROI checkpoint skips the initialization phase; the
+# checkpoint only holds architectural and memory state, so it can be
+# restored straight into the O3 CPU.
+m5.instantiate(args.checkpoint_dir)
+
+# The detailed CPU whose stats are measured
+o3_cpu = system.cpu
+if batch:
+    if not args.checkpoint_dir:
+        print("--- Fast-forwarding to the daxpy loop ---")
+        exit_event = m5.simulate()
+        if exit_event.getCause() != "workbegin":
+            sys.exit("Workload reached no ROI ({}); build daxpy with "
+                     "-DGEM5_ROI".format(exit_event.getCause()))
+    index = run_batch(batch)
+    o3_cpu = batch_cpus[index]
+    (args.num_phys_int_regs, args.num_iq_entries,
+     args.num_rob_entries) = batch[index]
+    m5.switchCpus(system, [(system.cpu, o3_cpu)])
+    m5.stats.reset()
 
 print("--- Begin Simulation!!! ---")
 print(f"  Binary: {args.cmd}")
-print(f"  CPU: {type(system.cpu).__name__}")
+print(f"  CPU: {type(o3_cpu).__name__}")
 print(f"  ROB Entries: {args.num_rob_entries}")
 print(f"  IQ Entries: {args.num_iq_entries}")
 print(f"  Physical Int Regs: {args.num_phys_int_regs}")
+print(f"  Physical Float Regs: {args.num_phys_float_regs}")
+print(f"  LQ/SQ Entries: {args.num_lq_entries}/{args.num_sq_entries}")
+print(f"  Width: {args.width}")
+if args.max_insts:
+    print(f"  Max Insts: {args.max_insts}")
+if args.checkpoint_dir:
+    print(f"  Restored from: {args.checkpoint_dir}")
 print("-----------------------------------")
 
-exit_event = m5.simulate()
+# Every dump ends one block of stats.txt; record what each block covers so
+# the parser can pick the ROI block (see parse_stats.load_block_labels).
+# Without ROI markers the run produces a single "full" block; after a
+# restore from the ROI checkpoint the run starts inside the ROI.
+# The file is written empty first, so a run killed halfway is recognisable.
+block_labels = []
+
+def dump_block(label):
+    m5.stats.dump()
+    m5.stats.reset()
+    block_labels.append(label)
+
+def write_block_labels(labels):
+    with open(os.path.join(m5.options.outdir, "stats_blocks.json"), "w") as f:
+        json.dump(labels, f)
+
+write_block_labels([])
+
+def run_sampled():
+    """Alternate functional warming, detailed warm-up and a measured window.
+
+    Each measured window becomes one "sample" block of stats.txt; the
+    sampling parameters and the total instruction count go to sampling.json
+    for sampling.py to turn into a CPI estimate with a confidence interval.
+    """
+    warm, o3 = system.warm_cpu, system.cpu
+    functional = args.sample_period - args.sample_warmup - args.sample_detail
+    samples = 0
+    while True:
+        warm.scheduleInstStop(0, functional, "sample: warming done")
+        exit_event = m5.simulate()
+        if exit_event.getCause() != "sample: warming done":
+            break
+        m5.switchCpus(system, [(warm, o3)])
+        o3.scheduleInstStop(0, args.sample_warmup, "sample: warm-up done")
+        exit_event = m5.simulate()
+        if exit_event.getCause() != "sample: warm-up done":
+            break
+        m5.stats.reset()
+        o3.scheduleInstStop(0, args.sample_detail, "sample: window done")
+        exit_event = m5.simulate()
+        if exit_event.getCause() != "sample: window done":
+            break
+        dump_block("sample")
+        samples += 1
+        m5.switchCpus(system, [(o3, warm)])
+    with open(os.path.join(m5.options.outdir, "sampling.json"), "w") as f:
+        json.dump({
+            "period": args.sample_period,
+            "warmup": args.sample_warmup,
+            "detail": args.sample_detail,
+            "samples": samples,
+            "total_insts": warm.totalInsts() + o3.totalInsts(),
+        }, f)
+    print(f"Sampled {samples} windows")
+    return exit_event
+
+PERIOD_CAUSE = "stats period"
+
+def is_steady(cpis):
+    """The last --steady-state-window period CPIs agree within the tolerance"""
+    window = cpis[-args.steady_state_window:]
+    if len(window) < args.steady_state_window:
+        return False
+    mean = sum(window) / len(window)
+    return mean > 0 and (max(window) - min(window)) / mean < args.steady_state_tol
+
+def run_detailed():
+    """Run to completion, splitting stats at the ROI markers.
+
+    With a stats period, a snapshot of the current phase is dumped every
+    period without resetting, so each "<phase>:period" block is cumulative
+    since the start of the phase and the closing phase block is unchanged;
+    timeseries.py turns the snapshots back into per-period values.
+    """
+    # The ROI checkpoint is taken at m5_work_begin and run_batch forks there,
+    # so a restored or forked run is already in the ROI and sees no workbegin
+    phase = "roi" if args.checkpoint_dir or batch else "full"
+    period_pending = False
+    cycle_ticks = m5.ticks.fromSeconds(1 / toFrequency(CPU_CLOCK))
+    last = (m5.curTick(), o3_cpu.totalInsts())
+    cpis = []
+    while True:
+        if args.stats_period_insts and not period_pending:
+            o3_cpu.scheduleInstStop(0, args.stats_period_insts, PERIOD_CAUSE)
+            period_pending = True
+        if args.stats_period_ticks:
+            exit_event = m5.simulate(args.stats_period_ticks)
+        else:
+            exit_event = m5.simulate()
+        cause = exit_event.getCause()
+        if cause in (PERIOD_CAUSE, "simulate() limit reached"):
+            period_pending = False
+            m5.stats.dump()
+            block_labels.append(f"{phase}:period")
+            now = (m5.curTick(), o3_cpu.totalInsts())
+            if now[1] > last[1]:
+                cpis.append((now[0] - last[0]) / cycle_ticks / (now[1] - last[1]))
+            last = now
+            # Without a checkpoint the ROI may still lie ahead (the run is in
+            # start-up code), so only stop once it has been reached
+            measured = phase == "roi" or (phase == "full" and
+                                          args.no_roi_markers)
+            if args.steady_state_tol and measured and is_steady(cpis):
+                # The closing block gem5 dumps at exit covers the phase so far
+                print(f"Steady state @ tick {m5.curTick()}, CPI {cpis[-1]:.4f}")
+                with open(os.path.join(m5.options.outdir,
+                                       "steady_state.json"), "w") as f:
+                    json.dump({"tick": m5.curTick(), "phase": phase,
+                               "insts": now[1], "cpi": cpis[-1],
+                               "window": cpis[-args.steady_state_window:]}, f)
+                return exit_event, phase
+            continue
+        if cause == "workbegin":
+            print(f"ROI begin @ tick {m5.curTick()}")
+            # Every snapshot so far (a "full:period" of a normal run, or a
+            # "roi:period" after a --fast-forward checkpoint that stops short
+            # of the ROI) belongs to the pre-ROI phase closed here
+            block_labels[:] = ["pre_roi:period" if label.endswith(":period")
+                               else label for label in block_labels]
+            dump_block("pre_roi")
+            phase = "roi"
+            last, cpis = (m5.curTick(), o3_cpu.totalInsts()), []
+        elif cause == "workend":
+            print(f"ROI end @ tick {m5.curTick()}")
+            dump_block("roi")
+            phase = "post_roi"
+            last, cpis = (m5.curTick(), o3_cpu.totalInsts()), []
+        else:
+            return exit_event, phase
+
+if args.sample_period:
+    exit_event, final_label = run_sampled(), "tail"
+else:
+    if args.max_insts:
+        # Counted from here, so it also holds after a checkpoint restore;
+        # a truncated ROI still ends up in the "roi" block
+        o3_cpu.scheduleInstStop(0, args.max_insts,
+                                "a thread reached the max instruction count")
+    exit_event, final_label = run_detailed()
 
-print('Exit @ tick {} because {}'.format(m5.curTick(), exit_event.getCause()))
\ No newline at end of file
+print('Exit @ tick {} because {}'.format(m5.curTick(), exit_event.getCause()))
+# gem5 dumps the last block itself when the simulation ends
+write_block_labels(block_labels + [final_label])
@@ -2,122 +2,128 @@
 """
 gem5 O3 CPU 仿真结果分析脚本
 分析 IQ/ROB/物理寄存器数对性能的影响
+图表只在输入数据或绘图代码变化时重绘，并行渲染（见 chart_cache.py）
 """
 
-import pandas as pd
+import sys
+from itertools import product
+
 import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 
-# 设置中文字体
-plt.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
-
-def load_data(csv_path):
-    """加载仿真结果数据"""
-    df = pd.read_csv(csv_path)
-    # 转换数据类型
-    df['numCycles'] = pd.to_numeric(df['numCycles'], errors='coerce')
-    df['ROBFull'] = pd.to_numeric(df['ROBFull'], errors='coerce').fillna(0)
-    df['IQFull'] = pd.to_numeric(df['IQFull'], errors='coerce').fillna(0)
-    df['FullRegs'] = pd.to_numeric(df['FullRegs'], errors='coerce').fillna(0)
-    return df
-
-def analyze_iq_impact(df):
+from chart_cache import DPI, render_charts
+from result_store import DEFAULT_DB
+from results_tensor import ResultsTensor
+
+def load_data(db_path):
+    """从结果库加载仿真结果数据（只读取用到的列）"""
+    return ResultsTensor.from_store(db_path, ['numCycles', 'ROBFull', 'IQFull', 'FullRegs'])
+
+FIXED_LABELS = {'regs': '物理寄存器', 'iq': 'IQ', 'rob': 'ROB'}
+
+def print_axis_slices(data, axis, label, width, **fixed_values):
+    """对 fixed_values 中各取值的每种组合，输出沿 axis 的 cycles"""
+    for combo in product(*fixed_values.values()):
+        fixed = dict(zip(fixed_values, combo))
+        subset = data.sel(**fixed)
+        valid = subset.mask
+        if not valid.any():
+            continue
+        print("\n" + ', '.join(f"{FIXED_LABELS[n]}={v}" for n, v in fixed.items()) + ":")
+        for value, cycles in zip(subset.coords[0][valid], subset['numCycles'][valid]):
+            print(f"  {label}={value:{width}d}: {cycles:,.0f} cycles")
+
+def analyze_iq_impact(data):
     """分析 IQ 条目数对性能的影响"""
     print("=== IQ 条目数对性能的影响分析 ===")
     
     # 固定其他参数，分析 IQ 的影响
-    for regs in [64, 256, 1024]:
-        for rob in [64, 256]:
-            subset = df[(df['regs'] == regs) & (df['rob'] == rob)].copy()
-            if len(subset) > 0:
-                subset = subset.sort_values('iq')
-                print(f"\n物理寄存器={regs}, ROB={rob}:")
-                for _, row in subset.iterrows():
-                    print(f"  IQ={row['iq']:3d}: {row['numCycles']:,} cycles")
-
-def analyze_rob_impact(df):
+    print_axis_slices(data, 'iq', 'IQ', 3, regs=[64, 256, 1024], rob=[64, 256])
+
+def analyze_rob_impact(data):
     """分析 ROB 条目数对性能的影响"""
     print("\n=== ROB 条目数对性能的影响分析 ===")
     
     # 固定其他参数，分析 ROB 的影响
-    for regs in [64, 256, 1024]:
-        for iq in [16, 64]:
-            subset = df[(df['regs'] == regs) & (df['iq'] == iq)].copy()
-            if len(subset) > 0:
-                subset = subset.sort_values('rob')
-                print(f"\n物理寄存器={regs}, IQ={iq}:")
-                for _, row in subset.iterrows():
-                    print(f"  ROB={row['rob']:3d}: {row['numCycles']:,} cycles")
-
-def analyze_regs_impact(df):
+    print_axis_slices(data, 'rob', 'ROB', 3, regs=[64, 256, 1024], iq=[16, 64])
+
+def analyze_regs_impact(data):
     """分析物理寄存器数对性能的影响"""
     print("\n=== 物理寄存器数对性能的影响分析 ===")
     
     # 固定其他参数，分析物理寄存器的影响
-    for iq in [16, 64]:
-        for rob in [64, 256]:
-            subset = df[(df['iq'] == iq) & (df['rob'] == rob)].copy()
-            if len(subset) > 0:
-                subset = subset.sort_values('regs')
-                print(f"\nIQ={iq}, ROB={rob}:")
-                for _, row in subset.iterrows():
-                    print(f"  物理寄存器={row['regs']:4d}: {row['numCycles']:,} cycles")
-
-def create_heatmaps(df):
+    print_axis_slices(data, 'regs', '物理寄存器', 4, iq=[16, 64], rob=[64, 256])
+
+def analyze_marginal_effects(data):
+    """各轴每增大一步，在其余参数所有组合上的几何平均加速比"""
+    print("\n=== 各参数的边际效应 ===")
+    for axis, coords in zip(data.axes, data.coords):
+        ratio, n = data.marginal(axis)
+        for a, b, r, cnt in zip(coords, coords[1:], ratio, n):
+            print(f"  {FIXED_LABELS[axis]} {a} -> {b}: {r:.3f}x ({cnt} 组)")
+
+def create_heatmaps(data, path):
     """创建热力图"""
     fig, axes = plt.subplots(1, 3, figsize=(18, 6))
+    iq, rob = data.coords[data.axis('iq')], data.coords[data.axis('rob')]
     
     for i, regs in enumerate([64, 256, 1024]):
-        subset = df[df['regs'] == regs]
-        pivot = subset.pivot(index='rob', columns='iq', values='numCycles')
+        # 行为 ROB、列为 IQ
+        pivot = data.sel(regs=regs)['numCycles'].T
         
-        sns.heatmap(pivot, annot=True, fmt='.0f', cmap='YlOrRd', 
+        sns.heatmap(pivot, annot=True, fmt='.0f', cmap='YlOrRd', xticklabels=iq, yticklabels=rob,
                    ax=axes[i], cbar_kws={'label': 'CPU Cycles'})
         axes[i].set_title(f'物理寄存器数 = {regs}')
         axes[i].set_xlabel('IQ 条目数')
         axes[i].set_ylabel('ROB 条目数')
     
     plt.tight_layout()
-    plt.savefig('/Users/lianglihang/Downloads/ComputerArchitecture/lab1/out/heatmaps.png', 
-                dpi=300, bbox_inches='tight')
+    plt.savefig(path, dpi=DPI, bbox_inches='tight')
     plt.close()
 
-def create_line_plots(df):
+def axis_line(data, **fixed):
+    """固定两轴后剩下一轴的 (取值, cycles)，只含有效点"""
+    subset = data.sel(**fixed)
+    return subset.coords[0][subset.mask], subset['numCycles'][subset.mask]
+
+def create_line_plots(data, path):
     """创建折线图分析趋势"""
     fig, axes = plt.subplots(2, 2, figsize=(15, 12))
     
     # IQ 影响 (固定 regs=256, rob=64)
-    subset = df[(df['regs'] == 256) & (df['rob'] == 64)].sort_values('iq')
-    axes[0,0].plot(subset['iq'], subset['numCycles'], 'o-', linewidth=2, markersize=8)
+    x, y = axis_line(data, regs=256, rob=64)
+    axes[0,0].plot(x, y, 'o-', linewidth=2, markersize=8)
     axes[0,0].set_xlabel('IQ 条目数')
     axes[0,0].set_ylabel('CPU Cycles')
     axes[0,0].set_title('IQ 条目数对性能的影响\n(物理寄存器=256, ROB=64)')
     axes[0,0].grid(True, alpha=0.3)
     
     # ROB 影响 (固定 regs=256, iq=64)
-    subset = df[(df['regs'] == 256) & (df['iq'] == 64)].sort_values('rob')
-    axes[0,1].plot(subset['rob'], subset['numCycles'], 's-', linewidth=2, markersize=8, color='orange')
+    x, y = axis_line(data, regs=256, iq=64)
+    axes[0,1].plot(x, y, 's-', linewidth=2, markersize=8, color='orange')
     axes[0,1].set_xlabel('ROB 条目数')
     axes[0,1].set_ylabel('CPU Cycles')
     axes[0,1].set_title('ROB 条目数对性能的影响\n(物理寄存器=256, IQ=64)')
     axes[0,1].grid(True, alpha=0.3)
     
     # 物理寄存器影响 (固定 iq=64, rob=64)
-    subset = df[(df['iq'] == 64) & (df['rob'] == 64)].sort_values('regs')
-    axes[1,0].plot(subset['regs'], subset['numCycles'], '^-', linewidth=2, markersize=8, color='green')
+    x, y = axis_line(data, iq=64, rob=64)
+    axes[1,0].plot(x, y, '^-', linewidth=2, markersize=8, color='green')
     axes[1,0].set_xlabel('物理寄存器数')
     axes[1,0].set_ylabel('CPU Cycles')
     axes[1,0].set_title('物理寄存器数对性能的影响\n(IQ=64, ROB=64)')
     axes[1,0].grid(True, alpha=0.3)
     
-    # 阻塞事件分析
-    subset = df[(df['regs'] == 64)].groupby('iq')[['ROBFull', 'IQFull', 'FullRegs']].mean()
-    x = subset.index
-    axes[1,1].bar(x - 0.2, subset['ROBFull'], 0.2, label='ROB Full', alpha=0.7)
-    axes[1,1].bar(x, subset['IQFull'], 0.2, label='IQ Full', alpha=0.7)
-    axes[1,1].bar(x + 0.2, subset['FullRegs'], 0.2, label='Regs Full', alpha=0.7)
+    # 阻塞事件分析：regs=64 时各 IQ 取值在所有 ROB 上的平均值
+    subset = data.sel(regs=64)
+    x = subset.coords[0]
+    with np.errstate(invalid='ignore'):
+        means = {m: np.nanmean(np.where(subset.mask, subset[m], np.nan), axis=1)
+                 for m in ('ROBFull', 'IQFull', 'FullRegs')}
+    axes[1,1].bar(x - 0.2, means['ROBFull'], 0.2, label='ROB Full', alpha=0.7)
+    axes[1,1].bar(x, means['IQFull'], 0.2, label='IQ Full', alpha=0.7)
+    axes[1,1].bar(x + 0.2, means['FullRegs'], 0.2, label='Regs Full', alpha=0.7)
     axes[1,1].set_xlabel('IQ 条目数')
     axes[1,1].set_ylabel('平均阻塞事件数')
     axes[1,1].set_title('资源阻塞事件分析\n(物理寄存器=64)')
@@ -125,15 +131,14 @@ def create_line_plots(df):
     axes[1,1].grid(True, alpha=0.3)
     
     plt.tight_layout()
-    plt.savefig('/Users/lianglihang/Downloads/ComputerArchitecture/lab1/out/line_plots.png', 
-                dpi=300, bbox_inches='tight')
+    plt.savefig(path, dpi=DPI, bbox_inches='tight')
     plt.close()
 
-def generate_summary_table(df):
+def generate_summary_table(data):
     """生成汇总表格"""
     # 找出最佳和最差配置
-    best_config = df.loc[df['numCycles'].idxmin()]
-    worst_config = df.loc[df['numCycles'].idxmax()]
+    best_config = data.best()[0]
+    worst_config = data.worst()[0]
     
     print("\n=== 性能汇总 ===")
     print(f"最佳配置: 物理寄存器={best_config['regs']}, IQ={best_config['iq']}, ROB={best_config['rob']}")
@@ -142,28 +147,35 @@ def generate_summary_table(df):
     print(f"         CPU Cycles: {worst_config['numCycles']:,}")
     print(f"性能差距: {worst_config['numCycles'] / best_config['numCycles']:.2f}x")
 
+# (文件名, 绘图函数, 该图用到的数据)
+CHARTS = [
+    ('heatmaps.png', create_heatmaps, lambda data: data.take(['numCycles'])),
+    ('line_plots.png', create_line_plots, lambda data: data),
+]
+
 def main():
     """主函数"""
     # 加载数据
-    df = load_data('/Users/lianglihang/Downloads/ComputerArchitecture/lab1/out/summary.csv')
+    data = load_data(DEFAULT_DB)
     
-    print(f"加载了 {len(df)} 个仿真结果")
-    print(f"参数组合: 物理寄存器 {sorted(df['regs'].unique())}")
-    print(f"         IQ {sorted(df['iq'].unique())}")
-    print(f"         ROB {sorted(df['rob'].unique())}")
+    print(f"加载了 {len(data)} 个仿真结果")
+    print(f"参数组合: 物理寄存器 {data.coords[data.axis('regs')].tolist()}")
+    print(f"         IQ {data.coords[data.axis('iq')].tolist()}")
+    print(f"         ROB {data.coords[data.axis('rob')].tolist()}")
     
     # 数据分析
-    analyze_iq_impact(df)
-    analyze_rob_impact(df)
-    analyze_regs_impact(df)
-    generate_summary_table(df)
+    analyze_iq_impact(data)
+    analyze_rob_impact(data)
+    analyze_regs_impact(data)
+    analyze_marginal_effects(data)
+    generate_summary_table(data)
     
     # 创建可视化
     print("\n正在生成可视化图表...")
-    create_heatmaps(df)
-    create_line_plots(df)
+    status = render_charts(CHARTS, data, DEFAULT_DB.parent, force='--force' in sys.argv)
+    for name, state in status.items():
+        print(f"  {name}: {state}")
     print("图表已保存到 out/ 目录")
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+asyncio 版的参数扫描 API（在 Python 中驱动扫描，而不是 run_all.sh）
+- 以 asyncio 子进程启动 gem5.opt … O3CPU.py，用信号量限制并发数；
+  超时、重试、ROI 检查点、采样等选项与 run_sweep.py 相同（共用其参数）
+- 每个仿真一结束就在线程池中解析其 stats.txt，按完成顺序产出 RunResult：
+  既可以 async for 遍历 AsyncSweep.results()，也可以注册回调（普通函数或协程）
+- 分析代码可以边扫描边更新，例如每来一个结果就重新输出 generate_tables.py 的表格
+
+示例：
+    args = sweep_args(gem5_bin='/opt/gem5/build/RISCV/gem5.opt', jobs=8)
+    sweep = AsyncSweep(args, on_result=lambda r: print(r.regs, r.iq, r.rob, r.summary))
+    async for res in sweep.results(grid(args)):
+        data.append(res.summary)
+用法（命令行）：python3 async_sweep.py [run_sweep.py 的选项] [--tables]
+"""
+
+import asyncio
+import inspect
+import sys
+import time
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+from generate_tables import generate_complete_table
+from parse_stats import stats_signature
+from result_store import ResultStore
+from results_tensor import ResultsTensor
+from run_sweep import (SUMMARY_FIELDS, gem5_command, is_complete, load_run_stats, outdir_for, parse_args,
+                       summary_row, take_checkpoint, write_summary_atomic)
+
+class RunResult(NamedTuple):
+    """一次仿真的结果；ok 为 False 时 stats/summary 为 None，reason 给出原因"""
+    regs: int
+    iq: int
+    rob: int
+    outdir: Path
+    ok: bool
+    stats: Optional[dict]
+    summary: Optional[dict]
+    elapsed: float
+    attempts: int
+    reason: str
+
+    @property
+    def config(self):
+        return (self.regs, self.iq, self.rob)
+
+def sweep_args(**overrides):
+    """run_sweep.py 的默认参数（环境变量照常生效），再用关键字覆盖，例如 jobs=8"""
+    args = parse_args([])
+    for name, value in overrides.items():
+        if not hasattr(args, name):
+            raise ValueError(f"未知的扫描参数: {name}")
+        setattr(args, name, value)
+    return args
+
+def grid(args):
+    return [(regs, iq, rob) for regs in args.regs for iq in args.iq for rob in args.rob]
+
+class AsyncSweep:
+    """有界并发的异步扫描
+
+    on_result 在每个结果产出时被调用，可以是普通函数或协程函数；
+    store 给定时（ResultStore）每个成功的仿真同时写入结果库。
+    skip_done 为 True 时已完成的组合不再仿真，直接解析已有的 stats.txt。
+    """
+
+    def __init__(self, args, on_result=None, store=None, skip_done=True):
+        self.args = args
+        self.callbacks = [on_result] if on_result is not None else []
+        self.store = store
+        self.skip_done = skip_done
+
+    def add_callback(self, fn):
+        self.callbacks.append(fn)
+
+    async def _exec(self, cmd, log_path):
+        """运行一个 gem5 进程，返回结束原因；超时或被取消时杀掉进程"""
+        timeout = self.args.timeout
+        with open(log_path, 'w') as log:
+            proc = await asyncio.create_subprocess_exec(*cmd, stdout=log, stderr=asyncio.subprocess.STDOUT)
+            try:
+                returncode = await asyncio.wait_for(proc.wait(), timeout)
+                return f"exit code {returncode}"
+            except asyncio.TimeoutError:
+                return f"timeout after {timeout}s"
+            finally:
+                if proc.returncode is None:
+                    proc.kill()
+                    await proc.wait()
+
+    async def _parse(self, odir):
+        """在线程池中解析 stats.txt，不阻塞事件循环"""
+        return await asyncio.get_running_loop().run_in_executor(None, load_run_stats, self.args, odir)
+
+    async def run_one(self, cfg):
+        """仿真一个组合（含重试）并解析结果"""
+        odir = outdir_for(self.args.out_base, *cfg)
+        start = time.monotonic()
+        if self.skip_done and is_complete(odir / 'stats.txt'):
+            return await self._finish(cfg, odir, start, 0, 'already exists')
+        odir.mkdir(parents=True, exist_ok=True)
+        reason = 'not run'
+        for attempt in range(1, self.args.retries + 2):
+            print(f"[RUN] regs={cfg[0]} iq={cfg[1]} rob={cfg[2]} -> {odir} (attempt {attempt})", file=sys.stderr)
+            reason = await self._exec(gem5_command(self.args, *cfg, odir), odir / 'run.log')
+            if is_complete(odir / 'stats.txt'):
+                return await self._finish(cfg, odir, start, attempt, reason)
+            print(f"[FAIL] regs={cfg[0]} iq={cfg[1]} rob={cfg[2]}: {reason}", file=sys.stderr)
+        return self._result(cfg, odir, None, start, self.args.retries + 1, reason)
+
+    async def _finish(self, cfg, odir, start, attempts, reason):
+        """解析已完成的仿真，写入结果库"""
+        stats = await self._parse(odir)
+        if self.store is not None:
+            self.store.ingest(odir, stats, sig=stats_signature(odir / 'stats.txt'))
+        return self._result(cfg, odir, stats, start, attempts, reason)
+
+    def _result(self, cfg, odir, stats, start, attempts, reason):
+        return RunResult(*cfg, outdir=odir, ok=stats is not None, stats=stats,
+                         summary=summary_row(*cfg, stats) if stats is not None else None,
+                         elapsed=time.monotonic() - start, attempts=attempts, reason=reason)
+
+    async def _notify(self, res):
+        for fn in self.callbacks:
+            ret = fn(res)
+            if inspect.isawaitable(ret):
+                await ret
+
+    async def results(self, configs):
+        """按完成顺序逐个产出 RunResult；提前退出遍历时取消尚未完成的仿真"""
+        if self.args.roi_checkpoint:
+            ok = await asyncio.get_running_loop().run_in_executor(None, take_checkpoint, self.args)
+            if not ok:
+                raise RuntimeError("ROI 检查点生成失败")
+        slots = asyncio.Semaphore(max(1, self.args.jobs))
+
+        async def bounded(cfg):
+            async with slots:
+                return await self.run_one(cfg)
+
+        tasks = [asyncio.ensure_future(bounded(cfg)) for cfg in configs]
+        try:
+            for fut in asyncio.as_completed(tasks):
+                res = await fut
+                await self._notify(res)
+                yield res
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def run(self, configs):
+        """运行全部组合，返回按 configs 顺序排列的结果列表"""
+        by_cfg = {}
+        async for res in self.results(configs):
+            by_cfg[res.config] = res
+        return [by_cfg[cfg] for cfg in configs]
+
+async def _main(argv):
+    show_tables = '--tables' in argv
+    args = parse_args([a for a in argv if a != '--tables'])
+    out_base = Path(args.out_base)
+    out_base.mkdir(parents=True, exist_ok=True)
+    configs = grid(args)
+    rows = {}
+
+    def update(res):
+        """每个结果到达时原子地重写 summary.csv；--tables 时重新输出最佳配置表"""
+        if not res.ok:
+            return
+        rows[res.config] = res.summary
+        data = [rows[c] for c in configs if c in rows]
+        write_summary_atomic(out_base / 'summary.csv', data, SUMMARY_FIELDS)
+        print(f"[{len(rows)}/{len(configs)}] regs={res.regs} iq={res.iq} rob={res.rob} "
+              f"numCycles={res.summary['numCycles']:,} ({res.elapsed:.1f}s)", file=sys.stderr)
+        if show_tables:
+            generate_complete_table(ResultsTensor.from_rows(data))
+
+    with ResultStore(out_base / 'results.db') as store:
+        sweep = AsyncSweep(args, on_result=update, store=store)
+        results = await sweep.run(configs)
+    failed = [r for r in results if not r.ok]
+    print(f"Done. Summary at: {out_base / 'summary.csv'} ({len(results) - len(failed)}/{len(results)} ok)",
+          file=sys.stderr)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(asyncio.run(_main(sys.argv[1:])))
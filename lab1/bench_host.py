@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+gem5 宿主机性能基准（仿真器本身的速度与内存，而不是被仿真 CPU 的性能）
+- 对固定的一组 O3CPU.py 配置 × 负载各重复运行 N 次，记录
+  hostSeconds / hostTickRate / hostInstRate / hostMemory 以及包含启动开销的墙钟时间，
+  给出均值、标准差和变异系数
+- --save-baseline 保存结果；--baseline 与之比较，超过阈值（且超出两倍标准差）
+  的变慢或内存增长记为回归，返回码为 1，便于升级 gem5 或修改配置脚本后检查
+- --speed-table 按结果库中已有仿真的 host 指标，给出仿真速度随 ROB/IQ 大小的变化
+用法：
+  python3 bench_host.py --repeats 3 --max-insts 2000000 --save-baseline bench.json
+  python3 bench_host.py --repeats 3 --max-insts 2000000 --baseline bench.json
+  python3 bench_host.py --speed-table
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from statistics import linear_regression, mean, stdev
+
+from parse_stats import iter_blocks
+from result_store import DEFAULT_DB, open_store
+from run_sweep import is_complete
+
+# 基准配置 (regs, iq, rob)：最小、原始默认附近、最大
+BENCH_CONFIGS = [(64, 4, 4), (256, 64, 64), (1024, 256, 256)]
+
+# gem5 的 hostMemory 标注为 Byte，实际取自 /proc 的 VmSize，单位是 KiB
+KIB_PER_GIB = 2 ** 20
+
+# 指标 -> 数值变大是否更差
+METRIC_WORSE_IF_HIGHER = {
+    'wallSeconds': True,
+    'hostSeconds': True,
+    'hostTickRate': False,
+    'hostInstRate': False,
+    'hostMemory': True,
+}
+
+def host_metrics(stats_path):
+    """整次运行的 host 指标：各统计块的 hostSeconds 相加，内存取最大值，速率按总量重新计算"""
+    seconds = 0.0
+    memory = insts = ticks = 0
+    with open(stats_path, 'r', encoding='utf-8', errors='ignore') as f:
+        for block in iter_blocks(f):
+            seconds += block['hostSeconds']
+            memory = max(memory, block['hostMemory'])
+            insts = max(insts, block['simInsts'])
+            ticks = max(ticks, block['finalTick'])
+    return {
+        'hostSeconds': seconds,
+        'hostTickRate': ticks / seconds if seconds else 0.0,
+        'hostInstRate': insts / seconds if seconds else 0.0,
+        'hostMemory': memory,
+    }
+
+def summarize(values):
+    m = mean(values)
+    sd = stdev(values) if len(values) > 1 else 0.0
+    return {'mean': m, 'stdev': sd, 'cv': sd / m if m else 0.0, 'n': len(values)}
+
+def file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def run_once(args, workload, cfg, rep):
+    """运行一次基准，返回指标字典，失败返回 None"""
+    regs, iq, rob = cfg
+    odir = Path(args.out_base) / Path(workload).stem / f'regs{regs}-iq{iq}-rob{rob}' / f'rep{rep}'
+    odir.mkdir(parents=True, exist_ok=True)
+    cmd = [
+        args.gem5_bin, '-d', str(odir),
+        args.o3conf,
+        f'--cmd={workload}',
+        f'--num-phys-int-regs={regs}',
+        f'--num-iq-entries={iq}',
+        f'--num-rob-entries={rob}',
+    ]
+    if args.max_insts:
+        cmd.append(f'--max-insts={args.max_insts}')
+    print(f"[RUN] {Path(workload).name} regs={regs} iq={iq} rob={rob} rep={rep}", file=sys.stderr)
+    start = time.perf_counter()
+    with open(odir / 'run.log', 'w') as log:
+        proc = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT)
+    wall = time.perf_counter() - start
+    if proc.returncode != 0 or not is_complete(odir / 'stats.txt'):
+        print(f"[FAIL] exit code {proc.returncode}, see {odir / 'run.log'}", file=sys.stderr)
+        return None
+    metrics = host_metrics(odir / 'stats.txt')
+    metrics['wallSeconds'] = wall
+    return metrics
+
+def run_suite(args):
+    """{'workload|regs-iq-rob': {指标: 统计量}}"""
+    results = {}
+    for workload in args.workloads:
+        for cfg in BENCH_CONFIGS:
+            runs = [m for m in (run_once(args, workload, cfg, rep) for rep in range(args.repeats)) if m]
+            if not runs:
+                continue
+            key = f"{Path(workload).name}|regs{cfg[0]}-iq{cfg[1]}-rob{cfg[2]}"
+            results[key] = {name: summarize([r[name] for r in runs]) for name in METRIC_WORSE_IF_HIGHER}
+    return results
+
+def compare(results, baseline, threshold):
+    """与基线比较：[(键, 指标, 基线均值, 当前均值, 相对变化, 是否回归)]"""
+    rows = []
+    for key, metrics in results.items():
+        base = baseline.get(key)
+        if base is None:
+            continue
+        for name, worse_if_higher in METRIC_WORSE_IF_HIGHER.items():
+            b, c = base[name], metrics[name]
+            if not b['mean']:
+                continue
+            change = (c['mean'] - b['mean']) / b['mean']
+            worse = change if worse_if_higher else -change
+            noise = 2 * math.hypot(b['stdev'], c['stdev']) / b['mean']
+            rows.append((key, name, b['mean'], c['mean'], change, worse > max(threshold, noise)))
+    return rows
+
+def print_results(results):
+    print(f"{'基准':<40} {'指标':<14} {'均值':>16} {'标准差':>14} {'CV':>7} {'次数':>4}")
+    print("-" * 100)
+    for key, metrics in results.items():
+        for name, s in metrics.items():
+            print(f"{key:<40} {name:<14} {s['mean']:>16,.2f} {s['stdev']:>14,.2f} {s['cv']:>7.2%} {s['n']:>4}")
+
+def speed_table(db_path):
+    """结果库中仿真速度（hostInstRate）与 ROB/IQ 大小的关系"""
+    with open_store(db_path) as store:
+        rows = [r for r in store.load(['hostInstRate', 'hostSeconds', 'hostMemory'])
+                if r['rob'] is not None and r['hostInstRate']]
+    if not rows:
+        print("结果库中没有 host 指标")
+        return
+    for param in ('rob', 'iq'):
+        print(f"\n按 {param.upper()} 分组的仿真速度:")
+        print(f"{param:>6} {'hostInstRate':>14} {'hostSeconds':>12} {'hostMemory(GB)':>15} {'次数':>5}")
+        for value in sorted({r[param] for r in rows}):
+            group = [r for r in rows if r[param] == value]
+            print(f"{value:>6} {mean(r['hostInstRate'] for r in group):>14,.0f} "
+                  f"{mean(r['hostSeconds'] for r in group):>12.2f} "
+                  f"{mean(r['hostMemory'] for r in group) / KIB_PER_GIB:>15,.2f} {len(group):>5}")
+        xs = [math.log2(r[param]) for r in rows]
+        if len(set(xs)) > 1:
+            slope, _ = linear_regression(xs, [math.log2(r['hostInstRate']) for r in rows])
+            print(f"{param.upper()} 每翻一倍，仿真速度变为 {2 ** slope:.3f} 倍")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--gem5-bin', default=os.environ.get('GEM5_BIN', '/opt/gem5/build/RISCV/gem5.opt'))
+    parser.add_argument('--o3conf', default=os.environ.get('O3CONF', '/lab1/O3CPU.py'))
+    parser.add_argument('--workloads', nargs='+', default=[os.environ.get('CMD_BIN', '/lab1/daxpy.riscv')])
+    parser.add_argument('--out-base', default=os.environ.get('OUT_BASE', '/lab1/out') + '/bench')
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--max-insts', type=int, default=0, help="每次运行的指令数上限（0 表示完整运行）")
+    parser.add_argument('--baseline', default=None, help="与该基线 JSON 比较")
+    parser.add_argument('--save-baseline', default=None, help="把本次结果保存为基线 JSON")
+    parser.add_argument('--threshold', type=float, default=0.05, help="判定回归的相对变化阈值")
+    parser.add_argument('--speed-table', action='store_true', help="只输出结果库中速度与 ROB/IQ 的关系")
+    parser.add_argument('--db', default=DEFAULT_DB)
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.speed_table:
+        speed_table(args.db)
+        return 0
+
+    results = run_suite(args)
+    if not results:
+        print("没有成功的基准运行")
+        return 1
+    print_results(results)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump({
+                'meta': {
+                    'gem5_bin': args.gem5_bin,
+                    'gem5_sha256': file_sha256(args.gem5_bin),
+                    'o3conf_sha256': file_sha256(args.o3conf),
+                    'max_insts': args.max_insts,
+                    'time': time.strftime('%Y-%m-%d %H:%M:%S'),
+                },
+                'results': results,
+            }, f, indent=1)
+        print(f"\n基线已保存到 {args.save_baseline}")
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        if baseline['meta'].get('max_insts') != args.max_insts:
+            print("\n警告：基线的 --max-insts 与本次不同，比较结果没有意义")
+        rows = compare(results, baseline['results'], args.threshold)
+        print(f"\n{'基准':<40} {'指标':<14} {'基线':>16} {'本次':>16} {'变化':>8}")
+        print("-" * 100)
+        for key, name, b, c, change, regressed in rows:
+            flag = '  <-- 回归' if regressed else ''
+            print(f"{key:<40} {name:<14} {b:>16,.2f} {c:>16,.2f} {change:>+8.2%}{flag}")
+        if any(r[-1] for r in rows):
+            status = 1
+    return status
+
+if __name__ == '__main__':
+    sys.exit(main())
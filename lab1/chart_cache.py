@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+图表的并行渲染与增量重绘（create_charts.py、analyze_results.py 共用）
+- 每张图由 (文件名, 绘图函数, 输入切片函数) 描述；绘图函数签名为 fn(data, path)
+- 对输入切片的内容与绘图规格（绘图函数及其所在模块的源码、本模块源码、文件名、dpi）求哈希，记录在
+  输出目录的 .chart_hashes.json 中；PNG 存在且哈希未变时跳过，不再重绘
+- 需要重绘的图分发到进程池中并行渲染（matplotlib 使用 Agg 后端）
+- 所有图共用 STYLE 中的 rcParams（中文字体），在渲染进程中统一设置
+"""
+
+import hashlib
+import inspect
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+HASHES_NAME = '.chart_hashes.json'
+DPI = 300
+# 图表共用的 rcParams：标题、坐标轴中的中文需要 CJK 字体
+STYLE = {
+    'font.family': 'sans-serif',
+    'font.sans-serif': ['Arial Unicode MS', 'SimHei', 'DejaVu Sans'],
+    'axes.unicode_minus': False,
+}
+
+def _feed(h, obj):
+    """把输入数据按内容写入哈希：numpy 数组、dict、list/tuple、带 __dict__ 的对象与标量"""
+    if isinstance(obj, np.ndarray):
+        h.update(f"ndarray{obj.dtype}{obj.shape}".encode())
+        h.update(np.ascontiguousarray(obj).tobytes())
+    elif isinstance(obj, dict):
+        h.update(b'{')
+        for key in sorted(obj, key=repr):
+            _feed(h, key)
+            _feed(h, obj[key])
+        h.update(b'}')
+    elif isinstance(obj, (list, tuple)):
+        h.update(b'[')
+        for item in obj:
+            _feed(h, item)
+        h.update(b']')
+    elif hasattr(obj, '__dict__'):
+        h.update(type(obj).__name__.encode())
+        _feed(h, vars(obj))
+    else:
+        h.update(repr(obj).encode())
+
+def _module_source(obj):
+    """obj 所在模块的源码；取不到（交互式定义等）时为 None"""
+    try:
+        return inspect.getsource(inspect.getmodule(obj))
+    except (OSError, TypeError):
+        return None
+
+def chart_digest(name, fn, data, dpi=DPI):
+    """输入切片与绘图规格的哈希
+
+    绘图函数所在模块的源码也计入：模块级的常量、rcParams、辅助函数改动后同样重绘；
+    本模块的源码（共用的字体等样式）同理。
+    """
+    h = hashlib.sha256()
+    _feed(h, [name, dpi, inspect.getsource(fn), _module_source(fn), _module_source(chart_digest)])
+    _feed(h, data)
+    return h.hexdigest()
+
+def load_hashes(out_dir):
+    try:
+        with open(Path(out_dir) / HASHES_NAME, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_hashes(out_dir, hashes):
+    """先写临时文件再 rename"""
+    fd, tmp = tempfile.mkstemp(prefix='.chart_hashes-', suffix='.json', dir=out_dir)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(hashes, f, indent=1, sort_keys=True)
+    os.replace(tmp, Path(out_dir) / HASHES_NAME)
+
+def _render(fn, data, path):
+    """在子进程中绘制一张图"""
+    import matplotlib
+    matplotlib.use('Agg')
+    matplotlib.rcParams.update(STYLE)
+    fn(data, path)
+
+def render_charts(charts, data, out_dir, workers=None, force=False):
+    """渲染 charts 中输入或规格发生变化的图，返回 {文件名: 'skipped' / 'rendered' / 'failed: 原因'}"""
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    hashes = load_hashes(out_dir)
+    status = {}
+    todo = {}
+    for name, fn, select in charts:
+        part = select(data)
+        digest = chart_digest(name, fn, part)
+        if not force and hashes.get(name) == digest and (out_dir / name).exists():
+            status[name] = 'skipped'
+        else:
+            todo[name] = (fn, part, digest)
+    if todo:
+        with ProcessPoolExecutor(max_workers=min(workers or os.cpu_count() or 1, len(todo))) as pool:
+            futures = {name: pool.submit(_render, fn, part, out_dir / name) for name, (fn, part, _) in todo.items()}
+            for name, fut in futures.items():
+                try:
+                    fut.result()
+                except Exception as e:
+                    hashes.pop(name, None)
+                    status[name] = f"failed: {type(e).__name__}: {e}"
+                else:
+                    hashes[name] = todo[name][2]
+                    status[name] = 'rendered'
+        save_hashes(out_dir, hashes)
+    return {name: status[name] for name, _, _ in charts}
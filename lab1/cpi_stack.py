@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+CPI 栈：把每次仿真的 CPI 分解为 基础 + 各类停顿，各部分之和等于 CPI
+- 基础：commit 至少提交一条指令的周期（numCycles - numCommittedDist::0）
+- 停顿周期（一条都没提交的周期）按各来源的周期数权重分摊：
+    ROB 满        rename.ROBFullEvents
+    IQ 满         rename.IQFullEvents + iew.iqFullEvents
+    寄存器满      rename.fullRegistersEvents
+    LSQ 满        rename.LQFullEvents + rename.SQFullEvents + iew.lsqFullEvents
+    访存          dcache 缺失总延迟（tick 换算为周期）+ fetch 的 icache 停顿周期
+    分支预测错误  fetch.squashCycles + commit.branchMispredicts × REFILL_CYCLES
+  各来源互相重叠（例如 ROB 满常常是因为队头在等 dcache 缺失），权重之和超过停顿周期时
+  按比例缩放；不足的部分记为"其他"
+- 所有仿真一次性从结果库读出，按 (仿真 × 统计项) 矩阵向量化计算
+用法：python3 cpi_stack.py [数据库路径] [--sort cpi|robFull|iqFull|...] [--top N]
+"""
+
+import argparse
+
+import numpy as np
+
+from parse_stats import METRICS
+from result_store import DEFAULT_DB, open_store
+
+COMMIT_IDLE = 'system.cpu.commit.numCommittedDist::0'
+INSTS = 'system.cpu.commitStats0.numInsts'
+CLOCK = 'system.clk_domain.clock'
+# O3CPU.py 的 CPU_CLOCK='2GHz'
+DEFAULT_CLOCK = 500
+# 分支预测错误后前端重新填满流水线（fetch→dispatch）的大致周期数
+REFILL_CYCLES = 6
+
+# 停顿来源 -> [(统计项, 系数)]；'memory' 中的 dcache 延迟系数在计算时除以时钟周期
+SOURCES = {
+    'robFull': [(METRICS['ROBFull'], 1)],
+    'iqFull': [(METRICS['IQFull'], 1), ('system.cpu.iew.iqFullEvents', 1)],
+    'regsFull': [(METRICS['FullRegs'], 1)],
+    'lsqFull': [('system.cpu.rename.LQFullEvents', 1), ('system.cpu.rename.SQFullEvents', 1),
+                ('system.cpu.iew.lsqFullEvents', 1)],
+    'memory': [('system.cpu.dcache.demandMissLatency::total', 'ticks'),
+               ('system.cpu.fetchStats0.icacheStallCycles', 1)],
+    'branch': [('system.cpu.fetch.squashCycles', 1), ('system.cpu.commit.branchMispredicts', REFILL_CYCLES)],
+}
+
+COMPONENTS = ['base'] + list(SOURCES) + ['other']
+
+LABELS = {
+    'base': '基础',
+    'robFull': 'ROB阻塞',
+    'iqFull': 'IQ阻塞',
+    'regsFull': '寄存器阻塞',
+    'lsqFull': 'LSQ阻塞',
+    'memory': '访存',
+    'branch': '分支预测错误',
+    'other': '其他',
+}
+
+# 计算 CPI 栈需要从结果库读取的统计项
+INPUTS = [METRICS['numCycles'], COMMIT_IDLE, INSTS, CLOCK] + \
+    sorted({name for terms in SOURCES.values() for name, _ in terms})
+
+def _matrix(rows, names):
+    """rows 中各统计项 -> float 矩阵 (仿真数, 统计项数)，缺失为 0"""
+    return np.array([[row.get(n) or 0 for n in names] for row in rows], dtype=float).reshape(len(rows), len(names))
+
+def cpi_stacks(rows):
+    """rows 为 ResultStore.load(INPUTS) 的结果；返回 (cpi, parts)，parts[:, k] 对应 COMPONENTS[k]
+
+    无法计算的仿真（没有周期数或提交指令数）整行为 NaN。
+    """
+    x = _matrix(rows, INPUTS)
+    col = {name: x[:, i] for i, name in enumerate(INPUTS)}
+    cycles = col[METRICS['numCycles']]
+    insts = col[INSTS]
+    clock = np.where(col[CLOCK] > 0, col[CLOCK], DEFAULT_CLOCK)
+
+    weights = np.zeros((len(rows), len(SOURCES)))
+    for k, terms in enumerate(SOURCES.values()):
+        for name, coef in terms:
+            weights[:, k] += col[name] / clock if coef == 'ticks' else col[name] * coef
+
+    stall = np.clip(col[COMMIT_IDLE], 0, cycles)
+    total = weights.sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scale = np.where(total > stall, stall / total, 1.0)
+    attributed = weights * scale[:, None]
+    other = np.maximum(stall - attributed.sum(axis=1), 0)
+    parts = np.column_stack([cycles - stall, attributed, other])
+
+    ok = (cycles > 0) & (insts > 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        parts = np.where(ok[:, None], parts / insts[:, None], np.nan)
+        cpi = np.where(ok, cycles / insts, np.nan)
+    return cpi, parts
+
+def with_cpi_stack(rows):
+    """给每一行加上 'cpi' 与各 COMPONENTS 列（就地修改并返回 rows）"""
+    cpi, parts = cpi_stacks(rows)
+    for row, c, p in zip(rows, cpi, parts):
+        row['cpi'] = float(c)
+        row.update(zip(COMPONENTS, map(float, p)))
+    return rows
+
+def bottleneck(row):
+    """最大的停顿部分：(名称, 占 CPI 的比例)；没有 CPI 栈时返回 (None, 0)"""
+    stalls = [(row[c], c) for c in COMPONENTS[1:] if row.get(c) == row.get(c)]
+    if not stalls or not row.get('cpi'):
+        return None, 0.0
+    value, name = max(stalls)
+    return name, value / row['cpi']
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('db', nargs='?', default=DEFAULT_DB)
+    parser.add_argument('--sort', default='cpi', choices=['cpi'] + COMPONENTS)
+    parser.add_argument('--top', type=int, default=0, help="只输出前 N 行（0 表示全部）")
+    args = parser.parse_args()
+
+    with open_store(args.db) as store:
+        rows = [r for r in store.load(INPUTS) if r['regs'] is not None]
+    rows = [r for r in with_cpi_stack(rows) if r['cpi'] == r['cpi']]
+    if not rows:
+        print("结果库中没有可用的仿真")
+        return
+    rows.sort(key=lambda r: r[args.sort], reverse=True)
+    if args.top:
+        rows = rows[:args.top]
+
+    print(f"{'regs':>5} {'iq':>4} {'rob':>4} {'CPI':>7} " + ' '.join(f"{c:>8}" for c in COMPONENTS) + "  主要瓶颈")
+    print("-" * (24 + 9 * len(COMPONENTS) + 14))
+    for r in rows:
+        name, share = bottleneck(r)
+        print(f"{r['regs']:>5} {r['iq']:>4} {r['rob']:>4} {r['cpi']:>7.3f} "
+              + ' '.join(f"{r[c]:>8.3f}" for c in COMPONENTS)
+              + f"  {LABELS.get(name, '-')} ({share:.0%})")
+
+if __name__ == '__main__':
+    main()
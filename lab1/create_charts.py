@@ -2,36 +2,20 @@
 """
 生成实验报告用的图表
 使用 matplotlib 创建可视化图表
+只重绘输入数据或绘图代码发生变化的图，并在进程池中并行渲染（见 chart_cache.py）
+用法：python3 create_charts.py [-j 4] [--force] [--out-dir out]
 """
 
-import csv
+import argparse
+import os
+
 import matplotlib.pyplot as plt
 import numpy as np
 
-# 设置中文字体
-plt.rcParams['font.family'] = ['Arial Unicode MS', 'SimHei', 'DejaVu Sans']
-plt.rcParams['axes.unicode_minus'] = False
-
-def load_data(csv_path):
-    """加载仿真结果数据"""
-    data = []
-    with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                row['regs'] = int(row['regs'])
-                row['iq'] = int(row['iq'])
-                row['rob'] = int(row['rob'])
-                row['numCycles'] = int(row['numCycles']) if row['numCycles'] != 'NA' else None
-                row['ROBFull'] = int(row['ROBFull']) if row['ROBFull'] != 'NA' else 0
-                row['IQFull'] = int(row['IQFull']) if row['IQFull'] != 'NA' else 0
-                row['FullRegs'] = int(row['FullRegs']) if row['FullRegs'] != 'NA' else 0
-                data.append(row)
-            except ValueError:
-                continue
-    return [row for row in data if row['numCycles'] is not None]
+from chart_cache import DPI, render_charts
+from result_store import DEFAULT_DB, load_data
 
-def create_iq_impact_chart(data):
+def create_iq_impact_chart(data, path):
     """创建IQ影响分析图表"""
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
     
@@ -75,11 +59,10 @@ def create_iq_impact_chart(data):
     ax2.set_yscale('log')
     
     plt.tight_layout()
-    plt.savefig('/Users/lianglihang/Downloads/ComputerArchitecture/lab1/out/iq_impact.png', 
-                dpi=300, bbox_inches='tight')
+    plt.savefig(path, dpi=DPI, bbox_inches='tight')
     plt.close()
 
-def create_rob_impact_chart(data):
+def create_rob_impact_chart(data, path):
     """创建ROB影响分析图表"""
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(15, 6))
     
@@ -123,11 +106,10 @@ def create_rob_impact_chart(data):
     ax2.set_yscale('log')
     
     plt.tight_layout()
-    plt.savefig('/Users/lianglihang/Downloads/ComputerArchitecture/lab1/out/rob_impact.png', 
-                dpi=300, bbox_inches='tight')
+    plt.savefig(path, dpi=DPI, bbox_inches='tight')
     plt.close()
 
-def create_regs_impact_chart(data):
+def create_regs_impact_chart(data, path):
     """创建物理寄存器影响分析图表"""
     fig, ax = plt.subplots(1, 1, figsize=(10, 6))
     
@@ -158,11 +140,10 @@ def create_regs_impact_chart(data):
     ax.set_yscale('log')
     
     plt.tight_layout()
-    plt.savefig('/Users/lianglihang/Downloads/ComputerArchitecture/lab1/out/regs_impact.png', 
-                dpi=300, bbox_inches='tight')
+    plt.savefig(path, dpi=DPI, bbox_inches='tight')
     plt.close()
 
-def create_performance_overview(data):
+def create_performance_overview(data, path):
     """创建性能概览图表"""
     fig, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(16, 12))
     
@@ -237,21 +218,38 @@ def create_performance_overview(data):
                         ha='center', va='bottom', rotation=0)
     
     plt.tight_layout()
-    plt.savefig('/Users/lianglihang/Downloads/ComputerArchitecture/lab1/out/performance_overview.png', 
-                dpi=300, bbox_inches='tight')
+    plt.savefig(path, dpi=DPI, bbox_inches='tight')
     plt.close()
 
+# (文件名, 绘图函数, 该图用到的数据切片)
+CHARTS = [
+    ('iq_impact.png', create_iq_impact_chart,
+     lambda data: [row for row in data if row['regs'] == 256]),
+    ('rob_impact.png', create_rob_impact_chart,
+     lambda data: [row for row in data if row['regs'] == 256]),
+    ('regs_impact.png', create_regs_impact_chart,
+     lambda data: [row for row in data if (row['iq'], row['rob']) in [(64, 256), (256, 256)]]),
+    ('performance_overview.png', create_performance_overview,
+     lambda data: data),
+]
+
+CHART_TITLES = {
+    'iq_impact.png': 'IQ影响分析图表',
+    'rob_impact.png': 'ROB影响分析图表',
+    'regs_impact.png': '物理寄存器影响分析图表',
+    'performance_overview.png': '性能概览图表',
+}
+
 def main():
     """主函数"""
-    try:
-        import matplotlib.pyplot as plt
-    except ImportError:
-        print("错误: 需要安装 matplotlib")
-        print("请运行: pip3 install matplotlib")
-        return
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-j', '--jobs', type=int, default=None, help="并行渲染的进程数（默认为 CPU 核数）")
+    parser.add_argument('--force', action='store_true', help="忽略哈希，全部重绘")
+    parser.add_argument('--out-dir', default=str(DEFAULT_DB.parent))
+    args = parser.parse_args()
     
-    csv_path = '/Users/lianglihang/Downloads/ComputerArchitecture/lab1/out/summary.csv'
-    data = load_data(csv_path)
+    data = [row for row in load_data(DEFAULT_DB) if row['numCycles'] is not None]
     
     if not data:
         print("无法加载数据")
@@ -260,20 +258,16 @@ def main():
     print(f"加载了 {len(data)} 个有效仿真结果")
     print("正在生成图表...")
     
-    create_iq_impact_chart(data)
-    print("✅ IQ影响分析图表已生成: out/iq_impact.png")
-    
-    create_rob_impact_chart(data)
-    print("✅ ROB影响分析图表已生成: out/rob_impact.png")
-    
-    create_regs_impact_chart(data)
-    print("✅ 物理寄存器影响分析图表已生成: out/regs_impact.png")
-    
-    create_performance_overview(data)
-    print("✅ 性能概览图表已生成: out/performance_overview.png")
+    status = render_charts(CHARTS, data, args.out_dir, args.jobs, args.force)
+    for name, state in status.items():
+        if state == 'rendered':
+            print(f"✅ {CHART_TITLES[name]}已生成: {os.path.join(args.out_dir, name)}")
+        elif state == 'skipped':
+            print(f"⏭  {CHART_TITLES[name]}数据未变化，跳过: {os.path.join(args.out_dir, name)}")
+        else:
+            print(f"❌ {CHART_TITLES[name]}生成失败: {state}")
     
     print("\n所有图表已生成完成！")
 
 if __name__ == "__main__":
     main()
-
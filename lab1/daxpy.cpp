@@ -1,6 +1,18 @@
 #include <cstdio>
 #include <random>
 
+// Build with -DGEM5_ROI (and link libm5, see run_all.sh) to mark the daxpy
+// loop for gem5; without it stats.txt covers the whole program.
+// O3CPU.py --take-checkpoint fast-forwards up to m5_work_begin().
+#ifdef GEM5_ROI
+#include <gem5/m5ops.h>
+#define ROI_BEGIN() m5_work_begin(0, 0)
+#define ROI_END() m5_work_end(0, 0)
+#else
+#define ROI_BEGIN()
+#define ROI_END()
+#endif
+
 int main()
 {
 	const int N = 100000;
@@ -14,10 +26,12 @@ int main()
     }
 
     // Start of daxpy loop
+    ROI_BEGIN();
     for (int i = 0; i < N; ++i)
     {
         Y[i] = alpha * X[i] + Y[i];
     }
+    ROI_END();
     // End of daxpy loop
 
     double sum = 0;
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+设计空间的共用定义（结果库、explore.py、pareto.py 共用，不依赖其他模块）
+- DEFAULTS：O3CPU.py 命令行参数的默认值
+- SPACE：explore.py 调节的参数及候选取值；COST_WEIGHTS / hw_cost：归一化硬件代价
+- 输出目录名与参数的对应：regs64-iq16-rob16（run_sweep.py），
+  regs64-fregs64-iq16-rob32-lq32-sq32-width8[-n{指令数}]（explore.py，-n 为截断仿真）
+"""
+
+import re
+from pathlib import Path
+
+# O3CPU.py 命令行参数的默认值（结果库中没有记录的参数按默认值计）
+DEFAULTS = {
+    'regs': 256,
+    'fregs': 64,
+    'iq': 64,
+    'rob': 192,
+    'lq': 32,
+    'sq': 32,
+    'width': 8,
+}
+
+# 参数名 -> (O3CPU.py 选项, 候选取值)
+SPACE = {
+    'regs': ('--num-phys-int-regs', [64, 128, 256, 512]),
+    'fregs': ('--num-phys-float-regs', [64, 128, 256]),
+    'iq': ('--num-iq-entries', [16, 32, 64, 128]),
+    'rob': ('--num-rob-entries', [32, 64, 128, 256]),
+    'lq': ('--num-lq-entries', [16, 32, 64]),
+    'sq': ('--num-sq-entries', [16, 32, 64]),
+    'width': ('--width', [2, 4, 8]),
+}
+
+# 各参数的相对硬件代价权重（按取值占该参数最大值的比例计）；
+# IQ/LSQ 为全相联 CAM，宽度影响所有端口数，权重更高
+COST_WEIGHTS = {
+    'regs': 1.0,
+    'fregs': 1.0,
+    'iq': 2.0,
+    'rob': 1.0,
+    'lq': 1.5,
+    'sq': 1.5,
+    'width': 3.0,
+}
+
+def hw_cost_terms(cfg, space):
+    """hw_cost 按参数拆开的各项，取值可以是标量或 numpy 数组"""
+    total = sum(COST_WEIGHTS[k] for k in cfg)
+    return {k: COST_WEIGHTS[k] * v / max(space[k]) / total for k, v in cfg.items()}
+
+def hw_cost(cfg, space):
+    """归一化硬件代价：各参数占 space 中最大候选值的比例按 COST_WEIGHTS 加权平均，取值 (0, 1]"""
+    return sum(hw_cost_terms(cfg, space).values())
+
+# 输出目录名中的参数段，例如 regs64、iq16；截断仿真的指令数段为 n20000
+_SEGMENT = re.compile(r'([a-z]+)(\d+)$')
+INSTS_SEGMENT = 'n'
+
+def parse_outdir(outdir):
+    """输出目录名 -> ({参数: 取值}, 截断仿真的指令数，完整仿真为 None)；不认识的段忽略"""
+    params = {}
+    insts = None
+    for seg in Path(outdir).name.split('-'):
+        m = _SEGMENT.match(seg)
+        if m is None:
+            continue
+        if m.group(1) == INSTS_SEGMENT:
+            insts = int(m.group(2))
+        elif m.group(1) in DEFAULTS:
+            params[m.group(1)] = int(m.group(2))
+    return params, insts
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+扫描结果的主效应与交互效应分析（ANOVA 式方差分解）
+- 响应量：log(numCycles) 与各停顿计数器的 log1p，堆叠成 (响应, regs, iq, rob) 数组一次算完
+- 对参数子集 S，效应 = 按容斥原理组合的各子集边际均值：
+    主效应 a_i、两两交互 ab_ij、三阶交互 abc_ijk（单次仿真时即残差）
+  完整网格上各项正交，平方和相加等于总平方和，占比即该项解释的方差
+- 按"包含该参数的各项方差占比之和"给参数排序，扫描预算优先给真正起作用的参数
+  （例如 rob=4 时 IQ 几乎不起作用，表现为 iq×rob 交互项很大）
+- 网格有缺失点时用其余点的均值估计各项，分解不再严格正交，会给出提示
+用法：python3 effects.py [数据库路径] [--top 5]
+"""
+
+import argparse
+import warnings
+from itertools import combinations
+
+import numpy as np
+
+from result_store import DEFAULT_DB
+from results_tensor import PRIMARY, ResultsTensor
+
+# 响应量名 -> (统计项, 变换)；计数器可能为 0，用 log1p
+RESPONSES = {
+    'log(numCycles)': (PRIMARY, np.log),
+    'log1p(ROBFull)': ('ROBFull', np.log1p),
+    'log1p(IQFull)': ('IQFull', np.log1p),
+    'log1p(FullRegs)': ('FullRegs', np.log1p),
+}
+
+def _subsets(items):
+    for r in range(len(items) + 1):
+        yield from combinations(items, r)
+
+class Effects:
+    """一次分解的结果；项以参数名元组表示，例如 ('iq', 'rob')"""
+
+    def __init__(self, tensor, responses=RESPONSES):
+        self.axes = tensor.axes
+        self.coords = tensor.coords
+        self.responses = list(responses)
+        nd = len(self.axes)
+        y = np.stack([fn(tensor[m]) for m, fn in responses.values()])
+        valid = np.broadcast_to(tensor.mask, y.shape)
+        y = np.where(valid, y, np.nan)
+        self.complete = bool(tensor.mask.all())
+
+        # 各参数子集的边际均值（其余轴取平均，保留维度便于广播）
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            means = {}
+            for s in _subsets(range(nd)):
+                rest = tuple(1 + k for k in range(nd) if k not in s)
+                means[s] = np.nanmean(y, axis=rest, keepdims=True) if rest else y
+        self.grand = means[()].reshape(len(self.responses))
+
+        self.effects = {}
+        self.ss = {}
+        for s in _subsets(range(nd)):
+            if not s:
+                continue
+            effect = sum((-1) ** (len(s) - len(t)) * means[t] for t in _subsets(s))
+            term = tuple(self.axes[k] for k in s)
+            self.effects[term] = effect
+            self.ss[term] = np.where(valid, np.broadcast_to(effect, y.shape) ** 2, 0).sum(axis=tuple(range(1, nd + 1)))
+        self.total = np.where(valid, (y - means[()]) ** 2, 0).sum(axis=tuple(range(1, nd + 1)))
+
+    def fraction(self, term):
+        """该项解释的方差占比（按响应量）"""
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return self.ss[term] / self.total
+
+    def importance(self):
+        """各参数：所有包含它的项的方差占比之和（按响应量）"""
+        return {axis: sum(self.fraction(t) for t in self.ss if axis in t) for axis in self.axes}
+
+    def main(self, axis, response=0):
+        """主效应：axis 各取值的效应（对数尺度）"""
+        r = self.responses.index(response) if isinstance(response, str) else response
+        return self.effects[(axis,)][r].ravel()
+
+    def strongest(self, term, response=0, n=5):
+        """某一交互项中绝对值最大的 n 个单元：[(各参数取值, 效应)]"""
+        r = self.responses.index(response) if isinstance(response, str) else response
+        effect = self.effects[term][r]
+        ks = [self.axes.index(a) for a in term]
+        cells = effect.reshape([len(self.coords[k]) for k in ks])
+        order = np.argsort(-np.abs(cells), axis=None)[:n]
+        return [(tuple(int(self.coords[k][i]) for k, i in zip(ks, idx)), float(cells[idx]))
+                for idx in zip(*np.unravel_index(order, cells.shape))]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('db', nargs='?', default=DEFAULT_DB)
+    parser.add_argument('--top', type=int, default=5, help="每个交互项列出的单元数")
+    args = parser.parse_args()
+
+    tensor = ResultsTensor.from_store(args.db, [m for m, _ in RESPONSES.values()])
+    eff = Effects(tensor)
+    print(f"{len(tensor)} / {np.prod(tensor.shape)} 个网格点有结果")
+    if not eff.complete:
+        print("注意：网格不完整，各项按现有点估计，平方和之和不再严格等于总平方和")
+
+    print("\n方差分解（各项平方和占总平方和的比例）")
+    print(f"{'项':<16}" + ''.join(f"{r:>17}" for r in eff.responses))
+    print("-" * (16 + 17 * len(eff.responses)))
+    for term in eff.ss:
+        print(f"{'×'.join(term):<16}" + ''.join(f"{v:>17.1%}" for v in eff.fraction(term)))
+
+    print(f"\n参数重要性（包含该参数的各项占比之和，{eff.responses[0]}）:")
+    ranked = sorted(eff.importance().items(), key=lambda kv: -kv[1][0])
+    for axis, share in ranked:
+        print(f"  {axis:<6} {share[0]:>7.1%}")
+
+    print("\n主效应（相对总体几何平均的 numCycles 倍数）:")
+    for axis, coords in zip(eff.axes, eff.coords):
+        factors = np.exp(eff.main(axis))
+        print(f"  {axis:<6} " + '  '.join(f"{int(c)}:{f:.3f}x" for c, f in zip(coords, factors)))
+
+    print(f"\n最强的交互单元（{eff.responses[0]}，正值表示比主效应之和更慢）:")
+    for term in eff.effects:
+        if len(term) < 2:
+            continue
+        cells = ', '.join(f"{dict(zip(term, cfg))} {v:+.3f}" for cfg, v in eff.strongest(term, n=args.top))
+        print(f"  {'×'.join(term):<14} {cells}")
+
+if __name__ == '__main__':
+    main()
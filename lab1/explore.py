@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+自适应设计空间探索（替代 run_all.sh 的全排列网格）
+- 同时调节 5~8 个微结构参数（见 design_space.py 的 SPACE），目标为代价加权的 CPI：
+  objective = CPI * (1 + λ * 归一化硬件代价)
+- 逐级减半（successive halving）：先用 O3CPU.py --max-insts 截断的短仿真
+  评估一批随机配置，每一级只保留最好的 1/η，并把仿真长度乘以 η，
+  最后一级为完整 ROI 仿真
+- 截断仿真必须从 daxpy 循环起点的检查点恢复（默认开启），否则前若干万条指令
+  测到的是初始化代码；--no-roi-checkpoint 只能与只有完整仿真的 --rungs 1 同用
+- 再以完整仿真在最优点的邻域内爬山，邻域中没有点能把目标改善超过
+  --tolerance 时停止；总花费以"完整仿真次数"计，不超过 --budget：
+  截断仿真按实际仿真的指令数占完整 ROI 的比例计费，ROI 长度取自
+  --max-insts 或第一个完整仿真（必要时先完整仿真一个配置作为标定）
+- 每次仿真写入结果库 out/results.db，全部评估记录写到 <out>/explore.csv
+用法：python3 explore.py --budget 30 -j 8 [--space rob=64,128,256 ...]
+"""
+
+import argparse
+import csv
+import os
+import random
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from design_space import SPACE, hw_cost
+from parse_stats import ROI, load_block_labels, parse_stats_file, stats_signature
+from result_store import ResultStore
+from run_sweep import checkpoint_dir, is_complete, take_checkpoint
+
+LOG_FIELDS = ['name', 'insts', 'cpi', 'cost', 'objective']
+
+def parse_space(items):
+    """--space rob=64,128,256 覆盖 SPACE 中的候选取值，只给一个值即固定该参数"""
+    space = {k: list(v) for k, (_, v) in SPACE.items()}
+    for item in items or []:
+        name, _, values = item.partition('=')
+        if name not in SPACE:
+            raise SystemExit(f"未知参数: {name}（可选 {', '.join(SPACE)}）")
+        space[name] = sorted(int(v) for v in values.split(','))
+    return space
+
+def config_name(cfg, insts):
+    """输出目录名：regs{R}-fregs{F}-iq{I}-...，截断仿真带 -n{指令数}"""
+    name = '-'.join(f'{k}{v}' for k, v in cfg.items())
+    return f'{name}-n{insts}' if insts else name
+
+def cpi_of(stats):
+    """CPI：优先取 gem5 的 system.cpu.cpi，否则由 numCycles/simInsts 计算"""
+    cpi = stats['system.cpu.cpi']
+    if not cpi and stats['simInsts']:
+        cpi = stats['system.cpu.numCycles'] / stats['simInsts']
+    return cpi or None
+
+def random_configs(space, n, rng):
+    """不重复地随机抽取 n 个配置"""
+    seen = set()
+    configs = []
+    limit = 1
+    for values in space.values():
+        limit *= len(values)
+    while len(configs) < min(n, limit):
+        cfg = {k: rng.choice(v) for k, v in space.items()}
+        key = tuple(cfg.values())
+        if key not in seen:
+            seen.add(key)
+            configs.append(cfg)
+    return configs
+
+def neighbors(cfg, space):
+    """每个参数向上/向下移动一档得到的配置"""
+    result = []
+    for k, values in space.items():
+        i = values.index(cfg[k])
+        for j in (i - 1, i + 1):
+            if 0 <= j < len(values):
+                result.append({**cfg, k: values[j]})
+    return result
+
+class Explorer:
+    """记录已评估的配置与已花费的预算，并发运行 gem5"""
+
+    def __init__(self, args, space, store):
+        self.args = args
+        self.space = space
+        self.store = store
+        self.spent = 0.0
+        # 完整仿真的指令数（计费的单位），未知时由第一个完整仿真测得
+        self.roi_insts = args.max_insts or None
+        self.results = {}   # (配置, 指令数) -> (cpi, objective)
+        self.log = []
+
+    def command(self, cfg, insts, odir):
+        args = self.args
+        cmd = [args.gem5_bin, '-d', str(odir), args.o3conf, f'--cmd={args.cmd_bin}']
+        cmd += [f'{SPACE[k][0]}={v}' for k, v in cfg.items()]
+        if insts:
+            cmd.append(f'--max-insts={insts}')
+        if args.roi_checkpoint:
+            cmd.append(f'--checkpoint-dir={checkpoint_dir(args)}')
+        return cmd
+
+    def run_one(self, cfg, insts):
+        """仿真一个配置（已完成的直接复用），返回 ROI 统计块，失败返回 None"""
+        odir = Path(self.args.out_base) / config_name(cfg, insts)
+        stats_path = odir / 'stats.txt'
+        # 截断仿真只复用确实落在 ROI 内的结果（旧版本不从检查点恢复时测的是初始化代码）
+        if is_complete(stats_path) and (not insts or ROI in (load_block_labels(odir) or [])):
+            print(f"[SKIP] {odir.name} -> already exists", file=sys.stderr)
+            return parse_stats_file(stats_path)
+        odir.mkdir(parents=True, exist_ok=True)
+        print(f"[RUN] {odir.name}", file=sys.stderr)
+        with open(odir / 'run.log', 'w') as log:
+            try:
+                proc = subprocess.run(self.command(cfg, insts, odir), stdout=log,
+                                      stderr=subprocess.STDOUT, timeout=self.args.timeout)
+                reason = f"exit code {proc.returncode}"
+            except subprocess.TimeoutExpired:
+                reason = f"timeout after {self.args.timeout}s"
+        if not is_complete(stats_path):
+            print(f"[FAIL] {odir.name}: {reason}", file=sys.stderr)
+            return None
+        return parse_stats_file(stats_path)
+
+    def run_cost(self, insts, stats=None):
+        """一次仿真折算成完整仿真的次数：截断仿真按实际仿真的指令数（失败时按计划的指令数）
+        占完整 ROI 的比例计；ROI 长度未知时只能按一次完整仿真计"""
+        if insts == self.args.max_insts or not self.roi_insts:
+            return 1.0
+        done = stats['simInsts'] if stats is not None and stats['simInsts'] else insts
+        return min(1.0, done / self.roi_insts)
+
+    def evaluate(self, configs, insts):
+        """并发评估一组配置，返回 [(objective, cfg)]（按目标升序，失败的配置不计入）"""
+        todo = [c for c in configs if (tuple(c.values()), insts) not in self.results]
+        with ThreadPoolExecutor(max_workers=max(1, self.args.jobs)) as pool:
+            outcomes = list(pool.map(lambda c: self.run_one(c, insts), todo))
+        for cfg, stats in zip(todo, outcomes):
+            self.spent += self.run_cost(insts, stats)
+            if stats is None:
+                continue
+            if insts == self.args.max_insts and self.roi_insts is None and stats['simInsts']:
+                self.roi_insts = stats['simInsts']
+            odir = Path(self.args.out_base) / config_name(cfg, insts)
+            # 目录名带全部参数与截断仿真的 -n{指令数}，结果库据此区分设计点并把截断仿真排除在分析之外
+            self.store.ingest(odir, stats, sig=stats_signature(odir / 'stats.txt'))
+            cpi = cpi_of(stats)
+            if cpi is None:
+                continue
+            cost = hw_cost(cfg, self.space)
+            obj = cpi * (1 + self.args.cost_weight * cost)
+            self.results[(tuple(cfg.values()), insts)] = (cpi, obj)
+            self.log.append({**cfg, 'name': config_name(cfg, insts), 'insts': insts,
+                             'cpi': cpi, 'cost': cost, 'objective': obj})
+        ranked = []
+        for cfg in configs:
+            r = self.results.get((tuple(cfg.values()), insts))
+            if r is not None:
+                ranked.append((r[1], cfg))
+        ranked.sort(key=lambda t: t[0])
+        return ranked
+
+    def successive_halving(self, configs):
+        """逐级减半，返回最后一级（完整仿真）的排名"""
+        eta, rungs = self.args.eta, self.args.rungs
+        if rungs > 1 and self.roi_insts is None and configs:
+            # 截断仿真按 ROI 长度计费：先完整仿真一个配置测出 ROI 的指令数，
+            # 该配置进入最后一级时直接复用
+            print("--- calibration: full ROI of 1 config ---", file=sys.stderr)
+            self.evaluate(configs[:1], self.args.max_insts)
+            if self.roi_insts is None:
+                print("标定仿真失败，无法折算截断仿真的花费", file=sys.stderr)
+                return []
+        ranked = []
+        last = False
+        for level in range(rungs):
+            final = level == rungs - 1
+            insts = self.args.max_insts if final else self.args.min_insts * eta ** level
+            unit = self.run_cost(insts)
+            affordable = int((self.args.budget - self.spent) / unit)
+            if affordable <= 0:
+                break
+            # 最后一级确实运行了才用它的排名
+            last = final
+            configs = configs[:affordable]
+            print(f"--- rung {level}: {len(configs)} configs, "
+                  f"{'full ROI' if not insts else f'{insts} insts'} ---", file=sys.stderr)
+            ranked = self.evaluate(configs, insts)
+            if last or not ranked:
+                break
+            configs = [cfg for _, cfg in ranked[:max(1, len(ranked) // eta)]]
+        # 最后一级没能运行（预算用尽或上一级全部失败）时，只有标定等已有的完整仿真可供排名
+        return ranked if last else self.full_ranking()
+
+    def full_ranking(self):
+        """已完成的完整仿真 [(objective, cfg)]，按目标升序"""
+        ranked = [(r[1], dict(zip(self.space, key)))
+                  for (key, insts), r in self.results.items() if insts == self.args.max_insts]
+        ranked.sort(key=lambda t: t[0])
+        return ranked
+
+    def hill_climb(self, best_obj, best):
+        """完整仿真下在最优点邻域内搜索，改善不足 tolerance 或预算用尽时停止"""
+        insts = self.args.max_insts
+        while self.spent + 1 <= self.args.budget:
+            cand = [c for c in neighbors(best, self.space)
+                    if (tuple(c.values()), insts) not in self.results]
+            cand = cand[:int(self.args.budget - self.spent)]
+            if not cand:
+                break
+            print(f"--- neighbourhood of {config_name(best, 0)}: {len(cand)} configs ---", file=sys.stderr)
+            ranked = self.evaluate(cand, insts)
+            if not ranked or ranked[0][0] >= best_obj * (1 - self.args.tolerance):
+                break
+            best_obj, best = ranked[0]
+        return best_obj, best
+
+def write_log(path, rows, space):
+    fields = list(space) + LOG_FIELDS
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        for r in rows:
+            writer.writerow(r)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--gem5-bin', default=os.environ.get('GEM5_BIN', '/opt/gem5/build/RISCV/gem5.opt'))
+    parser.add_argument('--o3conf', default=os.environ.get('O3CONF', '/lab1/O3CPU.py'))
+    parser.add_argument('--cmd-bin', default=os.environ.get('CMD_BIN', '/lab1/daxpy.riscv'))
+    parser.add_argument('--out-base', default=os.environ.get('OUT_BASE', '/lab1/out') + '/explore')
+    parser.add_argument('-j', '--jobs', type=int, default=int(os.environ.get('JOBS', os.cpu_count() or 1)))
+    parser.add_argument('--timeout', type=float, default=None, help="单次仿真的超时时间（秒）")
+    parser.add_argument('--space', nargs='*', metavar='NAME=V1,V2,...',
+                        help="覆盖参数的候选取值，例如 rob=64,128,256")
+    parser.add_argument('--budget', type=float, default=30,
+                        help="预算：完整仿真的次数（截断仿真按实际仿真的指令数折算）")
+    parser.add_argument('--initial', type=int, default=27, help="第一级随机配置数")
+    parser.add_argument('--eta', type=int, default=3, help="每级保留 1/eta，仿真长度乘以 eta")
+    parser.add_argument('--rungs', type=int, default=3, help="级数（最后一级为完整仿真）")
+    parser.add_argument('--min-insts', type=int, default=20000, help="第一级的仿真指令数")
+    parser.add_argument('--max-insts', type=int, default=0,
+                        help="最后一级的仿真指令数（0 表示完整 ROI）")
+    parser.add_argument('--cost-weight', type=float, default=0.5, help="目标中硬件代价的权重 λ")
+    parser.add_argument('--tolerance', type=float, default=0.01,
+                        help="邻域搜索的停止阈值：目标的相对改善")
+    parser.add_argument('--roi-checkpoint', action=argparse.BooleanOptionalAction, default=True,
+                        help="所有仿真从 daxpy 循环起点的检查点恢复（截断仿真因此落在 ROI 内）")
+    parser.add_argument('--fast-forward', type=int, default=0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    if args.rungs < 1:
+        parser.error("--rungs 至少为 1")
+    if not args.roi_checkpoint and (args.rungs > 1 or args.max_insts):
+        parser.error("截断仿真（--rungs > 1 或 --max-insts）必须从 ROI 检查点恢复，"
+                     "否则测到的是初始化代码；去掉 --no-roi-checkpoint")
+    return args
+
+def main(argv=None):
+    args = parse_args(argv)
+    space = parse_space(args.space)
+    out_base = Path(args.out_base)
+    out_base.mkdir(parents=True, exist_ok=True)
+    if args.roi_checkpoint and not take_checkpoint(args):
+        return 1
+
+    rng = random.Random(args.seed)
+    with ResultStore(out_base / 'results.db') as store:
+        explorer = Explorer(args, space, store)
+        ranked = explorer.successive_halving(random_configs(space, args.initial, rng))
+        if ranked:
+            best_obj, best = explorer.hill_climb(*ranked[0])
+        write_log(out_base / 'explore.csv', explorer.log, space)
+
+    print(f"预算：已用 {explorer.spent:.2f} / {args.budget} 次完整仿真")
+    if not ranked:
+        print("没有得到任何完整仿真结果")
+        return 1
+    final = sorted((r for r in explorer.log if r['insts'] == args.max_insts), key=lambda r: r['objective'])
+    print(f"{'配置':<48} {'CPI':>8} {'代价':>6} {'目标':>8}")
+    print("-" * 74)
+    for r in final[:10]:
+        print(f"{config_name({k: r[k] for k in space}, 0):<48} {r['cpi']:>8.4f} "
+              f"{r['cost']:>6.3f} {r['objective']:>8.4f}")
+    print(f"\n最优配置: {config_name(best, 0)}  (目标 {best_obj:.4f})")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
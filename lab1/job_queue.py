@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+多机共享的仿真任务队列（SQLite，仅依赖Python标准库）
+- 队列是共享文件系统上的一个 SQLite 文件；任意多个 worker（本机或其他机器）
+  用 BEGIN IMMEDIATE 事务原子地领取 (regs, iq, rob) 任务，同一任务不会被领取两次
+- 运行中的 worker 每 HEARTBEAT_SECONDS 秒更新心跳；心跳超过 --stale 秒的任务
+  （worker 崩溃、机器掉线）在下一次领取时重新排队，超过 --max-attempts 次记为失败；
+  原 worker 若还活着，下一次心跳发现任务已被回收（LOST）时立即杀掉自己的 gem5，
+  不会与新领取者在同一个输出目录中同时写结果
+- worker 用 run_sweep.py 的 run_job 运行仿真（超时、重试、结果缓存、采样等选项相同），
+  summary 行写回队列；输出目录需在所有机器上可见
+- collect 把已完成任务写成 summary.csv 并更新 out/results.db
+注意：共享文件系统需支持 POSIX 文件锁（NFS 需启用 lock），各机器时钟需大致同步。
+用法：
+  python3 job_queue.py submit  --queue q.db --regs 64 256 --iq 4 16 --rob 4 16
+  python3 job_queue.py worker  --queue q.db [run_sweep.py 的 gem5 选项]
+  python3 job_queue.py local 4 --queue q.db [run_sweep.py 的 gem5 选项]   # 本机启动 4 个 worker
+  python3 job_queue.py status  --queue q.db
+  python3 job_queue.py collect --queue q.db [--out-base out]
+"""
+
+import argparse
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from result_store import ResultStore
+from run_sweep import SUMMARY_FIELDS, outdir_for, parse_args, run_job, summary_row, write_summary_atomic
+
+HEARTBEAT_SECONDS = 30
+# 心跳超过这么久的运行中任务视为 worker 已死亡
+STALE_SECONDS = 5 * HEARTBEAT_SECONDS
+MAX_ATTEMPTS = 3
+# 队列为空但仍有任务在运行时，空闲 worker 的轮询间隔
+POLL_SECONDS = 5
+
+STATES = ('queued', 'running', 'done', 'failed')
+
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS jobs (
+    job_id INTEGER PRIMARY KEY,
+    regs INTEGER NOT NULL,
+    iq INTEGER NOT NULL,
+    rob INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'queued',
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    claimed_at REAL,
+    heartbeat REAL,
+    finished_at REAL,
+    result TEXT,
+    error TEXT,
+    UNIQUE (regs, iq, rob)
+);
+CREATE INDEX IF NOT EXISTS jobs_state ON jobs (state, job_id);
+"""
+
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+class JobQueue:
+    """任务队列；每个线程使用自己的 JobQueue 对象（sqlite3 连接不跨线程共享）"""
+
+    def __init__(self, path, stale=STALE_SECONDS, max_attempts=MAX_ATTEMPTS):
+        self.path = Path(path)
+        self.stale = stale
+        self.max_attempts = max_attempts
+        # isolation_level=None：由下面显式的 BEGIN IMMEDIATE 控制事务
+        self.conn = sqlite3.connect(str(self.path), timeout=60, isolation_level=None)
+        self.conn.executescript(_SCHEMA_SQL)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _write(self, sql, params=()):
+        """在一个写事务中执行，返回受影响的行数"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            n = self.conn.execute(sql, params).rowcount
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return n
+
+    def submit(self, configs):
+        """加入任务，已存在的组合保持原状，返回新加入的个数"""
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            n = 0
+            for cfg in configs:
+                n += self.conn.execute(
+                    "INSERT OR IGNORE INTO jobs (regs, iq, rob) VALUES (?, ?, ?)", cfg).rowcount
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return n
+
+    def retry_failed(self):
+        """把失败的任务重新排队（清零尝试次数）"""
+        return self._write("UPDATE jobs SET state = 'queued', attempts = 0, worker = NULL, error = NULL "
+                           "WHERE state = 'failed'")
+
+    def _requeue_stale(self, now):
+        """在已开启的写事务中回收心跳超时的任务"""
+        deadline = now - self.stale
+        self.conn.execute(
+            "UPDATE jobs SET state = 'failed', worker = NULL, finished_at = ?, "
+            "error = 'worker lost ' || attempts || ' times' "
+            "WHERE state = 'running' AND heartbeat < ? AND attempts >= ?",
+            (now, deadline, self.max_attempts))
+        return self.conn.execute(
+            "UPDATE jobs SET state = 'queued', worker = NULL "
+            "WHERE state = 'running' AND heartbeat < ?", (deadline,)).rowcount
+
+    def claim(self, worker):
+        """原子地领取一个任务：返回 (job_id, (regs, iq, rob))，队列为空返回 None"""
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            n = self._requeue_stale(now)
+            if n:
+                print(f"[REQUEUE] {n} job(s) from dead workers", file=sys.stderr)
+            rec = self.conn.execute(
+                "SELECT job_id, regs, iq, rob FROM jobs WHERE state = 'queued' ORDER BY job_id LIMIT 1").fetchone()
+            if rec is not None:
+                self.conn.execute(
+                    "UPDATE jobs SET state = 'running', worker = ?, attempts = attempts + 1, "
+                    "claimed_at = ?, heartbeat = ? WHERE job_id = ?", (worker, now, now, rec[0]))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        return None if rec is None else (rec[0], tuple(rec[1:]))
+
+    def heartbeat(self, job_id, worker):
+        """更新心跳；任务已不属于该 worker（被回收后由别人领取）时返回 False"""
+        return self._write("UPDATE jobs SET heartbeat = ? WHERE job_id = ? AND worker = ? AND state = 'running'",
+                           (time.time(), job_id, worker)) > 0
+
+    def finish(self, job_id, worker, result=None, error=None):
+        """写回结果（result 为 summary 行）或失败原因；任务已被回收时丢弃并返回 False"""
+        state = 'done' if result is not None else 'failed'
+        return self._write(
+            "UPDATE jobs SET state = ?, result = ?, error = ?, finished_at = ? "
+            "WHERE job_id = ? AND worker = ? AND state = 'running'",
+            (state, None if result is None else json.dumps(result), error, time.time(), job_id, worker)) > 0
+
+    def counts(self):
+        counts = dict.fromkeys(STATES, 0)
+        counts.update(self.conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state"))
+        return counts
+
+    def running(self):
+        """[(regs, iq, rob, worker, 尝试次数, 距上次心跳的秒数)]"""
+        now = time.time()
+        return [rec[:5] + (now - rec[5],) for rec in self.conn.execute(
+            "SELECT regs, iq, rob, worker, attempts, heartbeat FROM jobs WHERE state = 'running' ORDER BY job_id")]
+
+    def results(self):
+        """已完成任务的 summary 行"""
+        return [json.loads(r) for r, in self.conn.execute(
+            "SELECT result FROM jobs WHERE state = 'done' ORDER BY regs, iq, rob")]
+
+    def failures(self):
+        return list(self.conn.execute(
+            "SELECT regs, iq, rob, attempts, error FROM jobs WHERE state = 'failed' ORDER BY regs, iq, rob"))
+
+class Heartbeat(threading.Thread):
+    """后台线程：运行任务期间定期更新心跳；任务被回收后置位 lost"""
+
+    def __init__(self, queue_path, job_id, worker, interval=HEARTBEAT_SECONDS):
+        super().__init__(daemon=True)
+        self.queue_path = queue_path
+        self.job_id = job_id
+        self.worker = worker
+        self.interval = interval
+        self.stopped = threading.Event()
+        self.lost = threading.Event()
+
+    def run(self):
+        with JobQueue(self.queue_path) as queue:
+            while not self.stopped.wait(self.interval):
+                if not queue.heartbeat(self.job_id, self.worker):
+                    print(f"[LOST] job {self.job_id} was requeued by another worker, "
+                          f"stopping its gem5", file=sys.stderr)
+                    self.lost.set()
+                    return
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+def work(queue_path, sweep_args, stale=STALE_SECONDS, max_attempts=MAX_ATTEMPTS, heartbeat=HEARTBEAT_SECONDS):
+    """worker 主循环：领取、运行、写回，直到队列中既没有排队也没有运行中的任务；返回完成的任务数"""
+    worker = worker_name()
+    done = 0
+    with JobQueue(queue_path, stale, max_attempts) as queue:
+        while True:
+            job = queue.claim(worker)
+            if job is None:
+                counts = queue.counts()
+                if counts['running'] == 0:
+                    break
+                time.sleep(POLL_SECONDS)  # 其他 worker 的任务可能因超时被回收
+                continue
+            job_id, cfg = job
+            beat = Heartbeat(queue_path, job_id, worker, heartbeat)
+            beat.start()
+            result = error = None
+            try:
+                stats = run_job(sweep_args, [cfg], cancel=beat.lost)[cfg]
+                if stats is not None:
+                    result = summary_row(*cfg, stats)
+                else:
+                    error = f"see {outdir_for(sweep_args.out_base, *cfg) / 'run.log'}"
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            finally:
+                beat.stop()
+            if beat.lost.is_set():
+                continue
+            if queue.finish(job_id, worker, result, error):
+                done += result is not None
+            else:
+                print(f"[LOST] regs={cfg[0]} iq={cfg[1]} rob={cfg[2]}: result discarded", file=sys.stderr)
+    print(f"[{worker}] queue drained, {done} job(s) completed", file=sys.stderr)
+    return done
+
+def collect(queue_path, out_base):
+    """已完成任务 -> summary.csv，并把输出目录增量写入结果库"""
+    out_base = Path(out_base)
+    with JobQueue(queue_path) as queue:
+        rows = queue.results()
+    write_summary_atomic(out_base / 'summary.csv', rows, SUMMARY_FIELDS)
+    with ResultStore(out_base / 'results.db') as store:
+        n = store.ingest_tree(out_base)
+    print(f"summary.csv: {len(rows)} 行；结果库更新 {n} 个仿真 -> {out_base / 'results.db'}")
+
+def print_status(queue_path):
+    with JobQueue(queue_path) as queue:
+        counts = queue.counts()
+        print('  '.join(f"{state} {counts[state]}" for state in STATES))
+        running = queue.running()
+        if running:
+            print(f"\n{'配置':<24} {'worker':<28} {'尝试':>4} {'心跳(秒前)':>11}")
+            for regs, iq, rob, worker, attempts, age in running:
+                print(f"{outdir_for('', regs, iq, rob).name:<24} {worker:<28} {attempts:>4} {age:>11.0f}")
+        failures = queue.failures()
+        if failures:
+            print("\n失败的任务:")
+            for regs, iq, rob, attempts, error in failures:
+                print(f"  {outdir_for('', regs, iq, rob).name} (尝试 {attempts} 次): {error}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('command', choices=['submit', 'worker', 'local', 'status', 'collect'])
+    parser.add_argument('workers', nargs='?', type=int, default=os.cpu_count() or 1,
+                        help="local：本机启动的 worker 数")
+    parser.add_argument('--queue', default=os.environ.get('JOB_QUEUE', 'queue.db'))
+    parser.add_argument('--stale', type=float, default=STALE_SECONDS, help="心跳超时（秒）")
+    parser.add_argument('--heartbeat', type=float, default=HEARTBEAT_SECONDS, help="心跳间隔（秒）")
+    parser.add_argument('--max-attempts', type=int, default=MAX_ATTEMPTS)
+    parser.add_argument('--retry-failed', action='store_true', help="submit：同时把失败的任务重新排队")
+    # 其余选项（--gem5-bin、--out-base、--timeout、--regs 等）交给 run_sweep.py 解析
+    args, rest = parser.parse_known_args()
+    sweep_args = parse_args(rest)
+
+    if args.command == 'submit':
+        grid = [(regs, iq, rob) for regs in sweep_args.regs for iq in sweep_args.iq for rob in sweep_args.rob]
+        with JobQueue(args.queue) as queue:
+            n = queue.submit(grid)
+            if args.retry_failed:
+                n += queue.retry_failed()
+        print(f"已加入 {n} 个任务 -> {args.queue}")
+    elif args.command == 'worker':
+        work(args.queue, sweep_args, args.stale, args.max_attempts, args.heartbeat)
+    elif args.command == 'local':
+        cmd = [sys.executable, os.path.abspath(__file__), 'worker', '--queue', args.queue,
+               f'--stale={args.stale}', f'--heartbeat={args.heartbeat}',
+               f'--max-attempts={args.max_attempts}'] + rest
+        procs = [subprocess.Popen(cmd) for _ in range(max(1, args.workers))]
+        status = max(p.wait() for p in procs)
+        print_status(args.queue)
+        return status
+    elif args.command == 'status':
+        print_status(args.queue)
+    else:
+        collect(args.queue, sweep_args.out_base)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
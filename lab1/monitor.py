@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+扫描进度监视（替代 tail run_all_fixed.log 和手工的 progress.csv）
+- 跟踪 out 目录下各仿真的输出目录，增量读取正在写入的 stats.txt
+  （只解析新增的完整统计块，--stats-period-insts 的快照即为进度）
+- 每个运行中的任务：已仿真指令数、完成比例（相对已完成仿真的 simInsts）、
+  实时的每秒仿真指令数
+- 整个扫描的 ETA：剩余指令数 / 并行吞吐量，吞吐量取运行中任务的实时速率，
+  没有时用已完成仿真的 hostInstRate
+- 默认为刷新的终端表格；--json 每次刷新输出一行 JSON，便于其他程序读取
+用法：python3 monitor.py [out目录] [--interval 5] [--json] [--once] [--regs ... --iq ... --rob ...]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from statistics import median
+
+from parse_stats import END_MARKER, iter_blocks, parse_triplet_from_outdir
+from run_sweep import INFERRED_NAME, IQS, REGS, ROBS, is_complete, outdir_for
+from result_store import ResultStore
+
+# 这么久没有任何输出的未完成目录视为已中止
+STALE_SECONDS = 600
+
+class StatsFollower:
+    """增量读取一个 stats.txt：记住读到的位置，只解析新写完的统计块"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.offset = 0
+        self.last = None        # 最近一个统计块
+
+    def poll(self):
+        try:
+            size = self.path.stat().st_size
+        except OSError:
+            return self.last
+        if size < self.offset:  # 文件被重写（任务重试）
+            self.offset, self.last = 0, None
+        if size == self.offset:
+            return self.last
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(size - self.offset)
+        end = data.rfind(END_MARKER.encode())
+        if end < 0:
+            return self.last
+        end = data.find(b'\n', end) + 1 or len(data)
+        lines = data[:end].decode('utf-8', errors='ignore').splitlines(True)
+        for block in iter_blocks(lines):
+            self.last = block
+        self.offset += end
+        return self.last
+
+class Monitor:
+    def __init__(self, out_base, grid):
+        self.out_base = Path(out_base)
+        self.grid = grid
+        self.followers = {}
+        self.history = {}       # outdir -> (时间, 指令数)，用于计算实时速率
+        self.rates = {}
+
+    def reference(self):
+        """已完成仿真的 simInsts、hostInstRate、hostSeconds 中位数"""
+        db = self.out_base / 'results.db'
+        rows = []
+        if db.exists():
+            with ResultStore(db) as store:
+                rows = store.load(['simInsts', 'hostInstRate', 'hostSeconds'])
+        ref = {}
+        for col in ('simInsts', 'hostInstRate', 'hostSeconds'):
+            values = [r[col] for r in rows if r[col]]
+            ref[col] = median(values) if values else None
+        return ref
+
+    def job_dirs(self):
+        dirs = {outdir_for(self.out_base, *cfg) for cfg in self.grid}
+        dirs.update(p for p in self.out_base.glob('regs*-iq*-rob*') if p.is_dir())
+        return sorted(dirs)
+
+    def job_state(self, odir, now):
+        """(状态, 已仿真指令数, 开始时间)；状态为 done/running/stale/pending"""
+        stats = odir / 'stats.txt'
+        if is_complete(stats) or (odir / INFERRED_NAME).exists():
+            return 'done', None, None
+        markers = [odir / n for n in ('stats_blocks.json', 'simout', 'run.log', 'stats.txt')]
+        mtimes = [p.stat().st_mtime for p in markers if p.exists()]
+        if not mtimes:
+            return 'pending', None, None
+        started = min(mtimes)
+        follower = self.followers.setdefault(odir, StatsFollower(stats))
+        block = follower.poll()
+        insts = block['simInsts'] if block is not None else None
+        state = 'running' if now - max(mtimes) < STALE_SECONDS else 'stale'
+        return state, insts, started
+
+    def snapshot(self):
+        now = time.time()
+        ref = self.reference()
+        jobs = []
+        counts = {'done': 0, 'running': 0, 'stale': 0, 'pending': 0}
+        for odir in self.job_dirs():
+            state, insts, started = self.job_state(odir, now)
+            counts[state] += 1
+            if state not in ('running', 'stale'):
+                continue
+            job = {'outdir': str(odir), 'state': state, 'elapsed': now - started, 'insts': insts}
+            regs, iq, rob = parse_triplet_from_outdir(odir)
+            job.update(regs=regs, iq=iq, rob=rob)
+            if insts is not None:
+                prev = self.history.get(odir)
+                if prev is not None and now > prev[0] and insts > prev[1]:
+                    self.rates[odir] = (insts - prev[1]) / (now - prev[0])
+                if prev is None or insts != prev[1]:
+                    self.history[odir] = (now, insts)
+            job['rate'] = self.rates.get(odir)
+            if insts is not None and ref['simInsts']:
+                job['fraction'] = min(insts / ref['simInsts'], 1.0)
+            elif ref['hostSeconds']:
+                # 没有周期性快照时按耗时估计
+                job['fraction'] = min(job['elapsed'] / ref['hostSeconds'], 1.0)
+            else:
+                job['fraction'] = None
+            jobs.append(job)
+        return {'time': now, 'counts': counts, 'reference': ref, 'jobs': jobs, 'eta': self.eta(jobs, counts, ref)}
+
+    def eta(self, jobs, counts, ref):
+        """剩余秒数：剩余指令数 / 当前并行吞吐量"""
+        total = ref['simInsts']
+        if not total:
+            return None
+        running = [j for j in jobs if j['state'] == 'running']
+        remaining = counts['pending'] * total
+        remaining += sum(total * (1 - (j['fraction'] or 0)) for j in running)
+        live = [j['rate'] for j in running if j['rate']]
+        if live:
+            throughput = sum(live) / len(live) * max(len(running), 1)
+        elif ref['hostInstRate']:
+            throughput = ref['hostInstRate'] * max(len(running), 1)
+        else:
+            return None
+        return remaining / throughput
+
+def format_seconds(sec):
+    if sec is None:
+        return '?'
+    sec = int(sec)
+    return f"{sec // 3600}:{sec % 3600 // 60:02d}:{sec % 60:02d}"
+
+def render(snap):
+    c = snap['counts']
+    total = sum(c.values())
+    lines = [
+        time.strftime('%H:%M:%S', time.localtime(snap['time'])) +
+        f"  完成 {c['done']}/{total}  运行 {c['running']}  等待 {c['pending']}  中止 {c['stale']}"
+        f"  ETA {format_seconds(snap['eta'])}",
+        "",
+        f"{'配置':<24} {'状态':<8} {'已用时':>9} {'指令数':>14} {'完成':>7} {'指令/秒':>12}",
+        "-" * 80,
+    ]
+    for j in snap['jobs']:
+        name = Path(j['outdir']).name
+        insts = f"{j['insts']:,}" if j['insts'] is not None else '-'
+        frac = f"{j['fraction']:.1%}" if j['fraction'] is not None else '-'
+        rate = f"{j['rate']:,.0f}" if j['rate'] else '-'
+        lines.append(f"{name:<24} {j['state']:<8} {format_seconds(j['elapsed']):>9} {insts:>14} {frac:>7} {rate:>12}")
+    return '\n'.join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('out_base', nargs='?', default=os.environ.get('OUT_BASE', 'out'))
+    parser.add_argument('--interval', type=float, default=5.0, help="刷新间隔（秒）")
+    parser.add_argument('--json', action='store_true', help="每次刷新输出一行 JSON")
+    parser.add_argument('--once', action='store_true', help="只输出一次")
+    parser.add_argument('--regs', type=int, nargs='+', default=REGS)
+    parser.add_argument('--iq', type=int, nargs='+', default=IQS)
+    parser.add_argument('--rob', type=int, nargs='+', default=ROBS)
+    args = parser.parse_args()
+
+    grid = [(regs, iq, rob) for regs in args.regs for iq in args.iq for rob in args.rob]
+    monitor = Monitor(args.out_base, grid)
+    try:
+        while True:
+            snap = monitor.snapshot()
+            if args.json:
+                print(json.dumps(snap), flush=True)
+            else:
+                if not args.once:
+                    print("\033[2J\033[H", end='')
+                print(render(snap), flush=True)
+            c = snap['counts']
+            if args.once or c['running'] == 0 and c['pending'] == 0:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+硬件代价 vs. 周期数的 Pareto 前沿（替代 generate_summary_table 只看最快/最慢配置）
+- 代价模型可插拔：COST_MODELS 注册表中的函数接收 O3CPU.py 参数
+  （regs/fregs/iq/rob/lq/sq/width，均为 numpy 数组，未扫描的参数取 O3CPU.py 默认值），
+  返回 {结构: 代价数组}；--cost-model 也可以写成 模块:函数 使用外部模型
+- 内置模型：bits（各结构的存储位数）、area（多端口 RAM/CAM 的一阶面积模型）、
+  power（每次访问能量 × 端口数 × 项数的一阶动态功耗模型）、weighted（design_space.hw_cost，即 explore.py 的加权代价）
+- 前沿：按代价升序、周期数升序排序后一次扫描，O(n log n)，结果库到数万个点也是瞬时的
+- 输出前沿上的配置、各结构代价、相邻两点之间每单位代价换来的周期数减少（边际收益），
+  以及散点 + 前沿图 out/pareto-<模型>.png（见 chart_cache.py）
+用法：python3 pareto.py [数据库路径] [--cost-model area|power|...] [--no-plot]
+"""
+
+import argparse
+import importlib
+import sys
+from pathlib import Path
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from chart_cache import DPI, render_charts
+from design_space import DEFAULTS, SPACE, hw_cost_terms
+from result_store import DEFAULT_DB, open_store
+
+COST_MODELS = {}
+
+def register_cost_model(name):
+    """装饰器：把代价模型登记到 COST_MODELS"""
+    def wrap(fn):
+        COST_MODELS[name] = fn
+        return fn
+    return wrap
+
+def load_cost_model(spec):
+    """注册表中的名字，或 模块:函数"""
+    if spec in COST_MODELS:
+        return COST_MODELS[spec]
+    module, sep, attr = spec.partition(':')
+    if not sep:
+        raise SystemExit(f"未知代价模型: {spec}（可选 {', '.join(COST_MODELS)}，或 模块:函数）")
+    return getattr(importlib.import_module(module), attr)
+
+# 各结构每项的位数：64 位数据 + 标签/状态
+BITS_PER_ENTRY = {
+    'regs': 64,
+    'fregs': 64,
+    'rob': 76,
+    'iq': 96,
+    'lq': 112,
+    'sq': 176,
+}
+# CAM 每位相对 SRAM 位单元的面积（比较器与匹配线）
+CAM_FACTOR = 2.0
+# CAM 搜索时每个标签位相对 SRAM 读一位的能量（匹配线与比较器）
+CAM_SEARCH_FACTOR = 1.5
+# LQ/SQ 地址比较的位数（虚拟地址）
+ADDR_BITS = 48
+
+@register_cost_model('bits')
+def bits_cost(p):
+    """存储位数（KiB）"""
+    return {s: p[s] * bits / 8 / 1024 for s, bits in BITS_PER_ENTRY.items()}
+
+@register_cost_model('area')
+def area_cost(p):
+    """一阶面积模型（单端口 SRAM 位单元为 1）：多端口阵列每个位单元的面积 ∝ 端口数²
+
+    - 寄存器堆：每个发射槽 2 读 1 写
+    - ROB：每周期 width 项写入与提交
+    - IQ/LQ/SQ：CAM，唤醒/地址比较每个端口一条比较线，按 CAM_FACTOR 计入比较器
+    """
+    w = p['width']
+    rf_ports = 3 * w
+    out = {
+        'regs': p['regs'] * BITS_PER_ENTRY['regs'] * rf_ports ** 2,
+        'fregs': p['fregs'] * BITS_PER_ENTRY['fregs'] * rf_ports ** 2,
+        'rob': p['rob'] * BITS_PER_ENTRY['rob'] * (2 * w) ** 2,
+    }
+    for s in ('iq', 'lq', 'sq'):
+        out[s] = p[s] * BITS_PER_ENTRY[s] * CAM_FACTOR * (2 * w) ** 2
+    # 换算成 "KiB 单端口 SRAM 等效面积"
+    return {s: v / 8 / 1024 for s, v in out.items()}
+
+@register_cost_model('power')
+def power_cost(p):
+    """一阶动态功耗模型（每周期，单端口 SRAM 读一位的能量为 1）：Σ 每次访问能量 × 每周期访问次数
+
+    - RAM：每次访问的能量 ∝ 项数 × 每项位数（位线长度与列数）× 端口数（多端口位单元
+      使位线变长），每个端口每周期访问一次，因此为 项数 × 位数 × 端口数²
+    - IQ/LQ/SQ：每周期 width 次搜索，每次比较全部项的标签（IQ 为两个源物理寄存器号，
+      LQ/SQ 为 ADDR_BITS 位地址），匹配线按 CAM_SEARCH_FACTOR 计；命中项的载荷再按 RAM 读写
+    - 假设每个端口每周期都被使用（峰值功耗）；不含漏电，漏电近似与 area 成正比
+    """
+    w = p['width']
+    rf_ports = 3 * w
+    out = {
+        'regs': p['regs'] * BITS_PER_ENTRY['regs'] * rf_ports ** 2,
+        'fregs': p['fregs'] * BITS_PER_ENTRY['fregs'] * rf_ports ** 2,
+        'rob': p['rob'] * BITS_PER_ENTRY['rob'] * (2 * w) ** 2,
+    }
+    tag_bits = {'iq': 2 * np.log2(np.maximum(p['regs'], p['fregs'])), 'lq': ADDR_BITS, 'sq': ADDR_BITS}
+    for s in ('iq', 'lq', 'sq'):
+        search = p[s] * tag_bits[s] * CAM_SEARCH_FACTOR * w * w
+        out[s] = search + p[s] * BITS_PER_ENTRY[s] * w ** 2
+    # 换算成 "每周期 K 次单端口位访问"
+    return {s: v / 1000 for s, v in out.items()}
+
+@register_cost_model('weighted')
+def weighted_cost(p):
+    """explore.py 的 hw_cost 按结构拆开（按 SPACE 的默认候选值归一化），各项之和即 hw_cost"""
+    return hw_cost_terms(p, {k: values for k, (_, values) in SPACE.items()})
+
+def load_runs(db_path):
+    """结果库中的完整仿真（含 explore.py 调节的全部参数）：(参数数组字典, numCycles 数组, 输出目录名列表)"""
+    with open_store(db_path) as store:
+        rows = store.load(['numCycles'], all_params=True)
+    runs = []
+    for row in rows:
+        if any(row[k] is None for k in DEFAULTS) or not row['numCycles']:
+            continue
+        runs.append(({k: row[k] for k in DEFAULTS}, row['numCycles'], Path(row['outdir']).name))
+    params = {k: np.array([r[0][k] for r in runs], dtype=float) for k in DEFAULTS}
+    return params, np.array([r[1] for r in runs], dtype=float), [r[2] for r in runs]
+
+def pareto_front(cost, cycles):
+    """两个目标都越小越好：返回前沿上各点的下标，按代价升序"""
+    order = np.lexsort((cycles, cost))
+    best = np.minimum.accumulate(cycles[order])
+    # 严格优于此前所有更便宜的点才是非支配点
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = cycles[order][1:] < best[:-1]
+    return order[keep]
+
+def marginal_gains(cost, cycles, front):
+    """前沿上相邻两点：每增加一单位代价减少的周期数，以及弹性（周期减少% / 代价增加%）"""
+    c, y = cost[front], cycles[front]
+    dc, dy = np.diff(c), -np.diff(y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        per_cost = np.concatenate([[np.nan], dy / dc])
+        elasticity = np.concatenate([[np.nan], (dy / y[:-1]) / (dc / c[:-1])])
+    return per_cost, elasticity
+
+def draw_pareto(data, path):
+    """散点：全部配置；折线：Pareto 前沿"""
+    cost, cycles, front, names, model = data['cost'], data['cycles'], data['front'], data['names'], data['model']
+    fig, ax = plt.subplots(1, 1, figsize=(10, 6))
+    ax.scatter(cost, cycles, s=14, color='lightgray', label='全部配置')
+    ax.step(cost[front], cycles[front], 'o-', where='post', color='red', linewidth=2, markersize=6,
+            label='Pareto 前沿')
+    for i in front:
+        ax.annotate(names[i], (cost[i], cycles[i]), textcoords="offset points", xytext=(4, 4), fontsize=7)
+    ax.set_xlabel(f'硬件代价（{model}）')
+    ax.set_ylabel('CPU Cycles')
+    ax.set_title('硬件代价与性能的 Pareto 前沿')
+    ax.set_xscale('log')
+    ax.set_yscale('log')
+    ax.grid(True, alpha=0.3)
+    ax.legend()
+    plt.tight_layout()
+    plt.savefig(path, dpi=DPI, bbox_inches='tight')
+    plt.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('db', nargs='?', default=DEFAULT_DB)
+    parser.add_argument('--cost-model', default='area', help=f"{' / '.join(COST_MODELS)} 或 模块:函数")
+    parser.add_argument('--no-plot', action='store_true')
+    args = parser.parse_args()
+
+    model = load_cost_model(args.cost_model)
+    params, cycles, names = load_runs(args.db)
+    if not len(cycles):
+        print("结果库中没有可用的仿真")
+        return 1
+    parts = model(params)
+    cost = sum(parts.values())
+    front = pareto_front(cost, cycles)
+    per_cost, elasticity = marginal_gains(cost, cycles, front)
+
+    print(f"{len(cycles)} 个配置，{len(front)} 个位于 Pareto 前沿（代价模型 {args.cost_model}）\n")
+    structs = list(parts)
+    print(f"{'配置':<26} {'代价':>10} {'CPU Cycles':>12} {'加速比':>7} {'周期/代价':>11} {'弹性':>6}  "
+          + ' '.join(f"{s:>7}" for s in structs))
+    print("-" * (80 + 8 * len(structs)))
+    base = cycles[front[0]]
+    for i, pc, el in zip(front, per_cost, elasticity):
+        gain = f"{pc:>11,.0f}" if pc == pc else f"{'-':>11}"
+        elas = f"{el:>6.2f}" if el == el else f"{'-':>6}"
+        print(f"{names[i]:<26} {cost[i]:>10,.1f} {cycles[i]:>12,.0f} {base / cycles[i]:>6.2f}x {gain} {elas}  "
+              + ' '.join(f"{parts[s][i] / cost[i]:>7.0%}" for s in structs))
+    print("\n周期/代价：与前一个前沿点相比，每增加一单位代价减少的周期数；"
+          "弹性 < 1 表示代价增加的比例大于性能提升的比例")
+
+    if not args.no_plot:
+        name = f"pareto-{args.cost_model.replace(':', '_')}.png"
+        chart = {'cost': cost, 'cycles': cycles, 'front': front, 'names': names, 'model': args.cost_model}
+        status = render_charts([(name, draw_pareto, lambda data: data)], chart, Path(args.db).parent)
+        print(f"\n{name}: {status[name]}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
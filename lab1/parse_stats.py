@@ -1,5 +1,7 @@
 #!/usr/bin/env python3
 import csv
+import json
+import os
 import sys
 from pathlib import Path
 
@@ -7,8 +9,161 @@ from pathlib import Path
 解析递归目录下所有 stats.txt，输出 CSV：
 cols: regs, iq, rob, numCycles, ROBFull, IQFull, FullRegs, outdir
 目录命名约定：.../regs{R}-iq{I}-rob{B}/stats.txt
+
+每个 stats.txt 只顺序读取一遍，所有统计项（标量、向量以及 `::` 分布桶）
+一次性解析为带类型的字典；gem5 不输出从未更新过的统计项，这些项按
+SCHEMA 视为 0，而不是 'NA'。
+
+O3CPU.py 在 daxpy 循环前后（m5_work_begin/m5_work_end）各 dump 一次统计，
+stats.txt 因而包含多个统计块，各块含义记录在同目录的 stats_blocks.json
+中；默认取 ROI 块，没有标签文件时取第一个块。负载没有 ROI 标记时
+（daxpy.riscv 未以 -DGEM5_ROI 编译）只有一个 "full" 块，main 会给出警告。开启周期性统计时另有
+"<阶段>:period" 快照块，ROI 块仍是 "roi" 收尾块（见 timeseries.py）。
+
+解析结果缓存在 <out>/.stats_cache.json 中（以路径 + stats.txt 与
+stats_blocks.json 的 mtime/size 为键），再次运行时只解析新增或发生变化的仿真。
+
+run_sweep.py 另把 gem5 进程的峰值常驻内存写在同目录的 rusage.json 中
+（gem5 自己的 hostMemory 是虚拟内存 VmSize），见 load_host_rusage。
 """
 
+CACHE_NAME = '.stats_cache.json'
+BLOCKS_NAME = 'stats_blocks.json'
+RUSAGE_NAME = 'rusage.json'
+
+# parse_stats_file 的默认块：ROI
+ROI = 'roi'
+
+BEGIN_MARKER = '---------- Begin Simulation Statistics'
+END_MARKER = '---------- End Simulation Statistics'
+
+# summary.csv 列名 -> stats.txt 中的统计项
+METRICS = {
+    'numCycles': 'system.cpu.numCycles',
+    'ROBFull': 'system.cpu.rename.ROBFullEvents',
+    'IQFull': 'system.cpu.rename.IQFullEvents',
+    'FullRegs': 'system.cpu.rename.fullRegistersEvents',
+}
+
+# 已知统计项及其类型；缺失时取该类型的 0
+SCHEMA = {
+    'simSeconds': float,
+    'simTicks': int,
+    'finalTick': int,
+    'simFreq': int,
+    'hostSeconds': float,
+    'hostTickRate': int,
+    'hostMemory': int,
+    'simInsts': int,
+    'simOps': int,
+    'hostInstRate': int,
+    'hostOpRate': int,
+    'system.cpu.numCycles': int,
+    'system.cpu.cpi': float,
+    'system.cpu.ipc': float,
+    'system.cpu.rename.ROBFullEvents': int,
+    'system.cpu.rename.IQFullEvents': int,
+    'system.cpu.rename.LQFullEvents': int,
+    'system.cpu.rename.SQFullEvents': int,
+    'system.cpu.rename.fullRegistersEvents': int,
+}
+
+class Stats(dict):
+    """一个统计块：统计项名 -> int/float，SCHEMA 中的缺失项返回 0"""
+
+    def __missing__(self, key):
+        if key in SCHEMA:
+            return SCHEMA[key](0)
+        raise KeyError(key)
+
+    def vector(self, name):
+        """取出向量/分布统计项的所有分量：{'0': ..., 'mean': ..., 'total': ...}"""
+        prefix = name + '::'
+        n = len(prefix)
+        return {k[n:]: v for k, v in self.items() if k.startswith(prefix)}
+
+def parse_value(tok):
+    """统计值转为 int，带小数点/指数/nan/inf 的转为 float"""
+    try:
+        return int(tok)
+    except ValueError:
+        return float(tok)
+
+def iter_blocks(lines):
+    """流式解析：逐行读取，每遇到一个完整的 Begin/End 块产出一个 Stats"""
+    cur = None
+    for ln in lines:
+        if ln.startswith('-'):
+            if ln.startswith(BEGIN_MARKER):
+                cur = Stats()
+            elif ln.startswith(END_MARKER) and cur is not None:
+                yield cur
+                cur = None
+            continue
+        if cur is None:
+            continue
+        parts = ln.split(None, 2)
+        if len(parts) < 2:
+            continue
+        try:
+            # 与原 extract_metric 一致：同名项取第一次出现的值
+            cur.setdefault(parts[0], parse_value(parts[1]))
+        except ValueError:
+            continue
+
+def load_block_labels(outdir):
+    """O3CPU.py 记录的各统计块标签（full/pre_roi/roi/post_roi），没有则返回 None"""
+    try:
+        with open(Path(outdir) / BLOCKS_NAME, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def roi_block_index(outdir):
+    """ROI 块的序号；未标记 ROI 的仿真只有一个覆盖全程的块"""
+    labels = load_block_labels(outdir)
+    if labels and ROI in labels:
+        return labels.index(ROI)
+    return 0
+
+def has_roi_block(outdir):
+    """是否有 ROI 块；没有时唯一的 "full" 块统计的是包括初始化代码在内的整个程序"""
+    return ROI in (load_block_labels(outdir) or [])
+
+def warn_no_roi(outdirs):
+    """提示哪些仿真没有 ROI 块（负载没有 m5_work_begin/m5_work_end 标记）"""
+    names = sorted(Path(o).name for o in outdirs)
+    if not names:
+        return
+    shown = ', '.join(names[:5]) + (' ...' if len(names) > 5 else '')
+    print(f"[WARN] {len(names)} 个仿真没有 ROI 块（{shown}），统计的是整个程序；"
+          f"daxpy.riscv 需以 -DGEM5_ROI 重新编译（见 run_all.sh）", file=sys.stderr)
+
+def load_host_rusage(outdir):
+    """run_sweep.py 记录的 gem5 进程资源占用：{'hostMaxRss': 峰值常驻内存 KiB}，没有记录时为 {}"""
+    try:
+        with open(Path(outdir) / RUSAGE_NAME, 'r', encoding='utf-8') as f:
+            return {'hostMaxRss': int(json.load(f)['maxrss_kib'])}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+def parse_stats_file(path, block=ROI):
+    """单遍读取 stats.txt，返回第 block 个统计块（默认 ROI 块，不存在时返回空 Stats）"""
+    if block == ROI:
+        block = roi_block_index(Path(path).parent)
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        if block < 0:
+            blocks = list(iter_blocks(f))
+            return blocks[block] if len(blocks) >= -block else Stats()
+        for i, stats in enumerate(iter_blocks(f)):
+            if i == block:
+                return stats
+    return Stats()
+
+def summary_metrics(stats):
+    """按 METRICS 提取 summary.csv 所需的列"""
+    return {col: stats[key] for col, key in METRICS.items()}
+
 def parse_triplet_from_outdir(outdir: Path):
     name = outdir.name
     parts = name.split('-')
@@ -22,32 +177,66 @@ def parse_triplet_from_outdir(outdir: Path):
             d['rob'] = p[len('rob'):]
     return d.get('regs'), d.get('iq'), d.get('rob')
 
-def extract_metric(lines, key):
-    for ln in lines:
-        if ln.startswith(key + '\t') or ln.startswith(key + ' '):
-            parts = ln.split()
-            if len(parts) >= 2:
-                return parts[1]
-    return 'NA'
+def file_signature(path):
+    """缓存键的一部分：(mtime_ns, size)，文件被重写后即失效"""
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+def stats_signature(stats_path):
+    """解析结果的缓存键：stats.txt 与决定取哪个块的 stats_blocks.json 的 (mtime_ns, size)，
+    后者不存在时为 (None, None)"""
+    try:
+        blocks = file_signature(Path(stats_path).parent / BLOCKS_NAME)
+    except FileNotFoundError:
+        blocks = [None, None]
+    return file_signature(stats_path) + blocks
+
+def load_cache(cache_path):
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_cache(cache_path, cache):
+    """先写临时文件再 rename，避免并发读到半个缓存文件"""
+    tmp = f'{cache_path}.{os.getpid()}.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(cache, f)
+    os.replace(tmp, cache_path)
+
+def parse_row(stats_path):
+    outdir = stats_path.parent
+    regs, iq, rob = parse_triplet_from_outdir(outdir)
+    row = {
+        'regs': regs or 'NA',
+        'iq': iq or 'NA',
+        'rob': rob or 'NA',
+    }
+    row.update(summary_metrics(parse_stats_file(stats_path)))
+    row['outdir'] = str(outdir)
+    return row
 
 def main():
     base = Path(sys.argv[1]) if len(sys.argv) > 1 else Path('out')
+    cache_path = base / CACHE_NAME
+    cache = load_cache(cache_path)
+    new_cache = {}
     rows = []
-    for stats in base.rglob('stats.txt'):
-        outdir = stats.parent
-        regs, iq, rob = parse_triplet_from_outdir(outdir)
-        lines = stats.read_text(encoding='utf-8', errors='ignore').splitlines()
-        row = {
-            'regs': regs or 'NA',
-            'iq': iq or 'NA',
-            'rob': rob or 'NA',
-            'numCycles': extract_metric(lines, 'system.cpu.numCycles'),
-            'ROBFull': extract_metric(lines, 'system.cpu.rename.ROBFullEvents'),
-            'IQFull': extract_metric(lines, 'system.cpu.rename.IQFullEvents'),
-            'FullRegs': extract_metric(lines, 'system.cpu.rename.fullRegistersEvents'),
-            'outdir': str(outdir),
-        }
-        rows.append(row)
+    no_roi = []
+    for stats_path in sorted(base.rglob('stats.txt')):
+        if not has_roi_block(stats_path.parent):
+            no_roi.append(stats_path.parent)
+        key = str(stats_path)
+        sig = stats_signature(stats_path)
+        entry = cache.get(key)
+        if entry is None or entry['sig'] != sig:
+            entry = {'sig': sig, 'row': parse_row(stats_path)}
+        new_cache[key] = entry
+        rows.append(entry['row'])
+    if new_cache != cache:
+        save_cache(cache_path, new_cache)
+    warn_no_roi(no_roi)
 
     writer = csv.DictWriter(sys.stdout, fieldnames=list(rows[0].keys()) if rows else [
         'regs','iq','rob','numCycles','ROBFull','IQFull','FullRegs','outdir'])
@@ -57,8 +246,3 @@ def main():
 
 if __name__ == '__main__':
     main()
-
-
-
-
-
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+O3PipeView 流水线轨迹（O3CPU.py --pipeview）的流式分析
+- 逐行读取（支持 .gz），按块向量化统计，内存占用与轨迹大小无关
+- 每一级 fetch→decode→rename→dispatch→issue→complete→retire 的延迟直方图（单位：周期）
+- 按 PC 汇总的热点：提交次数、各级累计周期、被冲刷的次数
+- 结果可保存为 .npz：hist (级数, 桶数)、pcs、counts、cycles (PC 数, 级数)、squashed
+用法：python3 pipeview.py <轨迹>... [--top 10] [--save profile.npz]
+      多个轨迹（例如 regs64-iq4-rob4 与最优配置）并排比较各级平均延迟
+"""
+
+import argparse
+import gzip
+import sys
+
+import numpy as np
+
+STAGES = ['fetch', 'decode', 'rename', 'dispatch', 'issue', 'complete', 'retire']
+# 相邻两级之间的间隔，例如 'dispatch→issue' 即在 IQ 中等待操作数/发射的时间
+INTERVALS = [f'{a}→{b}' for a, b in zip(STAGES, STAGES[1:])]
+_STAGE_INDEX = {name: i for i, name in enumerate(STAGES)}
+
+# 直方图桶：0..MAX_BIN-1 周期，最后一个桶放所有更长的延迟
+MAX_BIN = 512
+CHUNK = 1 << 16
+# 2GHz 时钟下每周期 500 tick
+TICKS_PER_CYCLE = 500
+
+def open_trace(path):
+    if str(path).endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='ignore')
+    return open(path, 'r', encoding='utf-8', errors='ignore')
+
+def iter_instructions(lines):
+    """逐条产出 (pc, 各级 tick 元组, 反汇编)；被冲刷的指令 retire tick 为 0
+
+    每条指令在轨迹中占 7 行，以 O3PipeView:fetch 开头、O3PipeView:retire 结束。
+    """
+    ticks = None
+    pc = disasm = None
+    for ln in lines:
+        if not ln.startswith('O3PipeView:'):
+            continue
+        fields = ln.rstrip('\n').split(':', 6)
+        stage = fields[1]
+        if stage == 'fetch':
+            ticks = [0] * len(STAGES)
+            ticks[0] = int(fields[2])
+            pc = int(fields[3], 16)
+            disasm = fields[6].strip() if len(fields) > 6 else ''
+        elif ticks is not None and stage in _STAGE_INDEX:
+            ticks[_STAGE_INDEX[stage]] = int(fields[2])
+            if stage == 'retire':
+                yield pc, tuple(ticks), disasm
+                ticks = None
+
+def iter_chunks(records, size=CHUNK):
+    """把指令记录攒成 (pcs, ticks) 数组块"""
+    pcs, ticks = [], []
+    for pc, t, _ in records:
+        pcs.append(pc)
+        ticks.append(t)
+        if len(pcs) >= size:
+            yield np.array(pcs, dtype=np.uint64), np.array(ticks, dtype=np.int64)
+            pcs, ticks = [], []
+    if pcs:
+        yield np.array(pcs, dtype=np.uint64), np.array(ticks, dtype=np.int64)
+
+class PipeProfile:
+    """一条轨迹的统计结果"""
+
+    def __init__(self):
+        self.hist = np.zeros((len(INTERVALS), MAX_BIN + 1), dtype=np.int64)
+        self.pcs = np.zeros(0, dtype=np.uint64)
+        self.counts = np.zeros(0, dtype=np.int64)
+        self.cycles = np.zeros((0, len(INTERVALS)), dtype=np.int64)
+        self.squashed = np.zeros(0, dtype=np.int64)
+        self.disasm = {}
+
+    def _pc_rows(self, pcs):
+        """chunk 中每个 PC 在汇总数组中的行号；新 PC 插入后 pcs 仍保持有序"""
+        new = np.setdiff1d(np.unique(pcs), self.pcs, assume_unique=True)
+        if len(new):
+            pcs_all = np.concatenate([self.pcs, new])
+            order = np.argsort(pcs_all)
+            self.pcs = pcs_all[order]
+            self.counts = np.concatenate([self.counts, np.zeros(len(new), np.int64)])[order]
+            self.squashed = np.concatenate([self.squashed, np.zeros(len(new), np.int64)])[order]
+            self.cycles = np.concatenate([self.cycles, np.zeros((len(new), len(INTERVALS)), np.int64)])[order]
+        return np.searchsorted(self.pcs, pcs)
+
+    def add_chunk(self, pcs, ticks, ticks_per_cycle=TICKS_PER_CYCLE):
+        rows = self._pc_rows(pcs)
+        retired = ticks[:, -1] > 0
+        np.add.at(self.squashed, rows[~retired], 1)
+        ticks, rows = ticks[retired], rows[retired]
+        lat = np.diff(ticks, axis=1) // ticks_per_cycle
+        np.add.at(self.counts, rows, 1)
+        np.add.at(self.cycles, rows, lat)
+        binned = np.clip(lat, 0, MAX_BIN)
+        for s in range(len(INTERVALS)):
+            self.hist[s] += np.bincount(binned[:, s], minlength=MAX_BIN + 1)
+
+    @classmethod
+    def from_trace(cls, path, ticks_per_cycle=TICKS_PER_CYCLE):
+        prof = cls()
+
+        def records(lines):
+            # 同时记下每个 PC 第一次出现时的反汇编（静态代码量很小）
+            for rec in iter_instructions(lines):
+                prof.disasm.setdefault(rec[0], rec[2])
+                yield rec
+
+        with open_trace(path) as f:
+            for pcs, ticks in iter_chunks(records(f)):
+                prof.add_chunk(pcs, ticks, ticks_per_cycle)
+        return prof
+
+    @property
+    def retired(self):
+        return int(self.counts.sum())
+
+    def mean(self):
+        """各级平均延迟（周期）"""
+        n = self.hist.sum(axis=1)
+        return (self.hist @ np.arange(MAX_BIN + 1)) / np.maximum(n, 1)
+
+    def percentile(self, q):
+        """由直方图得到各级延迟的 q 分位数（周期，超过 MAX_BIN 的按 MAX_BIN 计）"""
+        cdf = np.cumsum(self.hist, axis=1)
+        target = cdf[:, -1:] * q / 100
+        return np.argmax(cdf >= np.maximum(target, 1), axis=1)
+
+    def hotspots(self, n=10, interval=None):
+        """累计周期最多的 n 个 PC（interval 为 INTERVALS 中的一项时只按该级排序）"""
+        total = self.cycles.sum(axis=1) if interval is None else self.cycles[:, INTERVALS.index(interval)]
+        order = np.argsort(total)[::-1][:n]
+        return [(int(self.pcs[i]), int(self.counts[i]), int(total[i]), self.cycles[i], int(self.squashed[i]))
+                for i in order]
+
+    def save(self, path):
+        np.savez_compressed(path, hist=self.hist, pcs=self.pcs, counts=self.counts,
+                            cycles=self.cycles, squashed=self.squashed)
+
+def print_profile(name, prof, top):
+    print(f"=== {name}: 提交 {prof.retired:,} 条，冲刷 {int(prof.squashed.sum()):,} 条 ===")
+    print(f"{'阶段':<20} {'平均':>8} {'p50':>6} {'p90':>6} {'p99':>6}")
+    mean, p50, p90, p99 = prof.mean(), prof.percentile(50), prof.percentile(90), prof.percentile(99)
+    for s, label in enumerate(INTERVALS):
+        print(f"{label:<20} {mean[s]:>8.2f} {p50[s]:>6} {p90[s]:>6} {p99[s]:>6}")
+    print("\n热点 PC（按 fetch→retire 累计周期）:")
+    print(f"{'PC':>12} {'次数':>10} {'累计周期':>14} {'平均':>8} {'IQ 等待':>8} {'冲刷':>8}  指令")
+    for pc, count, total, cycles, squashed in prof.hotspots(top):
+        wait = cycles[INTERVALS.index('dispatch→issue')] / max(count, 1)
+        print(f"{pc:>#12x} {count:>10,} {total:>14,} {total / max(count, 1):>8.1f} {wait:>8.1f} "
+              f"{squashed:>8,}  {prof.disasm.get(pc, '')}")
+    print()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('traces', nargs='+')
+    parser.add_argument('--top', type=int, default=10, help="显示的热点 PC 数")
+    parser.add_argument('--ticks-per-cycle', type=int, default=TICKS_PER_CYCLE)
+    parser.add_argument('--save', default=None, help="把（第一个）轨迹的统计保存为 .npz")
+    args = parser.parse_args()
+
+    profiles = [PipeProfile.from_trace(t, args.ticks_per_cycle) for t in args.traces]
+    for path, prof in zip(args.traces, profiles):
+        print_profile(path, prof, args.top)
+    if len(profiles) > 1:
+        print(f"{'各级平均延迟':<20}" + ''.join(f"{i:>12}" for i in range(len(profiles))))
+        means = [p.mean() for p in profiles]
+        for s, name in enumerate(INTERVALS):
+            print(f"{name:<20}" + ''.join(f"{m[s]:>12.2f}" for m in means))
+    if args.save:
+        profiles[0].save(args.save)
+        print(f"已保存 {args.save}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+内容寻址的仿真结果缓存
+缓存键 = sha256(完整解析后的配置 config.json + 负载二进制 + gem5 可执行文件
+                + O3CPU.py 脚本与运行模式参数)
+目录名 regs{R}-iq{I}-rob{B} 只用于展示；修改缓存大小、重新编译负载或升级
+gem5 都会得到新的键，从而强制重新仿真，而任何扫描中完全相同的请求都直接
+从缓存取结果。
+布局：<cache>/<key[:2]>/<key>/{stats.txt, stats_blocks.json, ..., key.json}
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+from pathlib import Path
+
+from parse_stats import RUSAGE_NAME, file_signature
+
+# 随结果一起缓存/取出的文件
+CACHE_FILES = ('stats.txt', 'stats_blocks.json', 'sampling.json', 'config.json', 'config.ini', RUSAGE_NAME)
+KEY_NAME = 'key.json'
+# 输出目录中记录结果来源的文件
+OUTDIR_KEY_NAME = 'cache_key'
+HASHES_NAME = 'file_hashes.json'
+
+# config.json 中只跟调用方式有关、不影响仿真结果的字段
+VOLATILE_KEYS = {'cmd', 'executable', 'cwd'}
+
+def canonical_config(config_json):
+    """去掉路径类字段后按键排序序列化，同一配置在任何目录下结果相同"""
+    def strip(obj):
+        if isinstance(obj, dict):
+            return {k: strip(v) for k, v in obj.items() if k not in VOLATILE_KEYS}
+        if isinstance(obj, list):
+            return [strip(v) for v in obj]
+        return obj
+    with open(config_json, 'r', encoding='utf-8') as f:
+        cfg = json.load(f)
+    return json.dumps(strip(cfg), sort_keys=True, separators=(',', ':'))
+
+class ResultCache:
+    """以内容哈希为键的仿真结果目录"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._hashes_path = self.root / HASHES_NAME
+        self._lock = threading.Lock()
+
+    def file_hash(self, path):
+        """大文件（gem5.opt）的 sha256，按 路径+mtime+size 记忆，避免每次重算"""
+        with self._lock:
+            return self._file_hash(path)
+
+    def _file_hash(self, path):
+        path = str(Path(path).resolve())
+        sig = file_signature(path)
+        try:
+            with open(self._hashes_path, 'r', encoding='utf-8') as f:
+                memo = json.load(f)
+        except (OSError, ValueError):
+            memo = {}
+        entry = memo.get(path)
+        if entry and entry['sig'] == sig:
+            return entry['sha256']
+        h = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                h.update(chunk)
+        memo[path] = {'sig': sig, 'sha256': h.hexdigest()}
+        tmp = f'{self._hashes_path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(memo, f)
+        os.replace(tmp, self._hashes_path)
+        return memo[path]['sha256']
+
+    def key(self, config_json, binary, gem5_bin, o3conf, mode_args):
+        """计算缓存键，返回 (键, 参与计算的各部分)"""
+        inputs = {
+            'config': hashlib.sha256(canonical_config(config_json).encode()).hexdigest(),
+            'binary': self.file_hash(binary),
+            'gem5': self.file_hash(gem5_bin),
+            'o3conf': self.file_hash(o3conf),
+            'mode': list(mode_args),
+        }
+        blob = json.dumps(inputs, sort_keys=True).encode()
+        return hashlib.sha256(blob).hexdigest(), inputs
+
+    def entry_dir(self, key):
+        return self.root / key[:2] / key
+
+    def lookup(self, key):
+        """命中返回缓存目录，否则返回 None"""
+        d = self.entry_dir(key)
+        if (d / KEY_NAME).exists() and (d / 'stats.txt').exists():
+            return d
+        return None
+
+    def store(self, key, inputs, outdir):
+        """把一次完成的仿真放进缓存（先写临时目录再 rename，并发写入同一键时保留先到者）"""
+        d = self.entry_dir(key)
+        if not self.lookup(key):
+            d.parent.mkdir(parents=True, exist_ok=True)
+            tmp = Path(tempfile.mkdtemp(prefix='.tmp-', dir=d.parent))
+            for name in CACHE_FILES:
+                src = Path(outdir) / name
+                if src.exists():
+                    shutil.copy2(src, tmp / name)
+            with open(tmp / KEY_NAME, 'w', encoding='utf-8') as f:
+                json.dump({'key': key, 'inputs': inputs}, f, indent=1)
+            try:
+                os.rename(tmp, d)
+            except OSError:
+                shutil.rmtree(tmp, ignore_errors=True)
+        (Path(outdir) / OUTDIR_KEY_NAME).write_text(key + '\n')
+        return d
+
+    def materialize(self, key, outdir):
+        """把缓存结果复制到输出目录，替换其中的旧结果"""
+        src = self.lookup(key)
+        outdir = Path(outdir)
+        outdir.mkdir(parents=True, exist_ok=True)
+        for name in CACHE_FILES:
+            if (src / name).exists():
+                shutil.copy2(src / name, outdir / name)
+            elif (outdir / name).exists():
+                (outdir / name).unlink()
+        (outdir / OUTDIR_KEY_NAME).write_text(key + '\n')
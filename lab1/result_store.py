@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+仿真结果库（SQLite，仅依赖Python标准库）
+- runs 表：每次仿真一行（以解析后的绝对路径为键，相对/绝对路径打开同一个库不会重复），
+  按 (regs, iq, rob) 建索引，支持点查询
+- stats 表：按 (统计项, run) 聚簇存放每次仿真的全部统计项，按列扫描无需再解析 stats.txt
+- runs.inferred 标出 run_sweep.py --prune 推断（未仿真）的点，load 默认不返回这些行
+- runs 还记录 explore.py 调节的其余参数（fregs/lq/sq/width，NULL 表示 O3CPU.py 默认值）
+  与截断仿真的指令数 max_insts；load 默认只返回完整仿真、且其余参数都是默认值的行，
+  这样按 (regs, iq, rob) 分析时每个点只对应一个设计
+- 记录每个 stats.txt 及其 stats_blocks.json 的 mtime/size，重复建库时只重新解析新增或变化的仿真，
+  并删除 stats.txt 已不存在的仿真；open_store 每次打开都这样同步一遍
+用法：python3 result_store.py [out目录] [数据库路径]
+"""
+
+import sqlite3
+import sys
+from pathlib import Path
+
+from design_space import DEFAULTS, parse_outdir
+from parse_stats import METRICS, SCHEMA, load_host_rusage, parse_stats_file, stats_signature
+
+DEFAULT_DB = Path(__file__).resolve().parent / 'out' / 'results.db'
+
+PARAMS = ('regs', 'iq', 'rob')
+# explore.py 另外调节的参数
+EXTRA_PARAMS = ('fregs', 'lq', 'sq', 'width')
+
+_SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS runs (
+    run_id INTEGER PRIMARY KEY,
+    outdir TEXT UNIQUE NOT NULL,
+    regs INTEGER,
+    iq INTEGER,
+    rob INTEGER,
+    stats_mtime_ns INTEGER,
+    stats_size INTEGER,
+    blocks_mtime_ns INTEGER,
+    blocks_size INTEGER,
+    inferred INTEGER NOT NULL DEFAULT 0,
+    fregs INTEGER,
+    lq INTEGER,
+    sq INTEGER,
+    width INTEGER,
+    max_insts INTEGER
+);
+CREATE INDEX IF NOT EXISTS runs_config ON runs (regs, iq, rob);
+CREATE TABLE IF NOT EXISTS stat_names (
+    stat_id INTEGER PRIMARY KEY,
+    name TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS stats (
+    stat_id INTEGER NOT NULL,
+    run_id INTEGER NOT NULL,
+    value,
+    PRIMARY KEY (stat_id, run_id)
+) WITHOUT ROWID;
+"""
+
+# 后来新增的 runs 列：(列名, 类型)
+_RUNS_COLUMNS = [
+    ('stats_mtime_ns', 'INTEGER'),
+    ('stats_size', 'INTEGER'),
+    ('blocks_mtime_ns', 'INTEGER'),
+    ('blocks_size', 'INTEGER'),
+    ('inferred', 'INTEGER NOT NULL DEFAULT 0'),
+    ('fregs', 'INTEGER'),
+    ('lq', 'INTEGER'),
+    ('sq', 'INTEGER'),
+    ('width', 'INTEGER'),
+    ('max_insts', 'INTEGER'),
+]
+
+# load/lookup 默认的筛选：真正仿真过的完整仿真，其余参数为默认值
+_MEASURED = "r.inferred = 0 AND r.max_insts IS NULL"
+_DEFAULT_EXTRAS = ' AND '.join(f"r.{p} IS NULL" for p in EXTRA_PARAMS)
+
+def resolve_column(col):
+    """列名既可以是 summary.csv 的简写（numCycles），也可以是完整统计项名"""
+    return METRICS.get(col, col)
+
+def run_key(outdir):
+    """runs.outdir 的取值：解析后的绝对路径，同一输出目录的不同写法对应同一行"""
+    return str(Path(outdir).resolve())
+
+def default_value(col):
+    """缺失统计项的取值：SCHEMA 中的项为 0，其余为 None"""
+    key = resolve_column(col)
+    return SCHEMA[key](0) if key in SCHEMA else None
+
+class ResultStore:
+    """所有分析脚本共用的结果库"""
+
+    def __init__(self, path=DEFAULT_DB):
+        self.path = Path(path)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.executescript(_SCHEMA_SQL)
+        self._migrate()
+
+    def _migrate(self):
+        """为旧版本建立的库补齐新增的列，并把旧版本记下的相对路径改为绝对路径"""
+        have = {r[1] for r in self.conn.execute("PRAGMA table_info(runs)")}
+        for col, decl in _RUNS_COLUMNS:
+            if col not in have:
+                self.conn.execute(f"ALTER TABLE runs ADD COLUMN {col} {decl}")
+        if 'inferred' not in have:
+            # 旧库中没有 stats.txt 的行只可能是推断点
+            self.conn.execute("UPDATE runs SET inferred = 1 WHERE stats_mtime_ns IS NULL")
+        if 'max_insts' not in have:
+            # 旧库只记了 (regs, iq, rob)：按目录名补上其余参数与截断标记
+            for outdir, in list(self.conn.execute("SELECT outdir FROM runs")):
+                self.conn.execute(
+                    "UPDATE runs SET " + ', '.join(f"{c} = ?" for c in EXTRA_PARAMS + ('max_insts',))
+                    + " WHERE outdir = ?", self._extra_values(*parse_outdir(outdir)) + [outdir])
+        self.conn.commit()
+        self._absolutize()
+
+    def _absolutize(self):
+        """旧版本按调用时的写法记录 outdir（out/regs64-... 与 /.../out/regs64-... 各占一行）：
+        相对路径依次按当前目录、库所在目录及其上一级解析，找到存在的目录后改写；
+        改写后与已有行重复或找不到目录的行直接删除（open_store 会按 stats.txt 重新写入）"""
+        relative = [r for r, in self.conn.execute("SELECT outdir FROM runs") if not Path(r).is_absolute()]
+        if not relative:
+            return
+        db_dir = self.path.resolve().parent
+        have = {r for r, in self.conn.execute("SELECT outdir FROM runs")}
+        drop = []
+        with self.conn:
+            for rel in relative:
+                found = next((run_key(d / rel) for d in (Path.cwd(), db_dir, db_dir.parent)
+                              if (d / rel).is_dir()), None)
+                if found is None or found in have:
+                    drop.append(rel)
+                    continue
+                self.conn.execute("UPDATE runs SET outdir = ? WHERE outdir = ?", (found, rel))
+                have.add(found)
+        self.forget(drop, resolve=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _stat_ids(self, names):
+        """统计项名 -> stat_id，不存在的名字会被登记"""
+        cur = self.conn.cursor()
+        cur.executemany("INSERT OR IGNORE INTO stat_names (name) VALUES (?)", ((n,) for n in names))
+        ids = {}
+        for name, stat_id in cur.execute("SELECT name, stat_id FROM stat_names"):
+            ids[name] = stat_id
+        return ids
+
+    @staticmethod
+    def _extra_values(params, insts):
+        """fregs/lq/sq/width（默认值记为 NULL）与 max_insts 列的取值"""
+        return [int(params[p]) if params.get(p) not in (None, DEFAULTS[p]) else None
+                for p in EXTRA_PARAMS] + [insts]
+
+    def ingest(self, outdir, stats, params=None, sig=None, inferred=False, insts=None):
+        """写入（或覆盖）一次仿真的全部统计项；sig 为 parse_stats.stats_signature 的结果，
+        inferred 表示统计项是从另一个配置推断来的（没有真正仿真）
+
+        params 为空时按目录名解析全部参数与截断仿真的指令数（见 design_space.parse_outdir），
+        否则 insts 为截断仿真的指令数（完整仿真为 None）。
+        """
+        outdir = Path(run_key(outdir))
+        if params is None:
+            params, insts = parse_outdir(outdir)
+        values = [int(params[p]) if params.get(p) is not None else None for p in PARAMS]
+        values += self._extra_values(params, insts)
+        sig = list(sig) if sig is not None else [None] * 4
+        cols = PARAMS + EXTRA_PARAMS + ('max_insts', 'stats_mtime_ns', 'stats_size', 'blocks_mtime_ns',
+                                        'blocks_size', 'inferred')
+        with self.conn:
+            self.conn.execute(
+                f"INSERT INTO runs (outdir, {', '.join(cols)}) VALUES ({', '.join('?' * (len(cols) + 1))}) "
+                "ON CONFLICT (outdir) DO UPDATE SET " + ', '.join(f"{c} = excluded.{c}" for c in cols),
+                [str(outdir)] + values + sig + [int(inferred)])
+            run_id = self.conn.execute("SELECT run_id FROM runs WHERE outdir = ?", (str(outdir),)).fetchone()[0]
+            ids = self._stat_ids(stats.keys())
+            self.conn.execute("DELETE FROM stats WHERE run_id = ?", (run_id,))
+            self.conn.executemany(
+                "INSERT INTO stats (stat_id, run_id, value) VALUES (?, ?, ?)",
+                ((ids[name], run_id, value) for name, value in stats.items()))
+        return run_id
+
+    def ingest_tree(self, base):
+        """扫描 base 下所有 stats.txt，只解析新增或变化的文件，返回写入的仿真数
+
+        base 下 stats.txt 已被删除的仿真同时从库中删除；没有 stats.txt 的记录
+        （推断点，见 run_sweep.py --prune）只在输出目录整个消失后删除。
+        """
+        base = Path(run_key(base))
+        known = {rec[0]: list(rec[1:]) for rec in self.conn.execute(
+            "SELECT outdir, stats_mtime_ns, stats_size, blocks_mtime_ns, blocks_size FROM runs")}
+        seen = set()
+        n = 0
+        for stats_path in base.rglob('stats.txt'):
+            outdir = run_key(stats_path.parent)
+            seen.add(outdir)
+            sig = stats_signature(stats_path)
+            if known.get(outdir) == sig:
+                continue
+            stats = parse_stats_file(stats_path)
+            stats.update(load_host_rusage(stats_path.parent))
+            self.ingest(stats_path.parent, stats, sig=sig)
+            n += 1
+        self.forget(outdir for outdir, sig in known.items()
+                    if outdir not in seen and base in Path(outdir).parents
+                    and (sig[0] is not None or not Path(outdir).is_dir()))
+        return n
+
+    def forget(self, outdirs, resolve=True):
+        """删除若干仿真及其全部统计项"""
+        with self.conn:
+            for outdir in outdirs:
+                if resolve:
+                    outdir = run_key(outdir)
+                self.conn.execute("DELETE FROM stats WHERE run_id IN (SELECT run_id FROM runs WHERE outdir = ?)",
+                                  (outdir,))
+                self.conn.execute("DELETE FROM runs WHERE outdir = ?", (outdir,))
+
+    def load(self, columns, include_inferred=False, all_params=False, **where):
+        """按列读取：返回 [{regs, iq, rob, col1, col2, ...}]，可用 regs=256 等参数过滤
+
+        默认只返回真正仿真过的行；include_inferred=True 时也返回推断点，
+        并在每行加上 inferred 标记。截断仿真（max_insts）从不返回。
+        默认只返回 fregs/lq/sq/width 都是默认值的行；all_params=True 时返回全部
+        完整仿真，每行另带这些参数（默认值已填上）。
+        """
+        keys = [resolve_column(c) for c in columns]
+        ids = dict(self.conn.execute(
+            "SELECT name, stat_id FROM stat_names WHERE name IN (%s)" % ','.join('?' * len(keys)), keys))
+        select = ["r.outdir", "r.inferred"] + ["r." + p for p in PARAMS + EXTRA_PARAMS]
+        args = []
+        for key in keys:
+            select.append("(SELECT value FROM stats s WHERE s.stat_id = ? AND s.run_id = r.run_id)")
+            args.append(ids.get(key, -1))
+        conds = ["r.max_insts IS NULL"] if include_inferred else [_MEASURED]
+        if not all_params:
+            conds.append(_DEFAULT_EXTRAS)
+        for p, v in where.items():
+            if p not in PARAMS:
+                raise ValueError(f"未知的配置参数: {p}")
+            conds.append(f"r.{p} = ?")
+            args.append(v)
+        sql = "SELECT " + ', '.join(select) + " FROM runs r"
+        if conds:
+            sql += " WHERE " + ' AND '.join(conds)
+        sql += " ORDER BY r.regs, r.iq, r.rob"
+
+        rows = []
+        for rec in self.conn.execute(sql, args):
+            row = {'outdir': rec[0]}
+            if include_inferred:
+                row['inferred'] = bool(rec[1])
+            row.update(zip(PARAMS, rec[2:2 + len(PARAMS)]))
+            if all_params:
+                row.update((p, DEFAULTS[p] if v is None else v)
+                           for p, v in zip(EXTRA_PARAMS, rec[2 + len(PARAMS):]))
+            for col, value in zip(columns, rec[2 + len(PARAMS) + len(EXTRA_PARAMS):]):
+                row[col] = default_value(col) if value is None else value
+            rows.append(row)
+        return rows
+
+    def lookup(self, columns=None, **params):
+        """点查询，例如 lookup(regs=256, iq=64, rob=64)；columns 为空时返回全部统计项"""
+        conds = ' AND '.join(f"{p} = ?" for p in params)
+        if any(p not in PARAMS for p in params):
+            raise ValueError(f"未知的配置参数: {sorted(set(params) - set(PARAMS))}")
+        rec = self.conn.execute(
+            f"SELECT run_id FROM runs r WHERE {_MEASURED} AND {_DEFAULT_EXTRAS}"
+            + (" AND " + conds if conds else "") + " LIMIT 1",
+            list(params.values())).fetchone()
+        if rec is None:
+            return None
+        if columns is not None:
+            return self.load(columns, **params)[0]
+        return dict(self.conn.execute(
+            "SELECT n.name, s.value FROM stats s JOIN stat_names n USING (stat_id) WHERE s.run_id = ?",
+            rec))
+
+    def column(self, col):
+        """整列扫描：{(regs, iq, rob): value}"""
+        return {tuple(r[p] for p in PARAMS): r[col] for r in self.load([col])}
+
+def open_store(path=DEFAULT_DB):
+    """打开结果库，并与所在目录下的 stats.txt 同步（只解析新增或变化的文件）"""
+    store = ResultStore(path)
+    store.ingest_tree(store.path.parent)
+    return store
+
+def load_data(db_path=DEFAULT_DB, columns=tuple(METRICS)):
+    """分析脚本共用：配置参数完整的仿真行（只读取 columns 列），numCycles 为 0 时记为 None"""
+    with open_store(db_path) as store:
+        rows = store.load(list(columns))
+    data = []
+    for row in rows:
+        if any(row[p] is None for p in PARAMS):
+            continue
+        if 'numCycles' in row:
+            row['numCycles'] = row['numCycles'] or None
+        data.append(row)
+    return data
+
+def main():
+    base = Path(sys.argv[1]) if len(sys.argv) > 1 else Path('out')
+    db = Path(sys.argv[2]) if len(sys.argv) > 2 else base / 'results.db'
+    with ResultStore(db) as store:
+        n = store.ingest_tree(base)
+    print(f"已更新 {n} 个仿真结果 -> {db}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+扫描结果的 numpy 张量：values[统计项][regs 下标, iq 下标, rob 下标]
+- 各轴的取值为排序后的坐标 coords，缺失的仿真为 NaN（numCycles 为 0 也视为缺失），mask 标出有效点
+- 固定若干轴取切片（sel）、沿某一轴的加速比（speedup）、每一步的平均边际效应（marginal）、
+  最好/最差配置（best/worst）都是对整个张量的一次向量化运算，网格到数万个点也是瞬时的
+- analyze_results.py、generate_tables.py 共用；simple_analysis.py 保持只依赖标准库
+用法：python3 results_tensor.py [数据库路径]   # 输出各轴每一步的平均加速比
+"""
+
+import sys
+
+import numpy as np
+
+from parse_stats import METRICS
+from result_store import DEFAULT_DB, PARAMS, open_store
+
+DEFAULT_METRICS = list(METRICS)
+# 主指标：为 0 或缺失的点不算有效仿真
+PRIMARY = 'numCycles'
+
+class ResultsTensor:
+    def __init__(self, axes, coords, values):
+        self.axes = tuple(axes)
+        self.coords = [np.asarray(c) for c in coords]
+        self.values = values
+
+    @classmethod
+    def from_rows(cls, rows, metrics=DEFAULT_METRICS, axes=PARAMS):
+        """由 ResultStore.load / summary 行构造；配置参数不全的行被忽略"""
+        rows = [r for r in rows if all(r.get(a) is not None for a in axes)]
+        params = np.array([[r[a] for a in axes] for r in rows], dtype=np.int64).reshape(len(rows), len(axes))
+        coords = [np.unique(params[:, k]) for k in range(len(axes))]
+        index = tuple(np.searchsorted(coords[k], params[:, k]) for k in range(len(axes)))
+        shape = tuple(len(c) for c in coords)
+        values = {}
+        for m in metrics:
+            arr = np.full(shape, np.nan)
+            arr[index] = np.array([np.nan if r.get(m) is None else r[m] for r in rows], dtype=float)
+            if m == PRIMARY:
+                arr[arr == 0] = np.nan
+            values[m] = arr
+        return cls(axes, coords, values)
+
+    @classmethod
+    def from_store(cls, db_path=DEFAULT_DB, metrics=DEFAULT_METRICS):
+        with open_store(db_path) as store:
+            return cls.from_rows(store.load(metrics), metrics)
+
+    def __getitem__(self, metric):
+        return self.values[metric]
+
+    def __len__(self):
+        return int(self.mask.sum())
+
+    @property
+    def shape(self):
+        return tuple(len(c) for c in self.coords)
+
+    @property
+    def mask(self):
+        """有效仿真点"""
+        return np.isfinite(self.values[PRIMARY])
+
+    def take(self, metrics):
+        """只保留部分统计项（须包含主指标）"""
+        return ResultsTensor(self.axes, self.coords, {m: self.values[m] for m in metrics})
+
+    def axis(self, name):
+        return self.axes.index(name)
+
+    def sel(self, **fixed):
+        """固定若干轴取切片，例如 sel(regs=256, rob=64) 得到只剩 iq 轴的张量；
+        坐标中没有的取值得到全部缺失的切片"""
+        index = []
+        missing = False
+        for name, c in zip(self.axes, self.coords):
+            if name not in fixed:
+                index.append(slice(None))
+                continue
+            hit = np.flatnonzero(c == fixed[name])
+            missing |= len(hit) == 0
+            index.append(int(hit[0]) if len(hit) else 0)
+        keep = [k for k, name in enumerate(self.axes) if name not in fixed]
+        shape = [len(self.coords[k]) for k in keep]
+        values = {m: np.full(shape, np.nan) if missing else arr[tuple(index)] for m, arr in self.values.items()}
+        return ResultsTensor([self.axes[k] for k in keep], [self.coords[k] for k in keep], values)
+
+    def speedup(self, axis, metric=PRIMARY, base='prev'):
+        """沿 axis 的加速比（数值越小越好时 >1 为提升）
+
+        base='prev'：相对该轴上前一个取值，第一个位置为 NaN；
+        base='first'：相对该轴上第一个有效点（generate_tables.py 的"基线"）。
+        """
+        k = self.axis(axis)
+        arr = self.values[metric]
+        if base == 'prev':
+            out = np.full_like(arr, np.nan)
+            head = [slice(None)] * arr.ndim
+            tail = [slice(None)] * arr.ndim
+            head[k], tail[k] = slice(1, None), slice(None, -1)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                out[tuple(head)] = arr[tuple(tail)] / arr[tuple(head)]
+            return out
+        valid = np.isfinite(arr)
+        first = np.expand_dims(np.argmax(valid, axis=k), k)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.take_along_axis(arr, first, axis=k) / arr
+
+    def marginal(self, axis, metric=PRIMARY):
+        """沿 axis 每一步（coords[i-1] -> coords[i]）在其余各轴上的几何平均加速比与有效样本数"""
+        k = self.axis(axis)
+        ratio = np.moveaxis(self.speedup(axis, metric), k, 0)[1:].reshape(len(self.coords[k]) - 1, -1)
+        valid = np.isfinite(ratio) & (ratio > 0)
+        logs = np.where(valid, np.log(np.where(valid, ratio, 1)), 0)
+        n = valid.sum(axis=1)
+        with np.errstate(invalid='ignore'):
+            return np.exp(logs.sum(axis=1) / n), n
+
+    def rows(self, flat_index=None, metrics=None):
+        """把若干点（展平下标，默认全部有效点）转成 [{regs, iq, rob, 统计项...}]"""
+        if flat_index is None:
+            flat_index = np.flatnonzero(self.mask)
+        metrics = list(self.values) if metrics is None else metrics
+        index = np.unravel_index(flat_index, self.shape)
+        cols = [c[i] for c, i in zip(self.coords, index)]
+        vals = [self.values[m].ravel()[flat_index] for m in metrics]
+        return [dict(zip(self.axes + tuple(metrics), map(_scalar, rec))) for rec in zip(*cols, *vals)]
+
+    def best(self, n=1, metric=PRIMARY):
+        """metric 最小的 n 个有效点"""
+        flat = self.values[metric].ravel()
+        valid = np.flatnonzero(np.isfinite(flat))
+        return self.rows(valid[np.argsort(flat[valid], kind='stable')][:n])
+
+    def worst(self, n=1, metric=PRIMARY):
+        """metric 最大的 n 个有效点"""
+        flat = self.values[metric].ravel()
+        valid = np.flatnonzero(np.isfinite(flat))
+        return self.rows(valid[np.argsort(-flat[valid], kind='stable')][:n])
+
+def _scalar(v):
+    """numpy 标量 -> int/float，便于格式化输出"""
+    v = v.item()
+    return int(v) if isinstance(v, float) and v.is_integer() else v
+
+def main():
+    db = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_DB
+    tensor = ResultsTensor.from_store(db)
+    print(f"{len(tensor)} 个有效仿真，网格 " + ' × '.join(f"{a}{c.tolist()}" for a, c in zip(tensor.axes, tensor.coords)))
+    for axis, coords in zip(tensor.axes, tensor.coords):
+        ratio, n = tensor.marginal(axis)
+        print(f"\n{axis} 每一步的几何平均加速比（{PRIMARY}）:")
+        for a, b, r, cnt in zip(coords, coords[1:], ratio, n):
+            print(f"  {a:>5} -> {b:<5} {r:>8.3f}x  ({cnt} 组)")
+
+if __name__ == '__main__':
+    main()
@@ -2,57 +2,46 @@
 
 set -euo pipefail
 
+# daxpy.riscv 必须带 ROI 标记（m5_work_begin/m5_work_end）编译，否则 stats.txt
+# 只有一个包括初始化代码在内的 "full" 块（run_sweep.py 与 parse_stats.py 会警告）：
+#   (cd /opt/gem5/util/m5 && scons riscv.CROSS_COMPILE=riscv64-linux-gnu- build/riscv/out/m5)
+#   riscv64-linux-gnu-g++ -O2 -static -DGEM5_ROI -I/opt/gem5/include -o daxpy.riscv daxpy.cpp \
+#     /opt/gem5/util/m5/build/riscv/out/libm5.a
+
 # 配置项（可根据需要覆盖）
 GEM5_BIN=${GEM5_BIN:-/opt/gem5/build/RISCV/gem5.opt}
 O3CONF=${O3CONF:-/lab1/O3CPU.py}
 CMD_BIN=${CMD_BIN:-/lab1/daxpy.riscv}
 OUT_BASE=${OUT_BASE:-/lab1/out}
+# 并行度、单任务超时（秒，0 表示不限制）与重试次数
+JOBS=${JOBS:-$(nproc)}
+TIMEOUT=${TIMEOUT:-0}
+RETRIES=${RETRIES:-1}
 
-mkdir -p "${OUT_BASE}"
+if ! grep -qa m5_work_begin "${CMD_BIN}"; then
+  echo "[WARN] ${CMD_BIN} 中没有 m5_work_begin，可能未以 -DGEM5_ROI 编译（见本脚本开头）" >&2
+fi
 
 declare -a REGS=(64 256 1024)
 declare -a IQS=(4 16 64 256)
 declare -a ROBS=(4 16 64 256)
 
-summary_tmp=$(mktemp)
-echo "regs,iq,rob,numCycles,ROBFull,IQFull,FullRegs" > "${OUT_BASE}/summary.csv"
-
-for regs in "${REGS[@]}"; do
-  for iq in "${IQS[@]}"; do
-    for rob in "${ROBS[@]}"; do
-      odir="${OUT_BASE}/regs${regs}-iq${iq}-rob${rob}"
-      stats="${odir}/stats.txt"
-      
-      # 跳过已完成的组合
-      if [ -f "${stats}" ]; then
-        echo "[SKIP] regs=${regs} iq=${iq} rob=${rob} -> already exists" >&2
-        numCycles=$(grep '^system.cpu.numCycles' "${stats}" | awk '{print $2}' || echo "NA")
-        robFull=$(grep '^system.cpu.rename.ROBFullEvents' "${stats}" | awk '{print $2}' || echo "NA")
-        iqFull=$(grep '^system.cpu.rename.IQFullEvents' "${stats}" | awk '{print $2}' || echo "NA")
-        fullRegs=$(grep '^system.cpu.rename.fullRegistersEvents' "${stats}" | awk '{print $2}' || echo "NA")
-        echo "${regs},${iq},${rob},${numCycles:-NA},${robFull:-NA},${iqFull:-NA},${fullRegs:-NA}" >> "${OUT_BASE}/summary.csv"
-        continue
-      fi
-      
-      mkdir -p "${odir}"
-      echo "[RUN] regs=${regs} iq=${iq} rob=${rob} -> ${odir}" >&2
-      "${GEM5_BIN}" -d "${odir}" \
-        "${O3CONF}" \
-        --cmd="${CMD_BIN}" \
-        --num-phys-int-regs="${regs}" \
-        --num-iq-entries="${iq}" \
-        --num-rob-entries="${rob}"
-
-      numCycles=$(grep '^system.cpu.numCycles' "${stats}" | awk '{print $2}' || echo "NA")
-      robFull=$(grep '^system.cpu.rename.ROBFullEvents' "${stats}" | awk '{print $2}' || echo "NA")
-      iqFull=$(grep '^system.cpu.rename.IQFullEvents' "${stats}" | awk '{print $2}' || echo "NA")
-      fullRegs=$(grep '^system.cpu.rename.fullRegistersEvents' "${stats}" | awk '{print $2}' || echo "NA")
-      echo "${regs},${iq},${rob},${numCycles:-NA},${robFull:-NA},${iqFull:-NA},${fullRegs:-NA}" >> "${OUT_BASE}/summary.csv"
-    done
-  done
-done
-
-echo "Done. Summary at: ${OUT_BASE}/summary.csv" >&2
-
-
-
+declare -a EXTRA=()
+if [ "${TIMEOUT}" != "0" ]; then
+  EXTRA+=(--timeout "${TIMEOUT}")
+fi
+
+# 实际的调度、跳过与 summary.csv 写入由 run_sweep.py 完成，
+# 额外的命令行参数（如 --roi-checkpoint）原样传给它
+exec python3 "$(dirname "$0")/run_sweep.py" \
+  --gem5-bin "${GEM5_BIN}" \
+  --o3conf "${O3CONF}" \
+  --cmd-bin "${CMD_BIN}" \
+  --out-base "${OUT_BASE}" \
+  --jobs "${JOBS}" \
+  --retries "${RETRIES}" \
+  --regs "${REGS[@]}" \
+  --iq "${IQS[@]}" \
+  --rob "${ROBS[@]}" \
+  ${EXTRA[@]+"${EXTRA[@]}"} \
+  "$@"
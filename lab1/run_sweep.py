@@ -0,0 +1,562 @@
+#!/usr/bin/env python3
+"""
+并行、可断点续跑的 gem5 参数扫描脚本（替代 run_all.sh 中的串行循环）
+- 使用有界进程池同时运行多个 O3CPU.py 仿真
+- 每个任务支持超时与重试
+- 已完成的组合直接跳过（与 run_all.sh 的 [SKIP] 分支一致）
+- 每完成一个任务即原子地重写 summary.csv，不会留下半截的 NA 行
+- --roi-checkpoint：先用 atomic CPU 快进到 daxpy 循环并保存一次检查点，
+  之后每个 O3 配置都从该检查点恢复，跳过初始化阶段
+- --sample-period：采样仿真，summary 中的计数器为 sampling.py 外推的估计值
+- --batch-size：一个 gem5 进程只实例化、快进到 ROI 一次，再 fork 出各配置的 O3 仿真，
+  分摊启动、实例化与初始化阶段的开销（不能与 --sample-period 同用）
+- 按 --mem-budget 与 -j 分派任务：由结果库的 hostMaxRss/hostSeconds 预测
+  每个任务的内存与时长，长任务优先（LPT）；hostMaxRss 是每个 gem5 进程
+  （os.wait4）的峰值常驻内存，记录在输出目录的 rusage.json 中
+- --cache-dir：按内容哈希（config.json、负载、gem5、运行模式）缓存结果，
+  不再凭目录名判断是否已完成
+- --prune：按各轴的停顿计数器识别饱和点并推断被支配的组合（见 saturation_source）
+- 完成的仿真同时写入结果库 out/results.db（见 result_store.py）
+- 仿真没有 ROI 块（daxpy.riscv 未以 -DGEM5_ROI 编译，只测到整个程序）时给出警告
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
+
+from parse_stats import (METRICS, RUSAGE_NAME, has_roi_block, load_block_labels, load_host_rusage,
+                         parse_stats_file, stats_signature, summary_metrics, warn_no_roi)
+from result_cache import ResultCache
+from result_store import ResultStore
+from sampling import estimated_stats
+
+REGS = [64, 256, 1024]
+IQS = [4, 16, 64, 256]
+ROBS = [4, 16, 64, 256]
+
+SUMMARY_FIELDS = ['regs', 'iq', 'rob'] + list(METRICS)
+
+STATS_END_MARKER = '---------- End Simulation Statistics'
+
+# 每个扫描轴对应的停顿计数器，顺序与 (regs, iq, rob) 一致
+SATURATION_STATS = (METRICS['FullRegs'], METRICS['IQFull'], METRICS['ROBFull'])
+INFERRED_NAME = 'inferred.json'
+
+# ru_maxrss 与 hostMemory 的单位都是 KiB（见 bench_host.py）
+KIB_PER_GIB = 2 ** 20
+# 结果库为空时的单任务预测
+DEFAULT_JOB_MEMORY = 2.3 * KIB_PER_GIB
+DEFAULT_JOB_SECONDS = 60.0
+# 检查超时与取消的间隔（秒）
+CANCEL_POLL_SECONDS = 0.2
+
+
+def outdir_for(out_base, regs, iq, rob):
+    """组合对应的输出目录：regs{R}-iq{I}-rob{B}"""
+    return Path(out_base) / f'regs{regs}-iq{iq}-rob{rob}'
+
+
+def is_complete(stats_path):
+    """stats.txt 已写完：块数与 stats_blocks.json 记录的一致（旧版输出只有一个块）"""
+    try:
+        with open(stats_path, 'r', encoding='utf-8', errors='ignore') as f:
+            n = sum(1 for ln in f if ln.startswith(STATS_END_MARKER))
+    except OSError:
+        return False
+    labels = load_block_labels(Path(stats_path).parent)
+    if labels is None:
+        return n >= 1
+    return n >= 1 and len(labels) == n
+
+
+def summary_row(regs, iq, rob, stats):
+    """summary.csv 的一行"""
+    row = {'regs': regs, 'iq': iq, 'rob': rob}
+    row.update(summary_metrics(stats))
+    return row
+
+
+def axis_predecessors(cfg, axes):
+    """各轴上紧邻的更小取值对应的组合：[(轴序号, 组合)]"""
+    preds = []
+    for a, values in enumerate(axes):
+        i = values.index(cfg[a])
+        if i > 0:
+            preds.append((a, cfg[:a] + (values[i - 1],) + cfg[a + 1:]))
+    return preds
+
+
+def saturation_source(cfg, axes, done):
+    """可以代替 cfg 的已有结果：某轴前驱的该轴停顿计数器为 0 时返回该前驱
+
+    结构从未因满而停顿（ROBFullEvents / IQFullEvents / fullRegistersEvents
+    为 0）时，把它继续加大不会改变流水线行为，沿该轴更大的点结果相同；
+    推断出的点计数器同样为 0，因此饱和会沿轴一直传递下去。
+    """
+    for a, pred in axis_predecessors(cfg, axes):
+        stats = done.get(pred)
+        if stats is not None and stats[SATURATION_STATS[a]] == 0:
+            return pred
+    return None
+
+
+def available_memory_kib():
+    """/proc/meminfo 中的 MemAvailable（KiB），无法读取时返回 None（不限制）"""
+    try:
+        with open('/proc/meminfo', 'r') as f:
+            for ln in f:
+                if ln.startswith('MemAvailable:'):
+                    return int(ln.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+class JobCostModel:
+    """按结果库中已有仿真的 hostMaxRss / hostSeconds 预测任务的内存与时长
+
+    同一配置直接取历史值；否则取 log2(regs, iq, rob) 空间中最近的
+    NEIGHBORS 个配置按距离倒数加权平均。没有 rusage.json 的旧结果退回
+    hostMemory（VmSize，偏大但不会超出预算）。
+    """
+
+    NEIGHBORS = 3
+
+    def __init__(self, store):
+        self.known = [((r['regs'], r['iq'], r['rob']), r['hostMaxRss'] or r['hostMemory'], r['hostSeconds'])
+                      for r in store.load(['hostMaxRss', 'hostMemory', 'hostSeconds'])
+                      if r['regs'] is not None and (r['hostMaxRss'] or r['hostMemory']) and r['hostSeconds']]
+
+    def predict(self, cfg):
+        """(内存 KiB, 时长秒)"""
+        if not self.known:
+            return DEFAULT_JOB_MEMORY, DEFAULT_JOB_SECONDS
+        point = [math.log2(v) for v in cfg]
+        near = sorted((math.dist(point, [math.log2(v) for v in known]), mem, sec)
+                      for known, mem, sec in self.known)[:self.NEIGHBORS]
+        if near[0][0] == 0:
+            return near[0][1], near[0][2]
+        weights = [1 / d for d, _, _ in near]
+        total = sum(weights)
+        return (sum(w * m for w, (_, m, _) in zip(weights, near)) / total,
+                sum(w * s for w, (_, _, s) in zip(weights, near)) / total)
+
+    def seconds(self, cfg):
+        return self.predict(cfg)[1]
+
+    def batch(self, configs):
+        """一个批次：各配置依次运行，内存取最大值，时长相加"""
+        preds = [self.predict(cfg) for cfg in configs]
+        return max(m for m, _ in preds), sum(s for _, s in preds)
+
+    def total_seconds(self, configs):
+        return sum(self.seconds(cfg) for cfg in configs)
+
+    def makespan(self, configs, jobs):
+        """按时长降序依次分给最早空闲的核（LPT）时的预计完成时间（不计内存限制）"""
+        slots = [0.0] * max(1, jobs)
+        for sec in sorted(map(self.seconds, configs), reverse=True):
+            slots[slots.index(min(slots))] += sec
+        return max(slots)
+
+
+def checkpoint_dir(args):
+    return Path(args.out_base) / 'roi-checkpoint'
+
+
+def gem5_command(args, regs, iq, rob, odir):
+    """构造单次仿真的 gem5 命令行"""
+    cmd = [
+        args.gem5_bin, '-d', str(odir),
+        args.o3conf,
+        f'--cmd={args.cmd_bin}',
+        f'--num-phys-int-regs={regs}',
+        f'--num-iq-entries={iq}',
+        f'--num-rob-entries={rob}',
+    ]
+    return cmd + common_options(args)
+
+
+def batch_command(args, configs, out_base):
+    """一个 gem5 进程仿真多个配置，各自输出到 out_base/regs{R}-iq{I}-rob{B}"""
+    cmd = [
+        args.gem5_bin, '-d', str(out_base),
+        args.o3conf,
+        f'--cmd={args.cmd_bin}',
+        '--configs=' + ','.join(f'{regs}:{iq}:{rob}' for regs, iq, rob in configs),
+    ]
+    return cmd + common_options(args)
+
+
+def common_options(args):
+    """单配置与批量命令共用的 O3CPU.py 选项"""
+    cmd = []
+    if args.roi_checkpoint:
+        cmd.append(f'--checkpoint-dir={checkpoint_dir(args)}')
+    if args.sample_period:
+        cmd += [
+            f'--sample-period={args.sample_period}',
+            f'--sample-warmup={args.sample_warmup}',
+            f'--sample-detail={args.sample_detail}',
+        ]
+    if args.stats_period_insts:
+        cmd.append(f'--stats-period-insts={args.stats_period_insts}')
+    return cmd
+
+
+def load_run_stats(args, odir):
+    """单次仿真的统计：采样仿真取外推值，否则取 ROI 块"""
+    if args.sample_period:
+        stats = estimated_stats(odir)
+    else:
+        stats = parse_stats_file(odir / 'stats.txt')
+    stats.update(load_host_rusage(odir))
+    return stats
+
+
+def take_checkpoint(args):
+    """快进到 ROI 并保存检查点（已存在则跳过），成功返回 True"""
+    ckpt = checkpoint_dir(args)
+    if (ckpt / 'm5.cpt').exists():
+        print("[SKIP] ROI checkpoint -> already exists", file=sys.stderr)
+        return True
+    odir = Path(args.out_base) / 'roi-checkpoint-run'
+    odir.mkdir(parents=True, exist_ok=True)
+    cmd = [
+        args.gem5_bin, '-d', str(odir),
+        args.o3conf,
+        f'--cmd={args.cmd_bin}',
+        '--take-checkpoint',
+        f'--checkpoint-dir={ckpt}',
+    ]
+    if args.fast_forward:
+        cmd.append(f'--fast-forward={args.fast_forward}')
+    print(f"[RUN] ROI checkpoint -> {ckpt}", file=sys.stderr)
+    with open(odir / 'run.log', 'w') as log:
+        proc = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT)
+    if proc.returncode != 0 or not (ckpt / 'm5.cpt').exists():
+        print(f"[FAIL] ROI checkpoint: exit code {proc.returncode}, see {odir / 'run.log'}", file=sys.stderr)
+        return False
+    return True
+
+
+def mode_args(args):
+    """影响仿真结果、但不体现在 config.json 中的运行模式"""
+    mode = [f'roi_checkpoint={args.roi_checkpoint}', f'fast_forward={args.fast_forward}']
+    if args.sample_period:
+        mode += [f'sample={args.sample_period}:{args.sample_warmup}:{args.sample_detail}']
+    if args.stats_period_insts:
+        mode += [f'stats_period_insts={args.stats_period_insts}']
+    if args.batch_size > 1:
+        # 批量模式下 ROI 之前由 atomic CPU 快进，ROI 从功能预热后的状态开始
+        mode += ['batch=fork_at_roi']
+    return mode
+
+
+def run_gem5(args, todo, out_base, extra, attempt=None, what='RUN', cancel=None):
+    """为 todo 中的组合启动一次 gem5（一个组合为单次仿真，多个为 --configs 批量），返回结束原因
+
+    cancel（threading.Event）被置位时立即杀掉 gem5。
+    """
+    suffix = f" (attempt {attempt})" if attempt else ''
+    if len(todo) == 1:
+        odir = outdir_for(out_base, *todo[0])
+        odir.mkdir(parents=True, exist_ok=True)
+        cmd = gem5_command(args, *todo[0], odir) + extra
+        log_path = odir / 'run.log'
+        print(f"[{what}] regs={todo[0][0]} iq={todo[0][1]} rob={todo[0][2]} -> {odir}{suffix}",
+              file=sys.stderr)
+    else:
+        cmd = batch_command(args, todo, out_base) + extra
+        log_path = Path(out_base) / 'logs' / ('batch-' + outdir_for('', *todo[0]).name + '.log')
+        log_path.parent.mkdir(parents=True, exist_ok=True)
+        print(f"[{what}] batch of {len(todo)}: " + ' '.join(outdir_for('', *c).name for c in todo)
+              + suffix, file=sys.stderr)
+    timeout = args.timeout * len(todo) if args.timeout else None
+    with open(log_path, 'w') as log:
+        proc = subprocess.Popen(cmd, stdout=log, stderr=subprocess.STDOUT)
+        status, maxrss, killed = wait_with_rusage(proc, timeout, cancel)
+    if what != 'PROBE':
+        for cfg in todo:
+            odir = outdir_for(out_base, *cfg)
+            if odir.is_dir():
+                with open(odir / RUSAGE_NAME, 'w', encoding='utf-8') as f:
+                    json.dump({'maxrss_kib': maxrss}, f)
+    if killed == 'timeout':
+        return f"timeout after {timeout}s"
+    if killed == 'cancel':
+        return "cancelled"
+    return f"exit code {status}"
+
+
+def wait_with_rusage(proc, timeout=None, cancel=None):
+    """等待 gem5 结束，返回 (退出码, 峰值常驻内存 KiB, 被杀掉的原因 'timeout'/'cancel' 或 None)
+
+    os.wait4 只取这一个子进程（含它 fork 并回收的批量子进程）的 rusage，
+    与其他线程中同时运行的仿真互不干扰；超时或 cancel 被置位时由后台线程杀掉进程。
+    """
+    exited = threading.Event()
+    killed = []
+
+    def watch():
+        deadline = time.monotonic() + timeout if timeout else None
+        while not exited.wait(CANCEL_POLL_SECONDS):
+            if cancel is not None and cancel.is_set():
+                killed.append('cancel')
+            elif deadline is not None and time.monotonic() >= deadline:
+                killed.append('timeout')
+            else:
+                continue
+            proc.kill()
+            return
+
+    watcher = threading.Thread(target=watch, daemon=True)
+    watcher.start()
+    try:
+        _, status, usage = os.wait4(proc.pid, 0)
+    finally:
+        exited.set()
+        watcher.join()
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    return proc.returncode, usage.ru_maxrss, killed[0] if killed else None
+
+
+def cache_keys(args, cache, configs):
+    """只生成配置（--config-only）并计算每个组合的缓存键：{组合: (键, 输入)}"""
+    probe_base = Path(args.out_base) / '.probe'
+    run_gem5(args, configs, probe_base, ['--config-only'], what='PROBE')
+    keys = {}
+    for cfg in configs:
+        config_json = outdir_for(probe_base, *cfg) / 'config.json'
+        if config_json.exists():
+            keys[cfg] = cache.key(config_json, args.cmd_bin, args.gem5_bin, args.o3conf, mode_args(args))
+    return keys
+
+
+def run_job(args, configs, cache=None, cancel=None):
+    """运行一批组合（含重试），返回 {组合: 解析后的统计块}，失败的组合为 None
+
+    一批只有一个组合时就是普通的单次仿真；多个组合时用 O3CPU.py --configs
+    在同一个 gem5 进程中完成，重试时只重跑尚未完成的组合。
+    启用结果缓存时先按缓存键查找，命中的组合直接从缓存取结果。
+    cancel（threading.Event）被置位时杀掉正在运行的 gem5，不再重试。
+    """
+    results = {}
+    todo = list(configs)
+    keys = {}
+    if cache is not None:
+        keys = cache_keys(args, cache, todo)
+        for cfg, (key, _) in keys.items():
+            if cache.lookup(key):
+                odir = outdir_for(args.out_base, *cfg)
+                print(f"[CACHE] regs={cfg[0]} iq={cfg[1]} rob={cfg[2]} -> {key[:12]}", file=sys.stderr)
+                cache.materialize(key, odir)
+                results[cfg] = load_run_stats(args, odir)
+                todo.remove(cfg)
+    for attempt in range(1, args.retries + 2):
+        if not todo or (cancel is not None and cancel.is_set()):
+            break
+        reason = run_gem5(args, todo, args.out_base, [], attempt, cancel=cancel)
+        for cfg in list(todo):
+            odir = outdir_for(args.out_base, *cfg)
+            if is_complete(odir / 'stats.txt'):
+                if cfg in keys:
+                    cache.store(*keys[cfg], odir)
+                results[cfg] = load_run_stats(args, odir)
+                todo.remove(cfg)
+            else:
+                print(f"[FAIL] regs={cfg[0]} iq={cfg[1]} rob={cfg[2]}: {reason}", file=sys.stderr)
+    for cfg in todo:
+        results[cfg] = None
+    return results
+
+
+def write_summary_atomic(path, rows, fields=SUMMARY_FIELDS):
+    """先写临时文件再 rename，保证 summary.csv 任何时刻都是完整的"""
+    path = Path(path)
+    fd, tmp = tempfile.mkstemp(prefix='.summary-', suffix='.csv', dir=path.parent)
+    try:
+        with os.fdopen(fd, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=fields)
+            writer.writeheader()
+            for r in rows:
+                writer.writerow(r)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--gem5-bin', default=os.environ.get('GEM5_BIN', '/opt/gem5/build/RISCV/gem5.opt'))
+    parser.add_argument('--o3conf', default=os.environ.get('O3CONF', '/lab1/O3CPU.py'))
+    parser.add_argument('--cmd-bin', default=os.environ.get('CMD_BIN', '/lab1/daxpy.riscv'))
+    parser.add_argument('--out-base', default=os.environ.get('OUT_BASE', '/lab1/out'))
+    parser.add_argument('-j', '--jobs', type=int, default=int(os.environ.get('JOBS', os.cpu_count() or 1)),
+                        help="同时运行的 gem5 进程数")
+    parser.add_argument('--mem-budget', type=float, default=float(os.environ.get('MEM_BUDGET', 0)) or None,
+                        help="同时运行的仿真可用的内存（GiB，默认取 MemAvailable）")
+    parser.add_argument('--timeout', type=float, default=None, help="单个任务的超时时间（秒）")
+    parser.add_argument('--retries', type=int, default=1, help="失败后的重试次数")
+    parser.add_argument('--cache-dir', default=os.environ.get('RESULT_CACHE'),
+                        help="内容寻址结果缓存目录（默认不启用）")
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help="每个 gem5 进程仿真的组合数（超时按组合数放大）")
+    parser.add_argument('--roi-checkpoint', action='store_true',
+                        help="所有配置从 daxpy 循环起点的检查点恢复")
+    parser.add_argument('--fast-forward', type=int, default=0,
+                        help="生成检查点时按指令数快进，而不是停在 m5_work_begin")
+    parser.add_argument('--sample-period', type=int, default=0,
+                        help="采样仿真：每个采样单元的指令数（0 表示完整仿真）")
+    parser.add_argument('--sample-warmup', type=int, default=2000)
+    parser.add_argument('--sample-detail', type=int, default=1000)
+    parser.add_argument('--stats-period-insts', type=int, default=0,
+                        help="每隔这么多条指令记录一次统计快照（见 timeseries.py）")
+    parser.add_argument('--prune', action='store_true',
+                        help="沿各轴传播饱和：前驱点停顿计数器为 0 时直接推断，不再仿真")
+    parser.add_argument('--regs', type=int, nargs='+', default=REGS)
+    parser.add_argument('--iq', type=int, nargs='+', default=IQS)
+    parser.add_argument('--rob', type=int, nargs='+', default=ROBS)
+    args = parser.parse_args(argv)
+    if args.batch_size > 1 and args.sample_period:
+        parser.error("--batch-size 不能与 --sample-period 同用")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    out_base = Path(args.out_base)
+    out_base.mkdir(parents=True, exist_ok=True)
+    summary_path = out_base / 'summary.csv'
+
+    if args.roi_checkpoint and not take_checkpoint(args):
+        return 1
+
+    grid = [(regs, iq, rob) for regs in args.regs for iq in args.iq for rob in args.rob]
+    axes = [sorted(set(args.regs)), sorted(set(args.iq)), sorted(set(args.rob))]
+    fields = SUMMARY_FIELDS + ['inferred_from'] if args.prune else SUMMARY_FIELDS
+    results = {}
+    done = {}
+    failed = []
+    inferred = []
+    no_roi = []
+    write_summary_atomic(summary_path, [], fields)
+    store = ResultStore(out_base / 'results.db')
+
+    def record(cfg, stats, source=None):
+        done[cfg] = stats
+        if stats is None:
+            failed.append(cfg)
+            return
+        odir = outdir_for(out_base, *cfg)
+        if source is None:
+            store.ingest(odir, stats, sig=stats_signature(odir / 'stats.txt'))
+            # 采样仿真只有 "sample" 块，本来就没有 ROI 块
+            if not args.sample_period and not has_roi_block(odir):
+                no_roi.append(odir)
+        else:
+            odir.mkdir(parents=True, exist_ok=True)
+            with open(odir / INFERRED_NAME, 'w', encoding='utf-8') as f:
+                json.dump({'from': str(outdir_for(out_base, *source))}, f)
+            store.ingest(odir, stats, inferred=True)
+        results[cfg] = summary_row(*cfg, stats)
+        if args.prune:
+            results[cfg]['inferred_from'] = outdir_for('', *source).name if source else ''
+        write_summary_atomic(summary_path, [results[c] for c in grid if c in results], fields)
+
+    cache = ResultCache(args.cache_dir) if args.cache_dir else None
+
+    # 跳过已完成的组合（启用缓存时改由缓存键判断）
+    pending = []
+    for cfg in grid:
+        odir = outdir_for(out_base, *cfg)
+        if cache is None and is_complete(odir / 'stats.txt'):
+            print(f"[SKIP] regs={cfg[0]} iq={cfg[1]} rob={cfg[2]} -> already exists", file=sys.stderr)
+            record(cfg, load_run_stats(args, odir))
+        else:
+            pending.append(cfg)
+
+    def ready(cfg):
+        """--prune 时按波前推进：各轴前驱都有结果后才决定仿真还是推断"""
+        return not args.prune or all(p in done for _, p in axis_predecessors(cfg, axes))
+
+    size = max(1, args.batch_size)
+    costs = JobCostModel(store)
+    mem_budget = args.mem_budget * KIB_PER_GIB if args.mem_budget else available_memory_kib()
+    jobs = max(1, args.jobs)
+    print(f"[PLAN] {len(pending)} jobs, predicted {costs.total_seconds(pending):,.0f} s of simulation, "
+          f"~{costs.makespan(pending, jobs):,.0f} s on {jobs} cores, memory budget "
+          + (f"{mem_budget / KIB_PER_GIB:.1f} GiB" if mem_budget else "unlimited"), file=sys.stderr)
+
+    futures = {}
+    queue = []          # 待分派的 (预测内存, 预测时长, 批次)
+    running_mem = 0
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while pending or futures or queue:
+            runnable = []
+            for cfg in list(pending):
+                if not ready(cfg):
+                    continue
+                pending.remove(cfg)
+                source = saturation_source(cfg, axes, done) if args.prune else None
+                if source is not None:
+                    print(f"[INFER] regs={cfg[0]} iq={cfg[1]} rob={cfg[2]} <- {outdir_for('', *source).name}",
+                          file=sys.stderr)
+                    inferred.append(cfg)
+                    record(cfg, done[source], source)
+                else:
+                    runnable.append(cfg)
+            # 长任务先组批、先分派（LPT），缩短整个扫描的完成时间
+            runnable.sort(key=costs.seconds, reverse=True)
+            for i in range(0, len(runnable), size):
+                batch = runnable[i:i + size]
+                queue.append(costs.batch(batch) + (batch,))
+            queue.sort(key=lambda q: q[1], reverse=True)
+            for item in list(queue):
+                if len(futures) >= jobs:
+                    break
+                mem, _, batch = item
+                # 放不下时跳过，后面较小的任务可能还放得下；没有任务在运行时总是放行
+                if futures and mem_budget and running_mem + mem > mem_budget:
+                    continue
+                queue.remove(item)
+                running_mem += mem
+                futures[pool.submit(run_job, args, batch, cache)] = (batch, mem)
+            if not futures:
+                continue  # 本轮只有推断，继续推进波前
+            finished, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for fut in finished:
+                batch, mem = futures.pop(fut)
+                running_mem -= mem
+                try:
+                    batch_results = fut.result()
+                except Exception as e:
+                    print(f"[FAIL] {' '.join(outdir_for('', *c).name for c in batch)}: {e}", file=sys.stderr)
+                    batch_results = dict.fromkeys(batch)
+                for cfg, stats in batch_results.items():
+                    record(cfg, stats)
+
+    store.close()
+    warn_no_roi(no_roi)
+    print(f"Done. Summary at: {summary_path} ({len(results)}/{len(grid)} ok, {len(inferred)} inferred)",
+          file=sys.stderr)
+    if failed:
+        for regs, iq, rob in failed:
+            print(f"  failed: regs={regs} iq={iq} rob={rob}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
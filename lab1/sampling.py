@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+采样仿真（O3CPU.py --sample-period）结果分析
+把 stats.txt 中每个 "sample" 统计块（一个详细仿真测量窗口）的 CPI
+汇总为全程 CPI / 周期数估计值及其置信区间
+用法：python3 sampling.py <输出目录>... [--confidence 0.95]
+"""
+
+import argparse
+import json
+import math
+from pathlib import Path
+from statistics import NormalDist, mean, stdev
+
+from parse_stats import METRICS, Stats, iter_blocks, load_block_labels
+
+SAMPLING_NAME = 'sampling.json'
+SAMPLE_LABEL = 'sample'
+INSTS_KEY = 'system.cpu.commitStats0.numInsts'
+
+def load_sampling(outdir):
+    """O3CPU.py 写出的采样参数，非采样仿真返回 None"""
+    try:
+        with open(Path(outdir) / SAMPLING_NAME, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+def load_samples(outdir):
+    """按 stats_blocks.json 取出所有测量窗口的统计块"""
+    labels = load_block_labels(outdir) or []
+    with open(Path(outdir) / 'stats.txt', 'r', encoding='utf-8', errors='ignore') as f:
+        return [b for label, b in zip(labels, iter_blocks(f)) if label == SAMPLE_LABEL]
+
+def window_insts(block, info):
+    """测量窗口实际提交的指令数（O3 每周期可提交多条，可能略多于 --sample-detail）"""
+    return block.get(INSTS_KEY) or info['detail']
+
+def estimate(outdir, confidence=0.95):
+    """全程 CPI 与周期数的估计值，附带置信区间半宽和相对误差"""
+    info = load_sampling(outdir)
+    samples = load_samples(outdir)
+    if info is None or not samples:
+        raise ValueError(f"{outdir} 中没有采样窗口")
+    cpis = [b['system.cpu.numCycles'] / window_insts(b, info) for b in samples]
+    n = len(cpis)
+    cpi = mean(cpis)
+    sd = stdev(cpis) if n > 1 else 0.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    half = z * sd / math.sqrt(n)
+    total = info['total_insts']
+    return {
+        'samples': n,
+        'cpi': cpi,
+        'cpi_stdev': sd,
+        'cpi_ci': half,
+        'rel_error': half / cpi if cpi else float('nan'),
+        'total_insts': total,
+        'cycles': cpi * total,
+        'cycles_ci': half * total,
+    }
+
+def estimated_stats(outdir):
+    """把测量窗口外推为全程统计：summary 用到的计数器按 总指令数/采样指令数 放大"""
+    info = load_sampling(outdir)
+    samples = load_samples(outdir)
+    if info is None or not samples:
+        raise ValueError(f"{outdir} 中没有采样窗口")
+    sampled = sum(window_insts(b, info) for b in samples)
+    scale = info['total_insts'] / sampled
+    stats = Stats()
+    for key in METRICS.values():
+        stats[key] = int(round(sum(b[key] for b in samples) * scale))
+    stats['simInsts'] = info['total_insts']
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('outdirs', nargs='+')
+    parser.add_argument('--confidence', type=float, default=0.95)
+    args = parser.parse_args()
+
+    print(f"{'输出目录':<40} {'窗口':>5} {'CPI':>8} {'±CI':>8} {'相对误差':>8} {'估计周期数':>14}")
+    print("-" * 90)
+    for outdir in args.outdirs:
+        try:
+            e = estimate(outdir, args.confidence)
+        except ValueError as err:
+            print(f"{outdir:<40} {err}")
+            continue
+        print(f"{outdir:<40} {e['samples']:>5} {e['cpi']:>8.4f} {e['cpi_ci']:>8.4f} "
+              f"{e['rel_error']:>8.2%} {e['cycles']:>14,.0f}")
+
+if __name__ == '__main__':
+    main()
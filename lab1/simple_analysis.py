@@ -4,27 +4,9 @@ gem5 O3 CPU 仿真结果简单分析脚本
 仅使用Python标准库进行数据分析
 """
 
-import csv
 import sys
 
-def load_data(csv_path):
-    """加载仿真结果数据"""
-    data = []
-    with open(csv_path, 'r') as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                row['regs'] = int(row['regs'])
-                row['iq'] = int(row['iq'])
-                row['rob'] = int(row['rob'])
-                row['numCycles'] = int(row['numCycles']) if row['numCycles'] != 'NA' else None
-                row['ROBFull'] = int(row['ROBFull']) if row['ROBFull'] != 'NA' else 0
-                row['IQFull'] = int(row['IQFull']) if row['IQFull'] != 'NA' else 0
-                row['FullRegs'] = int(row['FullRegs']) if row['FullRegs'] != 'NA' else 0
-                data.append(row)
-            except ValueError:
-                continue
-    return data
+from result_store import DEFAULT_DB, load_data
 
 def analyze_iq_impact(data):
     """分析 IQ 条目数对性能的影响"""
@@ -176,10 +158,9 @@ def generate_summary_table(data):
 
 def main():
     """主函数"""
-    csv_path = '/Users/lianglihang/Downloads/ComputerArchitecture/lab1/out/summary.csv'
     
     # 加载数据
-    data = load_data(csv_path)
+    data = load_data(DEFAULT_DB)
     
     if not data:
         print("无法加载数据")
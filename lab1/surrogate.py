@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+基于结果库的代理模型：预测未仿真配置的 numCycles 与停顿计数
+- 在 log2(regs, iq, rob) 空间上做高斯过程回归（ARD 平方指数核），
+  目标取 log1p，预测值附带标准差与置信区间
+- 超参数在一组候选长度尺度/噪声上按边际似然批量选取，训练只需毫秒级；
+  同一配置的多次仿真先取平均，核矩阵对角线加 JITTER，仍不正定的候选超参数被跳过
+- 预测对任意多个配置一次性向量化计算
+- 报告各目标的留一法误差；误差超过 --max-loo-error 的目标不参与排名，也不输出预测值
+- 报告不确定度最高、值得真正仿真的配置
+用法：
+  python3 surrogate.py 128 32 64 [512 8 32 ...]   预测指定配置（regs iq rob 三个一组）
+  python3 surrogate.py --suggest 5 [--target IQFull]  在 2 的幂网格上列出最值得仿真的配置
+  python3 surrogate.py --validate                  留一法交叉验证误差
+"""
+
+import argparse
+import itertools
+from statistics import NormalDist
+
+import numpy as np
+
+from result_store import DEFAULT_DB, PARAMS, open_store
+
+TARGETS = ['numCycles', 'ROBFull', 'IQFull', 'FullRegs']
+
+# 超参数候选：归一化输入空间中的长度尺度、log1p 目标的噪声方差（相对信号方差）
+LENGTH_SCALES = [0.25, 0.5, 1.0, 2.0, 4.0]
+NOISE_LEVELS = [1e-6, 1e-4, 1e-2]
+# 加到核矩阵对角线上的数值扰动（相对信号方差），距离很近的配置也能做 Cholesky
+JITTER = 1e-8
+# 默认的留一法误差上限：超过时该目标的模型不可用
+MAX_LOO_ERROR = 0.25
+
+def _sq_dist(a, b, scales):
+    """按长度尺度缩放后的平方距离，a: (n, d)，b: (m, d)，scales: (..., d) -> (..., n, m)"""
+    diff = a[:, None, :] - b[None, :, :]
+    return np.sum((diff / scales[..., None, None, :]) ** 2, axis=-1)
+
+def _cholesky(k):
+    """批量 Cholesky：返回 (下三角因子, 成功的下标)；个别矩阵不正定时逐个分解并跳过"""
+    try:
+        return np.linalg.cholesky(k), np.arange(len(k))
+    except np.linalg.LinAlgError:
+        pass
+    chols, ok = [], []
+    for i, ki in enumerate(k):
+        try:
+            chols.append(np.linalg.cholesky(ki))
+        except np.linalg.LinAlgError:
+            continue
+        ok.append(i)
+    if not ok:
+        raise ValueError("所有候选超参数的核矩阵都不正定，无法训练代理模型")
+    return np.array(chols), np.array(ok)
+
+class _GP:
+    """单个目标的高斯过程（输入已归一化到 [0, 1]）"""
+
+    def __init__(self, x, y):
+        self.x = x
+        self.mean = y.mean()
+        self.scale = y.std() or 1.0
+        z = (y - self.mean) / self.scale
+        n = len(z)
+
+        # 所有超参数组合一次性做 Cholesky，取边际似然最大的一组
+        combos = np.array(list(itertools.product(LENGTH_SCALES, repeat=x.shape[1])))
+        noise = np.repeat(NOISE_LEVELS, len(combos))
+        combos = np.tile(combos, (len(NOISE_LEVELS), 1))
+        k = np.exp(-0.5 * _sq_dist(x, x, combos)) + (noise[:, None, None] + JITTER) * np.eye(n)
+        chol, ok = _cholesky(k)
+        combos, noise = combos[ok], noise[ok]
+        alpha = np.linalg.solve(np.swapaxes(chol, -1, -2), np.linalg.solve(chol, z[None, :, None]))
+        loglik = (-0.5 * np.sum(z[None, :, None] * alpha, axis=(1, 2))
+                  - np.sum(np.log(np.diagonal(chol, axis1=1, axis2=2)), axis=1))
+        best = int(np.argmax(loglik))
+        self.lengths = combos[best]
+        self.noise = noise[best]
+        self.chol = chol[best]
+        self.alpha = alpha[best, :, 0]
+
+    def predict(self, xq):
+        """返回 log1p 空间的 (均值, 标准差)"""
+        kq = np.exp(-0.5 * _sq_dist(xq, self.x, self.lengths))
+        mu = kq @ self.alpha
+        v = np.linalg.solve(self.chol, kq.T)
+        var = np.maximum(1.0 - np.sum(v * v, axis=0), 0.0)
+        return mu * self.scale + self.mean, np.sqrt(var) * self.scale
+
+    def loo(self):
+        """留一法预测残差（闭式解，不需要重新训练），log1p 空间"""
+        kinv = np.linalg.inv(self.chol @ self.chol.T)
+        return self.alpha / np.diag(kinv) * self.scale
+
+class Surrogate:
+    """numCycles / 停顿计数的代理模型
+
+    >>> model = Surrogate.from_store()
+    >>> model.predict([[128, 32, 64]])['numCycles']['mean']
+    """
+
+    def __init__(self, rows, targets=TARGETS):
+        rows = [r for r in rows if all(r[p] is not None for p in PARAMS) and r[targets[0]]]
+        # 同一配置的多次仿真（例如不同输出目录）合并为一个训练点，取 log1p 的平均
+        merged = {}
+        for r in rows:
+            merged.setdefault(tuple(r[p] for p in PARAMS), []).append([float(r[t]) for t in targets])
+        if len(merged) < 2:
+            raise ValueError("结果库中的仿真结果不足，无法训练代理模型")
+        self.targets = list(targets)
+        self.configs = np.array(list(merged), dtype=float)
+        y = np.array([np.log1p(v).mean(axis=0) for v in merged.values()])
+        logx = np.log2(self.configs)
+        self.lo = logx.min(axis=0)
+        self.span = np.where(logx.max(axis=0) > self.lo, logx.max(axis=0) - self.lo, 1.0)
+        x = (logx - self.lo) / self.span
+        self.models = {t: _GP(x, y[:, i]) for i, t in enumerate(self.targets)}
+
+    @classmethod
+    def from_store(cls, db_path=DEFAULT_DB, targets=TARGETS):
+        with open_store(db_path) as store:
+            return cls(store.load(targets), targets)
+
+    def _normalize(self, configs):
+        configs = np.atleast_2d(np.asarray(configs, dtype=float))
+        return (np.log2(configs) - self.lo) / self.span
+
+    def predict(self, configs, confidence=0.95):
+        """预测 (n, 3) 个 (regs, iq, rob) 配置：{目标: {mean, lo, hi, rel_std}}，每项为长度 n 的数组"""
+        x = self._normalize(configs)
+        z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        out = {}
+        for t, gp in self.models.items():
+            mu, sd = gp.predict(x)
+            out[t] = {
+                'mean': np.maximum(np.expm1(mu), 0.0),
+                'lo': np.maximum(np.expm1(mu - z * sd), 0.0),
+                'hi': np.expm1(mu + z * sd),
+                # log 空间的标准差约等于相对标准差
+                'rel_std': sd,
+            }
+        return out
+
+    def suggest(self, candidates, n=5, target='numCycles', max_loo_error=MAX_LOO_ERROR):
+        """候选配置中预测最不确定、且尚未仿真的 n 个：[(配置, 相对标准差)]
+
+        target 的留一法误差超过 max_loo_error 时模型本身不可信，拒绝排名（ValueError）。
+        """
+        err = self.validate()[target]
+        if err > max_loo_error:
+            raise ValueError(f"{target} 的留一法误差 {err:.0%} 超过 {max_loo_error:.0%}，不据此排名")
+        candidates = np.atleast_2d(np.asarray(candidates, dtype=float))
+        known = {tuple(c) for c in self.configs}
+        mask = np.array([tuple(c) not in known for c in candidates], dtype=bool)
+        candidates = candidates[mask]
+        if not len(candidates):
+            return []
+        rel = self.predict(candidates)[target]['rel_std']
+        order = np.argsort(rel)[::-1][:n]
+        return [(tuple(int(v) for v in candidates[i]), float(rel[i])) for i in order]
+
+    def validate(self):
+        """留一法：{目标: 平均相对误差}（按 1+值 计算，停顿计数为 0 时也有意义）"""
+        return {t: float(np.mean(np.abs(np.expm1(gp.loo())))) for t, gp in self.models.items()}
+
+    def grid(self):
+        """训练数据范围内 2 的幂构成的候选网格"""
+        axes = []
+        for d in range(self.configs.shape[1]):
+            lo, hi = self.configs[:, d].min(), self.configs[:, d].max()
+            axes.append(2 ** np.arange(int(np.log2(lo)), int(np.log2(hi)) + 1))
+        return np.array(list(itertools.product(*axes)), dtype=float)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('configs', type=int, nargs='*', help="regs iq rob 三个一组")
+    parser.add_argument('--db', default=DEFAULT_DB)
+    parser.add_argument('--suggest', type=int, default=0, metavar='N',
+                        help="列出 N 个最值得仿真（预测最不确定）的配置")
+    parser.add_argument('--target', default='numCycles', choices=TARGETS, help="--suggest 按哪个目标的不确定度排名")
+    parser.add_argument('--max-loo-error', type=float, default=MAX_LOO_ERROR,
+                        help="留一法平均相对误差超过该值的目标不输出预测、不参与排名")
+    parser.add_argument('--validate', action='store_true', help="留一法交叉验证")
+    parser.add_argument('--confidence', type=float, default=0.95)
+    args = parser.parse_args()
+    if len(args.configs) % 3:
+        parser.error("配置须为 regs iq rob 三个一组")
+
+    model = Surrogate.from_store(args.db)
+    loo = model.validate()
+    usable = {t: err <= args.max_loo_error for t, err in loo.items()}
+    print(f"训练样本: {len(model.configs)}  留一法误差: "
+          + ', '.join(f"{t} {err:.1%}{'' if usable[t] else '（不可用）'}" for t, err in loo.items()))
+
+    if args.configs:
+        configs = np.array(args.configs).reshape(-1, 3)
+        pred = model.predict(configs, args.confidence)
+        print(f"{'regs':>5} {'iq':>5} {'rob':>5} {'numCycles':>14} {'区间':>29} {'±%':>6} "
+              f"{'ROBFull':>10} {'IQFull':>10} {'FullRegs':>10}")
+        print("-" * 103)
+        def mean(t, i, width):
+            return f"{pred[t]['mean'][i]:>{width},.0f}" if usable[t] else f"{'-':>{width}}"
+        for i, (regs, iq, rob) in enumerate(configs):
+            c = pred['numCycles']
+            interval = f"[{c['lo'][i]:,.0f}, {c['hi'][i]:,.0f}]" if usable['numCycles'] else '-'
+            rel = f"{c['rel_std'][i]:>6.1%}" if usable['numCycles'] else f"{'-':>6}"
+            print(f"{regs:>5} {iq:>5} {rob:>5} {mean('numCycles', i, 14)} {interval:>29} {rel} "
+                  f"{mean('ROBFull', i, 10)} {mean('IQFull', i, 10)} {mean('FullRegs', i, 10)}")
+
+    if args.suggest:
+        print(f"\n最值得仿真的配置（{args.target} 预测相对标准差最大）:")
+        try:
+            for (regs, iq, rob), rel in model.suggest(model.grid(), args.suggest, args.target,
+                                                      args.max_loo_error):
+                print(f"  regs={regs} iq={iq} rob={rob}  ±{rel:.1%}")
+        except ValueError as e:
+            print(f"  {e}")
+
+    if args.validate:
+        print("\n留一法平均相对误差:")
+        for t, err in loo.items():
+            print(f"  {t:<10} {err:.2%}" + ('' if usable[t] else "  超过 --max-loo-error，不可用"))
+
+if __name__ == '__main__':
+    main()
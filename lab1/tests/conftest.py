@@ -0,0 +1,101 @@
+"""
+测试共用的夹具：用一个假的 gem5（Python 脚本）代替真实仿真
+- 按 O3CPU.py 的命令行写出 stats.txt（单配置或 --configs 批量、--config-only 只写 config.json）
+- 停顿计数器只在结构偏小时非零，numCycles 只由这些计数器决定，
+  因此计数器为 0 的轴继续加大时结果不变，与 --prune 的饱和假设一致
+- stats_blocks.json 把唯一的块标为 "roi"；FAKE_GEM5_NO_ROI 模拟没有 ROI 标记的负载（"full"）
+- 每次调用追加一行到脚本旁的 calls.log；FAKE_GEM5_SLEEP 延迟写出结果，
+  FAKE_GEM5_FAIL（逗号分隔的 regs:iq:rob）让对应配置失败
+"""
+
+import csv
+import sys
+from pathlib import Path
+
+import pytest
+
+LAB1 = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(LAB1))
+
+FAKE_GEM5 = r'''#!{python}
+import json, os, sys, time
+from pathlib import Path
+
+argv = sys.argv[1:]
+with open(Path(__file__).with_name('calls.log'), 'a') as f:
+    f.write(' '.join(argv) + '\n')
+outdir = Path(argv[argv.index('-d') + 1])
+opts = dict(a[2:].split('=', 1) for a in argv if a.startswith('--') and '=' in a)
+config_only = '--config-only' in argv
+failing = set(filter(None, os.environ.get('FAKE_GEM5_FAIL', '').split(',')))
+time.sleep(float(os.environ.get('FAKE_GEM5_SLEEP', 0)))
+
+def emit(odir, regs, iq, rob):
+    odir.mkdir(parents=True, exist_ok=True)
+    if config_only:
+        (odir / 'config.json').write_text(json.dumps({{'regs': regs, 'iq': iq, 'rob': rob}}))
+        return True
+    if f'{{regs}}:{{iq}}:{{rob}}' in failing:
+        return False
+    regs_full = 100 if regs < 128 else 0
+    iq_full = 50 if iq < 16 else 0
+    rob_full = 70 if rob < 64 else 0
+    (odir / 'stats.txt').write_text(
+        '---------- Begin Simulation Statistics ----------\n'
+        'simInsts 1000\nhostSeconds 0.5\nhostMemory 1048576\n'
+        f'system.cpu.numCycles {{1000 + regs_full + iq_full + rob_full}}\n'
+        f'system.cpu.rename.ROBFullEvents {{rob_full}}\n'
+        f'system.cpu.rename.IQFullEvents {{iq_full}}\n'
+        f'system.cpu.rename.fullRegistersEvents {{regs_full}}\n'
+        '---------- End Simulation Statistics   ----------\n')
+    label = 'full' if os.environ.get('FAKE_GEM5_NO_ROI') else 'roi'
+    (odir / 'stats_blocks.json').write_text(json.dumps([label]))
+    return True
+
+if 'configs' in opts:
+    ok = [emit(outdir / f'regs{{r}}-iq{{i}}-rob{{b}}', r, i, b)
+          for r, i, b in (map(int, t.split(':')) for t in opts['configs'].split(','))]
+else:
+    ok = [emit(outdir, int(opts['num-phys-int-regs']), int(opts['num-iq-entries']),
+               int(opts['num-rob-entries']))]
+sys.exit(0 if all(ok) else 1)
+'''
+
+def expected_cycles(regs, iq, rob):
+    """假 gem5 对一个配置给出的 numCycles"""
+    return 1000 + (100 if regs < 128 else 0) + (50 if iq < 16 else 0) + (70 if rob < 64 else 0)
+
+@pytest.fixture
+def fake_gem5(tmp_path):
+    """假 gem5 的路径；调用记录在同目录的 calls.log"""
+    bindir = tmp_path / 'bin'
+    bindir.mkdir()
+    path = bindir / 'gem5'
+    path.write_text(FAKE_GEM5.format(python=sys.executable))
+    path.chmod(0o755)
+    return path
+
+def gem5_calls(fake_gem5):
+    """假 gem5 被调用的命令行（不含 --config-only 探测）"""
+    log = fake_gem5.with_name('calls.log')
+    if not log.exists():
+        return []
+    return [ln for ln in log.read_text().splitlines() if '--config-only' not in ln]
+
+@pytest.fixture
+def sweep_argv(tmp_path, fake_gem5):
+    """构造 run_sweep.py 的命令行：sweep_argv(out_base, 其他选项...)"""
+    o3conf = tmp_path / 'O3CPU.py'
+    o3conf.write_text('# fake\n')
+    cmd_bin = tmp_path / 'daxpy.riscv'
+    cmd_bin.write_bytes(b'\x7fELF fake')
+
+    def make(out_base, *extra):
+        return ['--gem5-bin', str(fake_gem5), '--o3conf', str(o3conf), '--cmd-bin', str(cmd_bin),
+                '--out-base', str(out_base), '-j', '2', '--mem-budget', '1000'] + list(extra)
+    return make
+
+def read_summary(path):
+    """summary.csv -> {(regs, iq, rob): 行}"""
+    with open(path, newline='') as f:
+        return {(int(r['regs']), int(r['iq']), int(r['rob'])): r for r in csv.DictReader(f)}
@@ -0,0 +1,26 @@
+"""chart_cache.py：绘图函数所在模块的改动也使图表失效"""
+
+import importlib
+import sys
+
+from chart_cache import chart_digest
+
+MODULE = '''
+COLOR = {color!r}
+
+def draw(data, path):
+    return COLOR
+'''
+
+def load_module(tmp_path, color):
+    (tmp_path / 'charts_under_test.py').write_text(MODULE.format(color=color))
+    sys.modules.pop('charts_under_test', None)
+    return importlib.import_module('charts_under_test')
+
+def test_module_level_change_invalidates(tmp_path, monkeypatch):
+    monkeypatch.syspath_prepend(str(tmp_path))
+    red = chart_digest('a.png', load_module(tmp_path, 'red').draw, [1, 2])
+    assert chart_digest('a.png', load_module(tmp_path, 'red').draw, [1, 2]) == red
+    # draw 的源码没变，只改了它用到的模块级常量
+    assert chart_digest('a.png', load_module(tmp_path, 'blue').draw, [1, 2]) != red
+    sys.modules.pop('charts_under_test', None)
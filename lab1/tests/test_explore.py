@@ -0,0 +1,67 @@
+"""explore.py：预算在最后一级用尽时的排名，以及截断仿真与其余参数在结果库中的区分"""
+
+import pytest
+
+import explore
+from parse_stats import parse_stats_file
+from result_store import ResultStore
+
+STATS = ('---------- Begin Simulation Statistics ----------\n'
+         'simInsts {insts}\nsystem.cpu.numCycles {cycles}\n'
+         '---------- End Simulation Statistics   ----------\n')
+ROI_INSTS = 100000
+
+def fake_run_one(explorer):
+    """按配置写出 stats.txt：截断仿真的 CPI 恒为 1，完整仿真的 CPI 随 rob 变小"""
+    def run_one(cfg, insts):
+        odir = explorer.args.out_base / explore.config_name(cfg, insts)
+        odir.mkdir(parents=True, exist_ok=True)
+        n = insts or ROI_INSTS
+        cycles = n if insts else n * (1 + 64 / cfg['rob'])
+        (odir / 'stats.txt').write_text(STATS.format(insts=n, cycles=int(cycles)))
+        return parse_stats_file(odir / 'stats.txt')
+    return run_one
+
+@pytest.fixture
+def make_explorer(tmp_path):
+    stores = []
+
+    def make(*argv):
+        args = explore.parse_args(['--out-base', str(tmp_path), '--initial', '6', '--min-insts', '20000',
+                                   '--space', 'fregs=64', 'lq=32', 'sq=32', 'width=8', 'regs=64,128',
+                                   *argv])
+        args.out_base = tmp_path
+        store = ResultStore(tmp_path / 'results.db')
+        stores.append(store)
+        explorer = explore.Explorer(args, explore.parse_space(args.space), store)
+        explorer.run_one = fake_run_one(explorer)
+        return explorer
+    yield make
+    for store in stores:
+        store.close()
+
+def test_budget_exhausted_before_last_rung_ranks_full_runs(make_explorer):
+    explorer = make_explorer('--budget', '2', '--rungs', '2')
+    configs = explore.random_configs(explorer.space, 6, explore.random.Random(0))
+    ranked = explorer.successive_halving(configs)
+    # 只有标定仿真是完整仿真：排名里不能出现截断仿真的目标值
+    full = {k: v for k, v in explorer.results.items() if k[1] == 0}
+    assert len(full) == 1
+    assert [obj for obj, _ in ranked] == [obj for _, obj in full.values()]
+
+def test_rungs_must_be_positive():
+    with pytest.raises(SystemExit):
+        explore.parse_args(['--rungs', '0'])
+
+def test_store_keeps_truncated_and_extra_params_apart(make_explorer):
+    explorer = make_explorer('--space', 'fregs=64', 'lq=32', 'sq=32', 'width=4,8', 'regs=64')
+    cfg = {'regs': 64, 'fregs': 64, 'iq': 16, 'rob': 64, 'lq': 32, 'sq': 32, 'width': 8}
+    explorer.evaluate([cfg, {**cfg, 'width': 4}], 0)
+    explorer.evaluate([cfg], 20000)
+    store = explorer.store
+    # 默认只有其余参数为默认值的完整仿真
+    rows = store.load(['numCycles'])
+    assert [(r['regs'], r['iq'], r['rob']) for r in rows] == [(64, 16, 64)]
+    assert rows[0]['numCycles'] == 2 * ROI_INSTS
+    widths = sorted(r['width'] for r in store.load(['numCycles'], all_params=True))
+    assert widths == [4, 8]
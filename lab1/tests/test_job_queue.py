@@ -0,0 +1,68 @@
+"""job_queue.py：领取、心跳超时后重新排队、写回结果，以及任务被回收后杀掉 gem5"""
+
+import sqlite3
+import time
+
+import job_queue
+import run_sweep
+from conftest import expected_cycles, gem5_calls
+from job_queue import Heartbeat, JobQueue
+
+CONFIGS = [(64, 4, 16), (256, 16, 64)]
+
+def test_worker_claims_and_finishes(tmp_path, fake_gem5, sweep_argv):
+    q = tmp_path / 'q.db'
+    with JobQueue(q) as queue:
+        assert queue.submit(CONFIGS) == 2
+        assert queue.submit(CONFIGS) == 0
+    sweep_args = run_sweep.parse_args(sweep_argv(tmp_path / 'out'))
+    assert job_queue.work(q, sweep_args) == 2
+    with JobQueue(q) as queue:
+        assert queue.counts() == {'queued': 0, 'running': 0, 'done': 2, 'failed': 0}
+        assert {(r['regs'], r['iq'], r['rob']): r['numCycles'] for r in queue.results()} == {
+            cfg: expected_cycles(*cfg) for cfg in CONFIGS}
+        assert queue.claim('late') is None
+    assert len(gem5_calls(fake_gem5)) == 2
+
+def test_stale_job_is_requeued_then_failed(tmp_path):
+    q = tmp_path / 'q.db'
+    with JobQueue(q, stale=0.05, max_attempts=2) as queue:
+        queue.submit(CONFIGS[:1])
+        job_id, cfg = queue.claim('dead')
+        assert cfg == CONFIGS[0]
+        # 心跳仍新鲜时不会被别人领走
+        assert queue.claim('other') is None
+        time.sleep(0.1)
+        assert queue.claim('other') == (job_id, cfg)
+        # 原 worker 的心跳与结果都被拒绝
+        assert not queue.heartbeat(job_id, 'dead')
+        assert not queue.finish(job_id, 'dead', {'regs': 64})
+        time.sleep(0.1)
+        # 尝试次数用完：记为失败而不是再次排队
+        assert queue.claim('third') is None
+        assert queue.counts()['failed'] == 1
+        assert 'worker lost 2 times' in queue.failures()[0][4]
+
+def test_lost_job_kills_gem5(tmp_path, fake_gem5, sweep_argv, monkeypatch):
+    q = tmp_path / 'q.db'
+    monkeypatch.setenv('FAKE_GEM5_SLEEP', '30')
+    with JobQueue(q) as queue:
+        queue.submit(CONFIGS[:1])
+        job_id, cfg = queue.claim('me')
+    beat = Heartbeat(q, job_id, 'me', interval=0.1)
+    beat.start()
+    # 另一个 worker 回收并领取了该任务
+    conn = sqlite3.connect(str(q))
+    with conn:
+        conn.execute("UPDATE jobs SET worker = 'thief' WHERE job_id = ?", (job_id,))
+    conn.close()
+
+    sweep_args = run_sweep.parse_args(sweep_argv(tmp_path / 'out', '--retries', '2'))
+    start = time.monotonic()
+    results = run_sweep.run_job(sweep_args, [cfg], cancel=beat.lost)
+    beat.stop()
+    assert beat.lost.is_set() and results == {cfg: None}
+    assert time.monotonic() - start < 10
+    # 被杀掉后不再重试
+    assert len(gem5_calls(fake_gem5)) == 1
+    assert not (run_sweep.outdir_for(tmp_path / 'out', *cfg) / 'stats.txt').exists()
@@ -0,0 +1,30 @@
+"""pareto.py：weighted 代价模型与 explore.py 的 hw_cost 一致"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from design_space import SPACE, hw_cost
+
+LAB1 = Path(__file__).resolve().parent.parent
+
+
+def test_weighted_cost_sums_to_explore_hw_cost():
+    import pareto
+    space = {k: values for k, (_, values) in SPACE.items()}
+    cfgs = [{k: values[0] for k, values in space.items()},
+            {k: values[-1] for k, values in space.items()},
+            {'regs': 128, 'fregs': 64, 'iq': 32, 'rob': 256, 'lq': 16, 'sq': 64, 'width': 4}]
+    p = {k: np.array([c[k] for c in cfgs], dtype=float) for k in space}
+    total = sum(pareto.weighted_cost(p).values())
+    assert np.allclose(total, [hw_cost(c, space) for c in cfgs])
+    assert total[1] == 1.0
+
+
+def test_pareto_does_not_import_the_sweep_scripts():
+    """pareto.py 只依赖 design_space，不应连带导入 explore.py / run_sweep.py"""
+    code = "import sys, pareto; print(sorted({'explore', 'run_sweep'} & set(sys.modules)))"
+    out = subprocess.run([sys.executable, '-c', code], cwd=LAB1, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == '[]'
@@ -0,0 +1,130 @@
+"""parse_stats.py：多块流式解析、向量/分布桶、SCHEMA 缺省值、ROI 块选择与 .stats_cache.json"""
+
+import csv
+import json
+import os
+import sys
+
+import pytest
+
+import parse_stats
+from parse_stats import (BEGIN_MARKER, CACHE_NAME, END_MARKER, Stats, iter_blocks, parse_stats_file,
+                         stats_signature)
+
+def block(lines):
+    return [BEGIN_MARKER + ' ----------\n'] + [ln + '\n' for ln in lines] + [END_MARKER + '   ----------\n', '\n']
+
+def write_run(odir, cycles, labels=None):
+    """每个块一个 numCycles；labels 写入 stats_blocks.json"""
+    odir.mkdir(parents=True, exist_ok=True)
+    lines = []
+    for c in cycles:
+        lines += block([f'system.cpu.numCycles {c:>20} # Number of cpu cycles simulated (Cycle)'])
+    (odir / 'stats.txt').write_text(''.join(lines))
+    if labels is not None:
+        (odir / 'stats_blocks.json').write_text(json.dumps(labels))
+    return odir / 'stats.txt'
+
+def test_iter_blocks_yields_each_complete_block():
+    lines = (block(['simInsts 100', 'system.cpu.numCycles 400'])
+             + block(['simInsts 250', 'system.cpu.numCycles 300', 'simInsts 999'])
+             # 没有结束标记的半个块不产出
+             + [BEGIN_MARKER + ' ----------\n', 'simInsts 7\n'])
+    blocks = list(iter_blocks(lines))
+    assert [b['simInsts'] for b in blocks] == [100, 250]
+    assert [b['system.cpu.numCycles'] for b in blocks] == [400, 300]
+
+def test_values_vectors_and_buckets():
+    (stats,) = iter_blocks(block([
+        'system.cpu.cpi                 1.250000   # CPI',
+        'system.cpu.ipc                      nan   # IPC',
+        'system.cpu.rename.ROBFullEvents      12   # ROB full',
+        'system.cpu.iq.issuedInstType_0::No_OpClass    3  0.30%  0.30% # Type',
+        'system.cpu.iq.issuedInstType_0::IntAlu      997 99.70% 100.00% # Type',
+        'system.cpu.iq.issuedInstType_0::total      1000   # Type',
+        'system.cpu.fetch.nisnDist::0-1            5   # Dist',
+        'system.cpu.fetch.nisnDist::mean    1.5e+00   # Dist',
+        'garbage',
+    ]))
+    assert stats['system.cpu.cpi'] == 1.25 and isinstance(stats['system.cpu.cpi'], float)
+    assert stats['system.cpu.rename.ROBFullEvents'] == 12
+    assert isinstance(stats['system.cpu.rename.ROBFullEvents'], int)
+    assert stats['system.cpu.ipc'] != stats['system.cpu.ipc']
+    assert stats.vector('system.cpu.iq.issuedInstType_0') == {'No_OpClass': 3, 'IntAlu': 997, 'total': 1000}
+    assert stats.vector('system.cpu.fetch.nisnDist') == {'0-1': 5, 'mean': 1.5}
+    assert 'garbage' not in stats
+
+def test_schema_defaults_to_zero():
+    stats = Stats()
+    assert stats['system.cpu.rename.SQFullEvents'] == 0
+    assert isinstance(stats['system.cpu.rename.SQFullEvents'], int)
+    assert stats['system.cpu.cpi'] == 0.0 and isinstance(stats['system.cpu.cpi'], float)
+    with pytest.raises(KeyError):
+        stats['system.cpu.noSuchStat']
+
+def test_roi_block_selection(tmp_path):
+    roi = write_run(tmp_path / 'roi', [100, 40, 10], ['pre_roi', 'roi', 'post_roi'])
+    assert parse_stats_file(roi)['system.cpu.numCycles'] == 40
+    assert parse_stats_file(roi, block=0)['system.cpu.numCycles'] == 100
+    assert parse_stats_file(roi, block=-1)['system.cpu.numCycles'] == 10
+    assert parse_stats_file(roi, block=5) == {}
+    periods = write_run(tmp_path / 'period', [90, 5, 20, 30], ['pre_roi:period', 'pre_roi', 'roi:period', 'roi'])
+    assert parse_stats_file(periods)['system.cpu.numCycles'] == 30
+    # 没有 ROI 标记或没有标签文件：取第一个块
+    assert parse_stats_file(write_run(tmp_path / 'full', [70], ['full']))['system.cpu.numCycles'] == 70
+    assert parse_stats_file(write_run(tmp_path / 'old', [60, 50]))['system.cpu.numCycles'] == 60
+
+def test_signature_covers_stats_and_block_labels(tmp_path):
+    stats_path = write_run(tmp_path / 'run', [100, 40], ['pre_roi', 'roi'])
+    sig = stats_signature(stats_path)
+    assert len(sig) == 4 and None not in sig
+    (tmp_path / 'run' / 'stats_blocks.json').unlink()
+    assert stats_signature(stats_path)[:2] == sig[:2]
+    assert stats_signature(stats_path)[2:] == [None, None]
+
+def run_main(base, monkeypatch, capsys):
+    monkeypatch.setattr(sys, 'argv', ['parse_stats.py', str(base)])
+    parse_stats.main()
+    return {r['outdir'].rsplit('/', 1)[-1]: r for r in csv.DictReader(capsys.readouterr().out.splitlines())}
+
+def touch_later(path):
+    """保证 mtime 变化（文件系统的时间精度可能很粗）"""
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+
+def test_cache_reparses_only_changed_runs(tmp_path, monkeypatch, capsys):
+    a = write_run(tmp_path / 'regs64-iq16-rob32', [100, 40], ['pre_roi', 'roi'])
+    write_run(tmp_path / 'regs256-iq64-rob192', [200, 80], ['pre_roi', 'roi'])
+    parsed = []
+    real = parse_stats.parse_row
+    monkeypatch.setattr(parse_stats, 'parse_row', lambda p: parsed.append(p.parent.name) or real(p))
+
+    rows = run_main(tmp_path, monkeypatch, capsys)
+    assert {k: int(r['numCycles']) for k, r in rows.items()} == {'regs64-iq16-rob32': 40, 'regs256-iq64-rob192': 80}
+    assert rows['regs64-iq16-rob32']['regs'] == '64'
+    assert len(parsed) == 2 and (tmp_path / CACHE_NAME).exists()
+
+    # 未变化：全部来自缓存
+    parsed.clear()
+    assert int(run_main(tmp_path, monkeypatch, capsys)['regs64-iq16-rob32']['numCycles']) == 40
+    assert parsed == []
+
+    # stats.txt 被重写
+    write_run(a.parent, [100, 45000])
+    touch_later(a)
+    assert int(run_main(tmp_path, monkeypatch, capsys)['regs64-iq16-rob32']['numCycles']) == 45000
+    assert parsed == ['regs64-iq16-rob32']
+
+    # 只有 stats_blocks.json 变化（块的含义变了），stats.txt 不变
+    parsed.clear()
+    labels = a.parent / 'stats_blocks.json'
+    labels.write_text(json.dumps(['roi', 'post_roi']))
+    touch_later(labels)
+    assert int(run_main(tmp_path, monkeypatch, capsys)['regs64-iq16-rob32']['numCycles']) == 100
+    assert parsed == ['regs64-iq16-rob32']
+
+    # 仿真目录被删掉后也从缓存中移除
+    (tmp_path / 'regs256-iq64-rob192' / 'stats.txt').unlink()
+    run_main(tmp_path, monkeypatch, capsys)
+    cache = json.loads((tmp_path / CACHE_NAME).read_text())
+    assert list(cache) == [str(a)]
@@ -0,0 +1,96 @@
+"""result_store.py：打开结果库时与输出目录同步"""
+
+from result_store import ResultStore, load_data, open_store
+
+STATS = ('---------- Begin Simulation Statistics ----------\n'
+         'system.cpu.numCycles {cycles}\n'
+         '---------- End Simulation Statistics   ----------\n')
+
+def write_run(out, name, cycles):
+    odir = out / name
+    odir.mkdir(parents=True, exist_ok=True)
+    (odir / 'stats.txt').write_text(STATS.format(cycles=cycles))
+    return odir
+
+def cycles_by_outdir(db):
+    return {row['outdir'].rsplit('/', 1)[-1]: row['numCycles'] for row in load_data(db)}
+
+def test_open_store_syncs_with_outdirs(tmp_path):
+    db = tmp_path / 'results.db'
+    write_run(tmp_path, 'regs64-iq4-rob4', 300)
+    assert cycles_by_outdir(db) == {'regs64-iq4-rob4': 300}
+
+    # 库已存在：新增、改写与删除的仿真都要反映出来
+    write_run(tmp_path, 'regs64-iq4-rob16', 200)
+    (write_run(tmp_path, 'regs64-iq16-rob4', 250) / 'stats.txt').unlink()
+    # 位数不同，同一时刻改写时文件大小也会变
+    write_run(tmp_path, 'regs64-iq4-rob4', 3000)
+    assert cycles_by_outdir(db) == {'regs64-iq4-rob4': 3000, 'regs64-iq4-rob16': 200}
+
+    (tmp_path / 'regs64-iq4-rob16' / 'stats.txt').unlink()
+    assert cycles_by_outdir(db) == {'regs64-iq4-rob4': 3000}
+
+def test_rows_without_stats_kept_while_outdir_exists(tmp_path):
+    db = tmp_path / 'results.db'
+    odir = tmp_path / 'regs64-iq4-rob64'
+    odir.mkdir()
+    with ResultStore(db) as store:
+        store.ingest(odir, {'system.cpu.numCycles': 100})
+    assert cycles_by_outdir(db) == {'regs64-iq4-rob64': 100}
+    odir.rmdir()
+    with open_store(db) as store:
+        assert store.load(['numCycles']) == []
+
+def test_block_labels_written_later_are_picked_up(tmp_path):
+    db = tmp_path / 'results.db'
+    odir = write_run(tmp_path, 'regs64-iq4-rob4', 500)
+    with open(odir / 'stats.txt', 'a') as f:
+        f.write(STATS.format(cycles=120))
+    # 没有标签文件时取第一个块
+    assert cycles_by_outdir(db) == {'regs64-iq4-rob4': 500}
+    # stats.txt 不变，stats_blocks.json 后写入：改取 ROI 块
+    (odir / 'stats_blocks.json').write_text('["pre_roi", "roi"]')
+    assert cycles_by_outdir(db) == {'regs64-iq4-rob4': 120}
+
+def test_inferred_rows_are_labelled_and_skipped(tmp_path):
+    db = tmp_path / 'results.db'
+    write_run(tmp_path, 'regs64-iq4-rob4', 300)
+    inferred = tmp_path / 'regs64-iq4-rob16'
+    inferred.mkdir()
+    with open_store(db) as store:
+        store.ingest(inferred, {'system.cpu.numCycles': 300}, inferred=True)
+    # 分析脚本默认只看真正仿真过的点
+    assert cycles_by_outdir(db) == {'regs64-iq4-rob4': 300}
+    with open_store(db) as store:
+        rows = store.load(['numCycles'], include_inferred=True)
+        assert {r['outdir'].rsplit('/', 1)[-1]: r['inferred'] for r in rows} == {
+            'regs64-iq4-rob4': False, 'regs64-iq4-rob16': True}
+        assert store.lookup(['numCycles'], regs=64, iq=4, rob=16) is None
+    # 之后真正仿真了：同一行改记为实测
+    write_run(tmp_path, 'regs64-iq4-rob16', 200)
+    assert cycles_by_outdir(db) == {'regs64-iq4-rob4': 300, 'regs64-iq4-rob16': 200}
+
+def test_relative_and_absolute_paths_share_rows(tmp_path, monkeypatch):
+    write_run(tmp_path / 'out', 'regs64-iq4-rob4', 300)
+    monkeypatch.chdir(tmp_path)
+    assert len(load_data(tmp_path / 'out' / 'results.db')) == 1
+    assert len(load_data('out/results.db')) == 1
+    with ResultStore('out/results.db') as store:
+        store.ingest('out/regs64-iq4-rob4', {'system.cpu.numCycles': 300})
+    assert cycles_by_outdir(tmp_path / 'out' / 'results.db') == {'regs64-iq4-rob4': 300}
+
+def test_relative_rows_of_old_stores_are_merged(tmp_path, monkeypatch):
+    db = tmp_path / 'out' / 'results.db'
+    write_run(tmp_path / 'out', 'regs64-iq4-rob4', 300)
+    write_run(tmp_path / 'out', 'regs64-iq4-rob16', 200)
+    assert len(load_data(db)) == 2
+    # 旧版本按相对路径又记了一遍（其中一个目录只有相对路径的记录）
+    with ResultStore(db) as store:
+        store.conn.execute("UPDATE runs SET outdir = 'out/regs64-iq4-rob16' WHERE outdir LIKE '%rob16'")
+        store.conn.execute("INSERT INTO runs (outdir, regs, iq, rob) VALUES ('out/regs64-iq4-rob4', 64, 4, 4)")
+        store.conn.commit()
+    monkeypatch.chdir(tmp_path)
+    with ResultStore(db) as store:
+        outdirs = sorted(r for r, in store.conn.execute("SELECT outdir FROM runs"))
+    assert outdirs == [str((tmp_path / 'out' / name).resolve()) for name in ('regs64-iq4-rob16', 'regs64-iq4-rob4')]
+    assert cycles_by_outdir(db) == {'regs64-iq4-rob4': 300, 'regs64-iq4-rob16': 200}
@@ -0,0 +1,125 @@
+"""run_sweep.py：完整扫描、断点续跑、summary.csv 原子写入、结果缓存与 --prune"""
+
+import pytest
+
+import run_sweep
+from conftest import expected_cycles, gem5_calls, read_summary
+from result_store import ResultStore
+
+GRID = ['--regs', '64', '256', '--iq', '4', '16', '64', '--rob', '16', '64', '256']
+CONFIGS = [(r, i, b) for r in (64, 256) for i in (4, 16, 64) for b in (16, 64, 256)]
+
+def test_full_sweep(tmp_path, fake_gem5, sweep_argv):
+    out = tmp_path / 'out'
+    assert run_sweep.main(sweep_argv(out, *GRID)) == 0
+    summary = read_summary(out / 'summary.csv')
+    assert sorted(summary) == sorted(CONFIGS)
+    for cfg, row in summary.items():
+        assert int(row['numCycles']) == expected_cycles(*cfg)
+    assert len(gem5_calls(fake_gem5)) == len(CONFIGS)
+    with ResultStore(out / 'results.db') as store:
+        assert len(store.load(['numCycles'])) == len(CONFIGS)
+
+def test_missing_roi_block_is_reported(tmp_path, fake_gem5, sweep_argv, monkeypatch, capsys):
+    grid = ['--regs', '64', '--iq', '16', '--rob', '16', '64']
+    assert run_sweep.main(sweep_argv(tmp_path / 'roi', *grid)) == 0
+    assert '[WARN]' not in capsys.readouterr().err
+    monkeypatch.setenv('FAKE_GEM5_NO_ROI', '1')
+    assert run_sweep.main(sweep_argv(tmp_path / 'full', *grid)) == 0
+    err = capsys.readouterr().err
+    assert '[WARN] 2 个仿真没有 ROI 块（regs64-iq16-rob16, regs64-iq16-rob64）' in err
+    assert '-DGEM5_ROI' in err
+
+def test_resume_skips_completed(tmp_path, fake_gem5, sweep_argv):
+    out = tmp_path / 'out'
+    assert run_sweep.main(sweep_argv(out, *GRID)) == 0
+    # 一个结果丢失、一个只写了一半（没有结束标记），其余应直接跳过
+    (run_sweep.outdir_for(out, 64, 4, 16) / 'stats.txt').unlink()
+    partial = run_sweep.outdir_for(out, 256, 64, 256) / 'stats.txt'
+    partial.write_text(partial.read_text().split('---------- End')[0])
+    fake_gem5.with_name('calls.log').unlink()
+
+    assert run_sweep.main(sweep_argv(out, *GRID)) == 0
+    calls = gem5_calls(fake_gem5)
+    assert len(calls) == 2
+    assert any('regs64-iq4-rob16' in c for c in calls)
+    assert any('regs256-iq64-rob256' in c for c in calls)
+    summary = read_summary(out / 'summary.csv')
+    assert sorted(summary) == sorted(CONFIGS)
+    assert int(summary[(256, 64, 256)]['numCycles']) == expected_cycles(256, 64, 256)
+
+def test_failed_job_is_retried_and_reported(tmp_path, fake_gem5, sweep_argv, monkeypatch):
+    out = tmp_path / 'out'
+    monkeypatch.setenv('FAKE_GEM5_FAIL', '64:4:16')
+    assert run_sweep.main(sweep_argv(out, '--regs', '64', '--iq', '4', '16', '--rob', '16',
+                                     '--retries', '2')) == 1
+    calls = gem5_calls(fake_gem5)
+    assert sum('int-regs=64 ' in c and 'iq-entries=4 ' in c for c in calls) == 3
+    # 失败的组合不出现在 summary 中，也不会留下 NA 行
+    assert sorted(read_summary(out / 'summary.csv')) == [(64, 16, 16)]
+
+def test_summary_write_is_atomic(tmp_path):
+    path = tmp_path / 'summary.csv'
+    rows = [{'regs': 64, 'iq': 4, 'rob': 16, 'numCycles': 1, 'ROBFull': 0, 'IQFull': 0, 'FullRegs': 0}]
+    run_sweep.write_summary_atomic(path, rows)
+    before = path.read_text()
+    # 写到一半出错：原文件保持不变，也不留下临时文件
+    with pytest.raises(ValueError):
+        run_sweep.write_summary_atomic(path, rows + [{'regs': 1, 'bogus': 2}])
+    assert path.read_text() == before
+    assert [p.name for p in tmp_path.iterdir()] == ['summary.csv']
+
+def test_cache_hit_skips_simulation(tmp_path, fake_gem5, sweep_argv):
+    cache = tmp_path / 'cache'
+    grid = ['--regs', '64', '--iq', '4', '16', '--rob', '16', '--cache-dir', str(cache)]
+    assert run_sweep.main(sweep_argv(tmp_path / 'a', *grid)) == 0
+    assert len(gem5_calls(fake_gem5)) == 2
+    # 另一个输出目录中的同样请求全部命中缓存，只有 --config-only 探测
+    assert run_sweep.main(sweep_argv(tmp_path / 'b', *grid)) == 0
+    assert len(gem5_calls(fake_gem5)) == 2
+    assert read_summary(tmp_path / 'a' / 'summary.csv') == read_summary(tmp_path / 'b' / 'summary.csv')
+
+def test_batches_match_single_runs(tmp_path, fake_gem5, sweep_argv):
+    assert run_sweep.main(sweep_argv(tmp_path / 'single', *GRID)) == 0
+    assert run_sweep.main(sweep_argv(tmp_path / 'batch', *GRID, '--batch-size', '4')) == 0
+    assert len(gem5_calls(fake_gem5)) == len(CONFIGS) + 5
+    assert read_summary(tmp_path / 'single' / 'summary.csv') == read_summary(tmp_path / 'batch' / 'summary.csv')
+
+def test_prune_matches_full_sweep(tmp_path, fake_gem5, sweep_argv):
+    assert run_sweep.main(sweep_argv(tmp_path / 'full', *GRID)) == 0
+    full_calls = len(gem5_calls(fake_gem5))
+    assert run_sweep.main(sweep_argv(tmp_path / 'pruned', *GRID, '--prune')) == 0
+    pruned_calls = len(gem5_calls(fake_gem5)) - full_calls
+
+    full = read_summary(tmp_path / 'full' / 'summary.csv')
+    pruned = read_summary(tmp_path / 'pruned' / 'summary.csv')
+    assert sorted(pruned) == sorted(full)
+    for cfg, row in full.items():
+        for col in ('numCycles', 'ROBFull', 'IQFull', 'FullRegs'):
+            assert pruned[cfg][col] == row[col], (cfg, col)
+    inferred = [cfg for cfg, row in pruned.items() if row['inferred_from']]
+    assert inferred and pruned_calls == len(CONFIGS) - len(inferred)
+    # 结果库中推断点带有标记，分析脚本默认读不到
+    with ResultStore(tmp_path / 'pruned' / 'results.db') as store:
+        assert len(store.load(['numCycles'])) == len(CONFIGS) - len(inferred)
+        assert sum(r['inferred'] for r in store.load(['numCycles'], include_inferred=True)) == len(inferred)
+    # 只有某轴的前驱在该轴上已饱和时才推断
+    assert pruned[(256, 16, 64)]['inferred_from'] == ''
+    assert pruned[(256, 64, 256)]['inferred_from'] != ''
+
+def test_peak_rss_feeds_cost_model(tmp_path, fake_gem5, sweep_argv):
+    out = tmp_path / 'out'
+    assert run_sweep.main(sweep_argv(out, '--regs', '64', '--iq', '4', '16', '--rob', '16')) == 0
+    with ResultStore(out / 'results.db') as store:
+        rows = store.load(['hostMaxRss', 'hostMemory'])
+        assert rows and all(0 < r['hostMaxRss'] < r['hostMemory'] for r in rows)
+        # 预测用的是峰值常驻内存，而不是 gem5 报告的虚拟内存 hostMemory
+        model = run_sweep.JobCostModel(store)
+        assert model.predict((64, 4, 16))[0] == rows[0]['hostMaxRss']
+
+def test_timeout_kills_gem5(tmp_path, fake_gem5, sweep_argv, monkeypatch):
+    out = tmp_path / 'out'
+    monkeypatch.setenv('FAKE_GEM5_SLEEP', '30')
+    assert run_sweep.main(sweep_argv(out, '--regs', '64', '--iq', '4', '--rob', '16',
+                                     '--timeout', '0.5', '--retries', '0')) == 1
+    assert not (run_sweep.outdir_for(out, 64, 4, 16) / 'stats.txt').exists()
@@ -0,0 +1,37 @@
+"""surrogate.py：重复配置、不正定的候选核矩阵与留一法误差门限"""
+
+import numpy as np
+import pytest
+
+from surrogate import Surrogate, _cholesky
+
+def rows_for(configs, cycles, stalls):
+    return [{'regs': r, 'iq': i, 'rob': b, 'numCycles': cycles(r, i, b), 'IQFull': stalls(r, i, b)}
+            for r, i, b in configs]
+
+CONFIGS = [(r, i, b) for r in (64, 128, 256) for i in (8, 16, 32) for b in (32, 64, 128)]
+
+def smooth(r, i, b):
+    return 1e6 * (1 + 64 / r + 16 / i + 32 / b)
+
+def test_cholesky_skips_singular_candidates():
+    good = np.eye(3)
+    bad = np.ones((3, 3)) - 2 * np.eye(3)
+    chol, ok = _cholesky(np.array([good, bad, 2 * good]))
+    assert list(ok) == [0, 2]
+    assert np.allclose(chol[1] @ chol[1].T, 2 * good)
+
+def test_duplicate_configs_are_merged():
+    rows = rows_for(CONFIGS, smooth, lambda *c: 0) * 2
+    model = Surrogate(rows, ['numCycles', 'IQFull'])
+    assert len(model.configs) == len(CONFIGS)
+    assert model.validate()['numCycles'] < 0.05
+
+def test_suggest_refuses_unreliable_target():
+    rng = np.random.default_rng(0)
+    noisy = {c: float(rng.integers(0, 10 ** 6)) * rng.integers(0, 2) for c in CONFIGS}
+    model = Surrogate(rows_for(CONFIGS, smooth, lambda *c: noisy[c]), ['numCycles', 'IQFull'])
+    candidates = [(96, 12, 48), (192, 24, 96), (64, 8, 128)]
+    assert len(model.suggest(candidates, 3)) == 2
+    with pytest.raises(ValueError):
+        model.suggest(candidates, 3, target='IQFull')
@@ -0,0 +1,25 @@
+"""timeseries.py：workbegin 之前的周期快照归入 pre_roi，按周期相减"""
+
+import json
+
+from timeseries import TimeSeries
+
+def write_blocks(odir, blocks, labels):
+    text = ''
+    for insts, cycles in blocks:
+        text += ('---------- Begin Simulation Statistics ----------\n'
+                 f'system.cpu.commitStats0.numInsts {insts}\nsystem.cpu.numCycles {cycles}\n'
+                 '---------- End Simulation Statistics   ----------\n')
+    (odir / 'stats.txt').write_text(text)
+    (odir / 'stats_blocks.json').write_text(json.dumps(labels))
+
+def test_pre_roi_periods_are_split(tmp_path):
+    # O3CPU.py 在 workbegin 时把之前的 full:period 快照改标为 pre_roi:period
+    write_blocks(tmp_path, [(100, 300), (200, 500), (250, 600), (100, 120), (180, 200)],
+                 ['pre_roi:period', 'pre_roi:period', 'pre_roi', 'roi:period', 'roi'])
+    ts = TimeSeries.load(tmp_path)
+    keep, cpi = ts.cpi('pre_roi')
+    assert keep == [0, 1, 2]
+    assert list(cpi) == [3.0, 2.0, 2.0]
+    keep, cpi = ts.cpi('roi')
+    assert keep == [3, 4] and list(cpi) == [1.2, 1.0]
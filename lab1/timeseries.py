@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+周期性统计（O3CPU.py --stats-period-ticks / --stats-period-insts）的时间序列
+- 流式读取 stats.txt 的全部统计块，得到紧凑的 (块 × 统计项) numpy 数组
+- "<阶段>:period" 块是该阶段开始以来的累计值（dump 不 reset），
+  相邻块相减得到每个周期的计数；阶段的收尾块给出最后一段
+- 每个周期的 CPI 与 ROB/IQ/寄存器停顿，以及 CPI 进入稳态的位置
+用法：python3 timeseries.py <输出目录> [--phase roi] [--window 4] [--tol 0.02]
+"""
+
+import argparse
+import sys
+from pathlib import Path
+
+import numpy as np
+
+from parse_stats import METRICS, iter_blocks, load_block_labels
+from sampling import INSTS_KEY
+
+PERIOD_SUFFIX = ':period'
+
+# 默认取出的统计项
+DEFAULT_NAMES = [INSTS_KEY, 'simTicks'] + list(METRICS.values())
+
+def block_phase(label):
+    """块标签所属的阶段：'roi:period' 与 'roi' 都属于 roi"""
+    return label[:-len(PERIOD_SUFFIX)] if label.endswith(PERIOD_SUFFIX) else label
+
+def _value(block, name):
+    try:
+        return block[name]
+    except KeyError:
+        return np.nan
+
+class TimeSeries:
+    """一次仿真全部统计块的矩阵：values[块, 统计项]"""
+
+    def __init__(self, labels, names, values):
+        self.labels = labels
+        self.names = list(names)
+        self.values = values
+        self.phases = [block_phase(label) for label in labels]
+
+    @classmethod
+    def load(cls, outdir, names=None):
+        """names 为 None 时取第一个块中出现的全部统计项"""
+        outdir = Path(outdir)
+        rows = []
+        with open(outdir / 'stats.txt', 'r', encoding='utf-8', errors='ignore') as f:
+            for block in iter_blocks(f):
+                if names is None:
+                    names = list(block)
+                rows.append([_value(block, n) for n in names])
+        values = np.array(rows, dtype=float).reshape(len(rows), len(names or []))
+        labels = load_block_labels(outdir) or ['full'] * len(rows)
+        return cls(labels[:len(rows)], names or [], values)
+
+    def column(self, name):
+        return self.values[:, self.names.index(name)]
+
+    def intervals(self, phase=None):
+        """每个周期的增量：同一阶段内相邻累计块相减；phase 给定时只保留该阶段"""
+        deltas = self.values.copy()
+        for i in range(1, len(self.labels)):
+            if self.phases[i] == self.phases[i - 1] and self.labels[i - 1].endswith(PERIOD_SUFFIX):
+                deltas[i] = self.values[i] - self.values[i - 1]
+        keep = [i for i, p in enumerate(self.phases) if phase is None or p == phase]
+        return keep, deltas[keep]
+
+    def cpi(self, phase=None):
+        """每个周期的 CPI"""
+        keep, deltas = self.intervals(phase)
+        insts = deltas[:, self.names.index(INSTS_KEY)]
+        cycles = deltas[:, self.names.index(METRICS['numCycles'])]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return keep, np.where(insts > 0, cycles / insts, np.nan)
+
+def steady_state(cpi, window=4, tol=0.02):
+    """CPI 进入稳态的第一个周期：从它开始连续 window 个周期的 (max-min)/mean < tol，没有则返回 None"""
+    if len(cpi) < window:
+        return None
+    windows = np.lib.stride_tricks.sliding_window_view(cpi, window)
+    mean = windows.mean(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        spread = (windows.max(axis=1) - windows.min(axis=1)) / mean
+    hits = np.flatnonzero(spread < tol)
+    return int(hits[0]) if len(hits) else None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('outdir')
+    parser.add_argument('--phase', default=None, help="只看某一阶段（full/pre_roi/roi/post_roi）")
+    parser.add_argument('--window', type=int, default=4)
+    parser.add_argument('--tol', type=float, default=0.02)
+    args = parser.parse_args()
+
+    ts = TimeSeries.load(args.outdir, DEFAULT_NAMES)
+    keep, deltas = ts.intervals(args.phase)
+    _, cpi = ts.cpi(args.phase)
+    cols = [ts.names.index(METRICS[c]) for c in ('ROBFull', 'IQFull', 'FullRegs')]
+    insts = deltas[:, ts.names.index(INSTS_KEY)]
+
+    print(f"{'块':>4} {'标签':<16} {'指令数':>12} {'CPI':>8} {'ROBFull/KI':>11} {'IQFull/KI':>10} {'FullRegs/KI':>12}")
+    print("-" * 79)
+    for j, i in enumerate(keep):
+        per_ki = deltas[j, cols] * 1000 / insts[j] if insts[j] > 0 else [np.nan] * 3
+        print(f"{i:>4} {ts.labels[i]:<16} {insts[j]:>12,.0f} {cpi[j]:>8.4f} "
+              f"{per_ki[0]:>11.2f} {per_ki[1]:>10.2f} {per_ki[2]:>12.2f}")
+
+    start = steady_state(cpi, args.window, args.tol)
+    if start is None:
+        print(f"\n未检测到稳态（窗口 {args.window}，阈值 {args.tol:.1%}）")
+    else:
+        done = np.nansum(insts[:start + args.window])
+        print(f"\n稳态从块 {keep[start]} 开始；此时已仿真 {done:,.0f} / {np.nansum(insts):,.0f} 条指令，"
+              f"之后可提前结束（O3CPU.py --steady-state-tol）")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+基于指令轨迹的乱序窗口模型：快速估计大量 ROB/IQ/物理寄存器配置的性能
+1. 用 gem5 抓一次提交指令轨迹（Exec 调试输出），例如：
+   gem5.opt -d out/trace O3CPU.py --cmd=daxpy.riscv --checkpoint-dir=out/roi-checkpoint \\
+       --max-insts=200000 --exec-trace=trace.out
+2. 轨迹解析为依赖关系（寄存器生产者）、操作类型延迟和访存地址（经过与
+   O3CPU.py 相同参数的 L1D/L2 模型得到每条访存的延迟），解析结果缓存在
+   <轨迹>.npz 中
+3. 按程序顺序重放：每条指令的分派受宽度、ROB（更早第 ROB 条指令提交）、
+   IQ（更早第 IQ 条指令发射，近似按序释放）和空闲物理寄存器（更早的同类
+   写寄存器指令提交）约束，分派被推迟的周期记入对应的 *Full 计数；
+   所有配置作为 numpy 向量同时重放，耗时只取决于轨迹长度
+4. 轨迹窗口的 CPI 与停顿率按总指令数外推，并用结果库中已有的 gem5 结果
+   做线性校准（周期：y = a·x + b；停顿计数：按比例缩放）
+用法：python3 window_model.py trace.out [--limit N] [--csv grid.csv]
+"""
+
+import argparse
+import csv
+import itertools
+import re
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+from parse_stats import file_signature
+from result_store import DEFAULT_DB, PARAMS, open_store
+
+# RISC-V 体系结构寄存器：整数 0..31，浮点 32..63
+_INT_ABI = ['zero', 'ra', 'sp', 'gp', 'tp', 't0', 't1', 't2', 's0', 's1'] + \
+    [f'a{i}' for i in range(8)] + [f's{i}' for i in range(2, 12)] + [f't{i}' for i in range(3, 7)]
+_FLOAT_ABI = [f'ft{i}' for i in range(8)] + ['fs0', 'fs1'] + [f'fa{i}' for i in range(8)] + \
+    [f'fs{i}' for i in range(2, 12)] + [f'ft{i}' for i in range(8, 12)]
+REG_IDS = {name: i for i, name in enumerate(_INT_ABI)}
+REG_IDS.update({f'x{i}': i for i in range(32)})
+REG_IDS['fp'] = REG_IDS['s0']
+REG_IDS.update({name: 32 + i for i, name in enumerate(_FLOAT_ABI)})
+REG_IDS.update({f'f{i}': 32 + i for i in range(32)})
+ARCH_REGS = 32
+
+# 没有目的寄存器的指令（第一个操作数是源操作数）
+_STORES = {'sb', 'sh', 'sw', 'sd', 'fsh', 'fsw', 'fsd', 'swsp', 'sdsp', 'fsdsp', 'fswsp'}
+_BRANCHES = {'beq', 'bne', 'blt', 'bge', 'bltu', 'bgeu', 'beqz', 'bnez', 'blez', 'bgez', 'bltz', 'bgtz',
+             'bgt', 'ble', 'bgtu', 'bleu', 'j', 'jr', 'ret'}
+_NO_DEST = _STORES | _BRANCHES | {'fence', 'fence.i', 'ecall', 'ebreak', 'nop', 'wfi'}
+
+# 功能单元延迟（周期），与 gem5 O3 默认 FUPool 一致
+OP_LATENCY = {
+    'IntAlu': 1, 'IntMult': 3, 'IntDiv': 20,
+    'FloatAdd': 2, 'FloatCmp': 2, 'FloatCvt': 2, 'FloatMult': 4, 'FloatMultAcc': 5,
+    'FloatMisc': 3, 'FloatDiv': 12, 'FloatSqrt': 24,
+    'MemWrite': 1, 'FloatMemWrite': 1,
+}
+_LOADS = {'MemRead', 'FloatMemRead'}
+_STORE_CLASSES = {'MemWrite', 'FloatMemWrite'}
+
+# 访存延迟（周期）：L1 命中 / L2 命中 / 访问 DRAM，对应 O3CPU.py 的缓存参数
+MEM_LATENCY = (4, 44, 144)
+L1D = (64 * 1024, 2)
+L2 = (256 * 1024, 8)
+LINE = 64
+
+_ADDR_RE = re.compile(r'A=(0x[0-9a-fA-F]+)')
+_SPLIT_RE = re.compile(r'[\s,()]+')
+
+class _Cache:
+    """组相联 LRU 缓存，只记录标签"""
+
+    def __init__(self, size, assoc):
+        self.assoc = assoc
+        self.nsets = size // (assoc * LINE)
+        self.sets = [[] for _ in range(self.nsets)]
+
+    def access(self, line):
+        ways = self.sets[line % self.nsets]
+        if line in ways:
+            ways.remove(line)
+            ways.append(line)
+            return True
+        ways.append(line)
+        if len(ways) > self.assoc:
+            ways.pop(0)
+        return False
+
+def parse_exec_line(line):
+    """一行 Exec 输出 -> (操作类型, 目的寄存器, [源寄存器], 访存地址)，不是指令行返回 None
+
+    格式：`tick: system.cpu: T0 : 0x10450 @daxpy+12 : fld fa5, 0(a0) : FloatMemRead : D=... A=0x...`
+    """
+    parts = line.split(' : ')
+    if len(parts) < 4:
+        return None
+    mnemonic, _, operands = parts[2].strip().partition(' ')
+    for prefix in ('c_', 'c.'):
+        if mnemonic.startswith(prefix):
+            mnemonic = mnemonic[len(prefix):]
+    tokens = [t for t in _SPLIT_RE.split(operands) if t]
+    regs = [REG_IDS.get(t) for t in tokens]
+    dest = None
+    if mnemonic not in _NO_DEST and regs and regs[0] is not None:
+        dest = regs[0]
+        regs = regs[1:]
+    srcs = [r for r in regs if r is not None and r != 0]
+    if dest == 0:
+        dest = None
+    m = _ADDR_RE.search(parts[4]) if len(parts) > 4 else None
+    return parts[3].strip(), dest, srcs, int(m.group(1), 16) if m else None
+
+class Trace:
+    """解析后的轨迹：每条指令的延迟、生产者下标（最多 3 个，-1 表示无）和目的寄存器类别"""
+
+    def __init__(self, latency, producers, dest_kind):
+        self.latency = latency
+        self.producers = producers
+        self.dest_kind = dest_kind      # 0: 无，1: 整数，2: 浮点
+
+    def __len__(self):
+        return len(self.latency)
+
+    @classmethod
+    def parse(cls, lines, limit=None):
+        l1, l2 = _Cache(*L1D), _Cache(*L2)
+        last_writer = {}
+        latency, producers, dest_kind = [], [], []
+        for ln in lines:
+            rec = parse_exec_line(ln)
+            if rec is None:
+                continue
+            opclass, dest, srcs, addr = rec
+            i = len(latency)
+            if opclass in _LOADS or opclass in _STORE_CLASSES:
+                lat = MEM_LATENCY[0]
+                if addr is not None:
+                    line = addr // LINE
+                    if not l1.access(line):
+                        lat = MEM_LATENCY[1] if l2.access(line) else MEM_LATENCY[2]
+                if opclass in _STORE_CLASSES:
+                    # 写操作在存储缓冲中完成，不阻塞后续指令
+                    lat = OP_LATENCY[opclass]
+            else:
+                lat = OP_LATENCY.get(opclass, 1)
+            prods = [last_writer[r] for r in srcs if r in last_writer][:3]
+            latency.append(lat)
+            producers.append(prods + [-1] * (3 - len(prods)))
+            kind = 0
+            if dest is not None:
+                last_writer[dest] = i
+                kind = 1 if dest < ARCH_REGS else 2
+            dest_kind.append(kind)
+            if limit and len(latency) >= limit:
+                break
+        if not latency:
+            raise ValueError("轨迹中没有指令（需要 Exec 调试输出）")
+        return cls(np.array(latency, dtype=np.int64),
+                   np.array(producers, dtype=np.int64).reshape(-1, 3),
+                   np.array(dest_kind, dtype=np.int8))
+
+    @classmethod
+    def load(cls, path, limit=None):
+        """读取轨迹，解析结果按 路径+mtime/size+limit 缓存在 <轨迹>.npz"""
+        path = Path(path)
+        cache = path.with_name(path.name + '.npz')
+        sig = np.array(file_signature(path) + [limit or 0], dtype=np.int64)
+        if cache.exists():
+            with np.load(cache) as z:
+                if np.array_equal(z['sig'], sig):
+                    return cls(z['latency'], z['producers'], z['dest_kind'])
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            trace = cls.parse(f, limit)
+        np.savez(cache, sig=sig, latency=trace.latency, producers=trace.producers,
+                 dest_kind=trace.dest_kind)
+        return trace
+
+def simulate(trace, regs, iq, rob, fregs=64, width=8, warmup=0):
+    """同时重放所有配置，返回 {cpi, ROBFull, IQFull, FullRegs}（后三项为每条指令的停顿周期）
+
+    regs/iq/rob/fregs 为可广播的数组，结果为展平后的一维数组。
+    """
+    regs, iq, rob, fregs = (a.ravel() for a in np.broadcast_arrays(
+        *(np.asarray(v, dtype=np.int64) for v in (regs, iq, rob, fregs))))
+    if (regs <= ARCH_REGS).any() or (fregs <= ARCH_REGS).any():
+        raise ValueError(f"物理寄存器数必须大于体系结构寄存器数 {ARCH_REGS}")
+    nconf = len(regs)
+    size = int(max(rob.max(), iq.max(), width)) + 1
+    free = {1: regs - ARCH_REGS, 2: fregs - ARCH_REGS}
+    wsize = {k: int(v.max()) for k, v in free.items()}
+    # 按配置取环形缓冲中不同列时用一维下标：行首偏移 + 列号
+    row = np.arange(nconf) * size
+    wrow = {k: np.arange(nconf) * n for k, n in wsize.items()}
+
+    # 环形缓冲：下标 i % size 处为第 i 条指令的时间；未写入的位置为 0，约束自然不生效
+    disp_ring = np.zeros((nconf, width))
+    commit_ring = np.zeros((nconf, size))
+    issue_ring = np.zeros((nconf, size))
+    complete_ring = np.zeros((nconf, size))
+    writer_ring = {k: np.zeros((nconf, n)) for k, n in wsize.items()}
+    writers = {1: 0, 2: 0}
+    last_disp = np.zeros(nconf)
+    last_commit = np.zeros(nconf)
+    stalls = np.zeros((3, nconf))
+    start = np.zeros(nconf)
+    zero = np.zeros(nconf)
+
+    latency, producers, dest_kind = trace.latency.tolist(), trace.producers.tolist(), trace.dest_kind.tolist()
+    for i in range(len(latency)):
+        if i == warmup:
+            start = last_commit.copy()
+            stalls[:] = 0
+        base = np.maximum(last_disp, disp_ring[:, i % width] + 1)
+        rob_t = commit_ring.take(row + (i - rob) % size)
+        iq_t = issue_ring.take(row + (i - iq) % size)
+        kind = dest_kind[i]
+        if kind:
+            k = writers[kind]
+            reg_t = writer_ring[kind].take(wrow[kind] + (k - free[kind]) % wsize[kind])
+        else:
+            reg_t = zero
+        disp = np.maximum(np.maximum(base, rob_t), np.maximum(iq_t, reg_t))
+
+        # 停顿归因顺序与 gem5 rename 的检查顺序一致：ROB、IQ、寄存器
+        stall = disp - base
+        if stall.any():
+            by_rob = rob_t >= disp
+            by_iq = ~by_rob & (iq_t >= disp)
+            stalls[0] += stall * by_rob
+            stalls[1] += stall * by_iq
+            stalls[2] += stall * ~(by_rob | by_iq)
+
+        ready = disp + 1
+        for p in producers[i]:
+            if p >= 0 and i - p < size:
+                ready = np.maximum(ready, complete_ring[:, p % size])
+        complete = ready + latency[i]
+        commit = np.maximum(np.maximum(complete + 1, last_commit), commit_ring[:, (i - width) % size] + 1)
+
+        disp_ring[:, i % width] = disp
+        issue_ring[:, i % size] = ready
+        complete_ring[:, i % size] = complete
+        commit_ring[:, i % size] = commit
+        if kind:
+            writer_ring[kind][:, writers[kind] % wsize[kind]] = commit
+            writers[kind] += 1
+        last_disp, last_commit = disp, commit
+
+    n = max(len(latency) - warmup, 1)
+    return {
+        'cpi': (last_commit - start) / n,
+        'ROBFull': stalls[0] / n,
+        'IQFull': stalls[1] / n,
+        'FullRegs': stalls[2] / n,
+    }
+
+class WindowModel:
+    """轨迹重放 + 按 gem5 结果校准"""
+
+    def __init__(self, trace, width=8, warmup=None):
+        self.trace = trace
+        self.width = width
+        self.warmup = len(trace) // 10 if warmup is None else warmup
+        self.insts = None
+        self.coef = None
+
+    def raw(self, regs, iq, rob):
+        return simulate(self.trace, regs, iq, rob, width=self.width, warmup=self.warmup)
+
+    def calibrate(self, rows):
+        """用已有 gem5 结果拟合校准系数，返回 {列: 平均相对误差}"""
+        rows = [r for r in rows if all(r[p] is not None for p in PARAMS) and r['numCycles'] and r['simInsts']]
+        if not rows:
+            raise ValueError("结果库中没有可用于校准的仿真结果")
+        self.insts = float(np.median([r['simInsts'] for r in rows]))
+        raw = self.raw(*(np.array([r[p] for r in rows]) for p in PARAMS))
+        insts = np.array([r['simInsts'] for r in rows], dtype=float)
+        self.coef = {}
+        errors = {}
+        y = np.array([r['numCycles'] for r in rows], dtype=float)
+        x = raw['cpi'] * insts
+        a, b = np.linalg.lstsq(np.stack([x, np.ones_like(x)], axis=1), y, rcond=None)[0]
+        self.coef['numCycles'] = (a, b)
+        errors['numCycles'] = float(np.mean(np.abs(a * x + b - y) / y))
+        for col in ('ROBFull', 'IQFull', 'FullRegs'):
+            y = np.array([r[col] for r in rows], dtype=float)
+            x = raw[col] * insts
+            k = float(x @ y / (x @ x)) if x.any() else 0.0
+            self.coef[col] = (k, 0.0)
+            errors[col] = float(np.sum(np.abs(k * x - y)) / max(np.sum(y), 1.0))
+        return errors
+
+    def predict(self, regs, iq, rob, insts=None):
+        """外推到 insts 条指令（默认为校准数据的指令数）并应用校准系数"""
+        raw = self.raw(regs, iq, rob)
+        insts = insts or self.insts or len(self.trace)
+        out = {'numCycles': raw['cpi'] * insts}
+        for col in ('ROBFull', 'IQFull', 'FullRegs'):
+            out[col] = raw[col] * insts
+        if self.coef:
+            for col, (a, b) in self.coef.items():
+                out[col] = np.maximum(a * out[col] + b, 0.0)
+        return out
+
+# 默认扫描网格：2 的幂及其中点，共 10 * 13 * 13 = 1690 个配置
+GRID_REGS = [48, 64, 96, 128, 192, 256, 384, 512, 768, 1024]
+GRID_SIZES = [4, 6, 8, 12, 16, 24, 32, 48, 64, 96, 128, 192, 256]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('trace', help="O3CPU.py --exec-trace 生成的轨迹文件")
+    parser.add_argument('--limit', type=int, default=None, help="最多读取的指令数")
+    parser.add_argument('--warmup', type=int, default=None, help="不计入统计的预热指令数（默认 10%%）")
+    parser.add_argument('--width', type=int, default=8)
+    parser.add_argument('--db', default=DEFAULT_DB, help="用于校准的结果库")
+    parser.add_argument('--no-calibrate', action='store_true')
+    parser.add_argument('--regs', type=int, nargs='+', default=GRID_REGS)
+    parser.add_argument('--iq', type=int, nargs='+', default=GRID_SIZES)
+    parser.add_argument('--rob', type=int, nargs='+', default=GRID_SIZES)
+    parser.add_argument('--csv', default=None, help="把全部预测写入 CSV")
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    trace = Trace.load(args.trace, args.limit)
+    model = WindowModel(trace, args.width, args.warmup)
+    print(f"轨迹: {len(trace)} 条指令（{time.perf_counter() - t0:.2f}s）")
+
+    if not args.no_calibrate:
+        t0 = time.perf_counter()
+        with open_store(args.db) as store:
+            rows = store.load(['numCycles', 'ROBFull', 'IQFull', 'FullRegs', 'simInsts'])
+        errors = model.calibrate(rows)
+        print(f"校准: {len(rows)} 个 gem5 结果（{time.perf_counter() - t0:.2f}s），平均相对误差 "
+              + ', '.join(f"{col} {err:.1%}" for col, err in errors.items()))
+
+    grid = np.array(list(itertools.product(args.regs, args.iq, args.rob)))
+    t0 = time.perf_counter()
+    pred = model.predict(grid[:, 0], grid[:, 1], grid[:, 2])
+    print(f"预测: {len(grid)} 个配置（{time.perf_counter() - t0:.2f}s）")
+
+    if args.csv:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(list(PARAMS) + list(pred))
+            for j, cfg in enumerate(grid):
+                writer.writerow(list(cfg) + [int(round(pred[col][j])) for col in pred])
+        print(f"已写入 {args.csv}")
+    else:
+        order = np.argsort(pred['numCycles'])
+        print(f"\n{'regs':>5} {'iq':>5} {'rob':>5} {'numCycles':>14} {'ROBFull':>12} {'IQFull':>12} {'FullRegs':>12}")
+        print("-" * 71)
+        for j in order[:10]:
+            print(f"{grid[j, 0]:>5} {grid[j, 1]:>5} {grid[j, 2]:>5} {pred['numCycles'][j]:>14,.0f} "
+                  f"{pred['ROBFull'][j]:>12,.0f} {pred['IQFull'][j]:>12,.0f} {pred['FullRegs'][j]:>12,.0f}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())